@@ -1,5 +1,6 @@
 from chainer_compiler.chainer_compiler import compile  # noqa
 from chainer_compiler.chainer_compiler import compile_onnx  # noqa
 from chainer_compiler.chainer_compiler import export  # noqa
+from chainer_compiler.chainer_compiler import export_model  # noqa
 from chainer_compiler.chainer_compiler import use_unified_memory_allocator  # noqa
 from chainer_compiler.chainer_compiler import use_chainerx_shared_allocator  # noqa
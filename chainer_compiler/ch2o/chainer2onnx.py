@@ -2,7 +2,6 @@
 
 import ast
 import gast
-import inspect
 
 import numpy as np
 import onnx
@@ -18,6 +17,7 @@ import types
 import chainer
 import numpy
 
+from chainer_compiler import source_cache
 from chainer_compiler.ch2o.test_args import dprint
 from chainer_compiler.ch2o.env import Env
 from chainer_compiler.ch2o.utils import new_tensor, new_sequence, clip_head, ValueReturn, istensor, totensor, make_graph
@@ -25,6 +25,7 @@ from chainer_compiler.ch2o.links import Link2NodeClass
 from chainer_compiler.ch2o.funcs import Func, Func2NodeClass, Function_Concat, Function_Dummy, castto
 from chainer_compiler.ch2o.builtin_funcs import builtin_functions
 from chainer_compiler.ch2o.value import Value
+from chainer_compiler.ch2o import utils
 
 import builtins
 
@@ -99,9 +100,8 @@ class Function_base(object):
 class User_Defined_Function(Function_base):
     def __init__(self, func):
         self.func = func
-        src = clip_head(inspect.getsource(func))
-        dprint(src)
-        self.ast = gast.ast_to_gast(ast.parse(src)).body[0]
+        dprint(source_cache.get_source(func)[0])
+        self.ast = source_cache.get_function_ast(func, clip_head)
         assert(isinstance(self.ast, gast.gast.FunctionDef))
 
     def call(self, args, kwargs, env):
@@ -112,9 +112,8 @@ class User_Defined_Function(Function_base):
 class User_Defined_Func_In_Link(Function_base):
     def __init__(self, ch, fn):
         self.ch = ch
-        src = clip_head(inspect.getsource(fn))
-        dprint(src)
-        self.ast = gast.ast_to_gast(ast.parse(src)).body[0]
+        dprint(source_cache.get_source(fn)[0])
+        self.ast = source_cache.get_function_ast(fn, clip_head)
         assert(isinstance(self.ast, gast.gast.FunctionDef))
 
     def call(self, args, kwargs, env):
@@ -125,9 +124,8 @@ class User_Defined_Func_In_Link(Function_base):
 
 class User_Defined_Link(object):
     def __init__(self, ch, env):
-        src = clip_head(inspect.getsource(ch.forward))
-        dprint(src)
-        self.ast = gast.ast_to_gast(ast.parse(src)).body[0]
+        dprint(source_cache.get_source(ch.forward)[0])
+        self.ast = source_cache.get_function_ast(ch.forward, clip_head)
 
         self.call = User_Defined_Func_In_Link(ch, ch.forward).call
 
@@ -1048,9 +1046,24 @@ def eval_ast_impl(nast, env):
     raise Exception("shouldn't reach here", nast)
 
 
-def compile_model(model, inputs):
+def compile_model(model, inputs, debug_info=None):
+    """Translates a Chainer model into an ONNX model.
+
+    `debug_info` overrides the mode of `ch2o.utils.set_debug_info_mode`
+    for this translation if specified.
+    """
+    if debug_info is not None:
+        orig_debug_info = utils.get_debug_info_mode()
+        utils.set_debug_info_mode(debug_info)
+        try:
+            return compile_model(model, inputs)
+        finally:
+            utils.set_debug_info_mode(orig_debug_info)
+
     # return helper.make_graph([],'dummy',[],[])
 
+    # Release nodes left pending by an aborted translation.
+    utils.flush_debug_info()
     init_id2name(model)
     # code.InteractiveConsole({'mo': model}).interact()
     env = Env(sys.modules[model.__module__])
@@ -1,34 +1,16 @@
 # coding: utf-8
 
 import collections
-import os
-import traceback
 
 import numpy as np
 import onnx
 from onnx import helper
 from onnx import TensorProto
 
-from chainer_compiler.ch2o.utils import new_tensor, new_sequence
+from chainer_compiler.ch2o.utils import new_tensor, new_sequence, attach_debug_info
 
 from chainer_compiler.ch2o import value
 
-def _get_trace_str():
-    # TODO(hamaji): Use parsing context instead of CH2O codebase.
-    skip_names = set(['_get_trace_str', 'addnode', 'calc', 'calc_seq',
-                      'totensor', 'to_tensor', 'to_sequence', 'to_value_info'])
-    trace = []
-    for stack in reversed(traceback.extract_stack()):
-        if stack.name in skip_names:
-            continue
-        trace.append('%s:%s:%d' %
-                     (stack.name,
-                      os.path.basename(stack.filename),
-                      stack.lineno))
-        if len(trace) == 3:
-            break
-    return ' '.join(trace)
-
 class Env(object):
     def __init__(self, module):
         # Local variables keyed by their names. When a value is an
@@ -100,7 +82,7 @@ class Env(object):
 
     def addnode(self, *args, **kwargs):
         node = helper.make_node(*args, **kwargs)
-        node.doc_string = _get_trace_str()
+        attach_debug_info(node)
         self.nodes.append(node)
 
     def add_init(self, inits, pathname):
@@ -19,6 +19,8 @@ def get_test_args(args=None):
                         help='Show less messages.')
     parser.add_argument('--allow-unused-params', action='store_true',
                         help='Allow unused parameters.')
+    parser.add_argument('--external-data', action='store_true',
+                        help='Save large initializers in an external file.')
     _args_cache = parser.parse_args(args=args)
     return _args_cache
 
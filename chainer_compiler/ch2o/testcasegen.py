@@ -10,6 +10,7 @@ import types
 import numpy as np
 import chainer
 
+from chainer_compiler import external_data
 from chainer_compiler.ch2o.chainer2onnx import compile_model
 from chainer_compiler.ch2o.test_args import get_test_args
 from chainer_compiler.ch2o.test_args import dprint
@@ -192,5 +193,9 @@ def generate_testcase(model, orig_xs,
         outputs,
         os.path.join(output_dir, 'test_data_set_0'))
 
-    with open(os.path.join(output_dir, 'model.onnx'), 'wb') as fp:
-        fp.write(onnxmod.SerializeToString())
+    model_path = os.path.join(output_dir, 'model.onnx')
+    if get_test_args().external_data:
+        external_data.save_model(onnxmod, model_path)
+    else:
+        with open(model_path, 'wb') as fp:
+            fp.write(onnxmod.SerializeToString())
@@ -2,6 +2,7 @@
 
 import collections
 import os
+import sys
 import traceback
 
 import numpy as np
@@ -12,13 +13,18 @@ from onnx import TensorProto
 
 from chainer_compiler.ch2o import value
 
+# Names of functions in CH2O which should not appear in debug info.
+_TRACE_SKIP_NAMES = set(['_get_trace_str', '_get_trace_frames',
+                         'attach_debug_info', 'addnode', 'calc', 'calc_seq',
+                         'totensor', 'to_tensor', 'to_sequence',
+                         'to_value_info'])
+
+
 def _get_trace_str():
     # TODO(hamaji): Use parsing context instead of CH2O codebase.
-    skip_names = set(['_get_trace_str', 'addnode', 'calc', 'calc_seq',
-                      'totensor', 'to_tensor', 'to_sequence', 'to_value_info'])
     trace = []
     for stack in reversed(traceback.extract_stack()):
-        if stack.name in skip_names:
+        if stack.name in _TRACE_SKIP_NAMES:
             continue
         trace.append('%s:%s:%d' %
                      (stack.name,
@@ -29,6 +35,64 @@ def _get_trace_str():
     return ' '.join(trace)
 
 
+def _get_trace_frames():
+    # Unlike `traceback.extract_stack`, this neither walks the entire
+    # stack nor reads source lines.
+    trace = []
+    frame = sys._getframe(1)
+    while frame is not None and len(trace) < 3:
+        code = frame.f_code
+        if code.co_name not in _TRACE_SKIP_NAMES:
+            trace.append((code, frame.f_lineno))
+        frame = frame.f_back
+    return trace
+
+
+def _format_trace_frames(trace):
+    return ' '.join('%s:%s:%d' % (code.co_name,
+                                  os.path.basename(code.co_filename),
+                                  lineno)
+                    for code, lineno in trace)
+
+
+# How the stack trace is recorded in `doc_string` of ONNX nodes:
+#
+# - 'off': No debug info is recorded.
+# - 'lazy': Code locations are recorded when a node is added and
+#   formatted when the node is put into a graph by `make_graph`.
+# - 'full': The stack trace is formatted when a node is added.
+DEBUG_INFO_MODES = ('off', 'lazy', 'full')
+
+_debug_info_mode = 'lazy'
+
+# A list of (node, trace) whose debug info is not formatted yet.
+_pending_traces = []
+
+
+def set_debug_info_mode(mode):
+    global _debug_info_mode
+    if mode not in DEBUG_INFO_MODES:
+        raise ValueError('Unknown debug info mode: %s' % mode)
+    _debug_info_mode = mode
+
+
+def get_debug_info_mode():
+    return _debug_info_mode
+
+
+def attach_debug_info(node):
+    if _debug_info_mode == 'lazy':
+        _pending_traces.append((node, _get_trace_frames()))
+    elif _debug_info_mode == 'full':
+        node.doc_string = _get_trace_str()
+
+
+def flush_debug_info():
+    for node, trace in _pending_traces:
+        node.doc_string = _format_trace_frames(trace)
+    del _pending_traces[:]
+
+
 _cnt = 0
 
 
@@ -168,4 +232,6 @@ def make_graph(nodes, graph_name, inputs, outputs):
         outputs_fixed.append(new_output)
 
     graph_name = gen_graph_name(graph_name)
+    # `helper.make_graph` copies nodes so debug info must be set now.
+    flush_debug_info()
     return helper.make_graph(nodes, graph_name, inputs, outputs_fixed)
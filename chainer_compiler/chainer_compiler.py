@@ -4,6 +4,8 @@ import os
 import sys
 import tempfile
 
+from chainer_compiler import compile_cache
+
 try:
     from chainer_compiler import _chainer_compiler_core
 except ImportError:
@@ -45,23 +47,6 @@ def _flatten(xs):
     return o
 
 
-def _flatten_structured(xs, tmpl):
-    o = []
-    for x, t in zip(xs, tmpl):
-        if _is_array(t):
-            assert _is_array(x)
-            o.append(x)
-        else:
-            assert not _is_array(x), '%s vs %s' % (x, t)
-            if len(x) == len(t):
-                o.extend(_flatten_structured(x, t))
-            elif len(x) == 0:
-                o.extend([None] * len(t))
-            else:
-                raise RuntimeError('%s vs %s' % (x, t))
-    return o
-
-
 def _unflatten(xs, tmpl, i=0):
     o = []
     for t in tmpl:
@@ -74,15 +59,93 @@ def _unflatten(xs, tmpl, i=0):
     return type(tmpl)(o), i
 
 
+def _signature(xs):
+    """Returns a hashable description of the nesting structure of `xs`."""
+    if _is_array(xs):
+        return None
+    if all(map(_is_array, xs)):
+        return (type(xs), len(xs))
+    return (type(xs), tuple(_signature(x) for x in xs))
+
+
+class _Spec(object):
+    """A compiled nesting structure of arrays, similar to a pytree spec.
+
+    Values sharing the structure are flattened and unflattened without
+    inspecting their elements again. A list of arrays, which is the
+    common case for sequence models, is handled by a single slice.
+    """
+
+    def __init__(self, tmpl):
+        if _is_array(tmpl):
+            self.type = None
+            self.children = None
+            self.num_leaves = 1
+            self.is_flat = False
+            return
+        self.type = type(tmpl)
+        self.children = [_Spec(t) for t in tmpl]
+        self.num_leaves = sum(c.num_leaves for c in self.children)
+        self.is_flat = all(c.type is None for c in self.children)
+
+    def flatten(self, xs):
+        o = []
+        self._flatten_into(xs, o)
+        return o
+
+    def _flatten_into(self, xs, o):
+        if self.type is None:
+            o.append(xs)
+        elif self.is_flat:
+            assert len(xs) == len(self.children)
+            o.extend(xs)
+        else:
+            assert len(xs) == len(self.children)
+            for spec, x in zip(self.children, xs):
+                spec._flatten_into(x, o)
+
+    def flatten_structured(self, xs, o):
+        """Flattens `xs` into `o`, padding empty sequences with None."""
+        if self.type is None:
+            assert _is_array(xs)
+            o.append(xs)
+        elif len(xs) == len(self.children):
+            if self.is_flat:
+                o.extend(xs)
+            else:
+                for spec, x in zip(self.children, xs):
+                    spec.flatten_structured(x, o)
+        elif len(xs) == 0:
+            o.extend([None] * self.num_leaves)
+        else:
+            raise RuntimeError('%d elements vs %d' %
+                               (len(xs), len(self.children)))
+
+    def unflatten(self, xs, i=0):
+        if self.type is None:
+            return xs[i], i + 1
+        if self.is_flat:
+            n = len(self.children)
+            return self.type(xs[i:i + n]), i + n
+        o = []
+        for spec in self.children:
+            x, i = spec.unflatten(xs, i)
+            o.append(x)
+        return self.type(o), i
+
+
 def _from_var(v, device):
     if v.is_array():
         return device.send(v.array())
+    arrays = v.array_sequence()
+    if arrays is not None:
+        return [device.send(a) for a in arrays]
     return [_from_var(x, device) for x in v.sequence()]
 
 
 class RunCompiledModel(chainer.function_node.FunctionNode):
 
-    def __init__(self, compiled_model, input_tmpl, runtime_kwargs):
+    def __init__(self, compiled_model, input_spec, runtime_options):
         self.fwd_input_names = compiled_model.fwd_input_names
         self.fwd_output_names = compiled_model.fwd_output_names
         self.bwd_input_names = compiled_model.bwd_input_names
@@ -91,28 +154,36 @@ class RunCompiledModel(chainer.function_node.FunctionNode):
         self.fwd = compiled_model.fwd
         self.bwd = compiled_model.bwd
         self.num_outputs = len(compiled_model.orig_output_names)
-        self.input_tmpl = input_tmpl
-        self.num_inputs = len(_flatten(input_tmpl))
+        self.input_spec = input_spec
+        self.num_inputs = input_spec.num_leaves
         self.chainerx_device_name = None
-        self.runtime_kwargs = runtime_kwargs
+        self.runtime_options = runtime_options
+        self.offload_retained = compiled_model.offload_retained
+
+    def _to_chx(self, v):
+        if isinstance(v, chainer.Variable):
+            v = v.array
+        v = chainer.backend.to_chx(v)
+        if self.chainerx_device_name is None:
+            self.chainerx_device_name = v.device
+        else:
+            assert self.chainerx_device_name == v.device
+        return v
 
     def _to_var(self, v):
         if _is_array(v):
-            if isinstance(v, chainer.Variable):
-                v = v.array
-            v = chainer.backend.to_chx(v)
-            if self.chainerx_device_name is None:
-                self.chainerx_device_name = v.device
-            else:
-                assert self.chainerx_device_name == v.device
-            return _chainer_compiler_core.value(v)
+            return _chainer_compiler_core.value(self._to_chx(v))
+        if all(map(_is_array, v)):
+            # Build a sequence of arrays by a single native call.
+            return _chainer_compiler_core.value_from_arrays(
+                [self._to_chx(a) for a in v])
         return _chainer_compiler_core.value([self._to_var(a) for a in v])
 
     def forward(self, args):
         flat_inputs = args[:self.num_inputs]
         param_values = args[self.num_inputs:]
         device = chainer.backend.get_device_from_array(*flat_inputs)
-        inputs, i = _unflatten(flat_inputs, self.input_tmpl)
+        inputs, i = self.input_spec.unflatten(flat_inputs)
         assert i == len(flat_inputs)
 
         entire_inputs = {}
@@ -123,56 +194,57 @@ class RunCompiledModel(chainer.function_node.FunctionNode):
         for name, value in zip(self.param_names, param_values):
             entire_inputs[name] = self._to_var(value)
 
+        # Values retained for backward are kept in a native handle
+        # and never exposed to Python as arrays.
         with chainer.using_device(self.chainerx_device_name):
-            outputs = self.fwd.run(entire_inputs, **self.runtime_kwargs)
-        outputs_and_retained = []
-        for name in self.fwd_output_names:
-            outputs_and_retained.append(outputs[name])
-
-        self.retained = outputs_and_retained[self.num_outputs:]
-        # TODO(hamaji): Do not hold actual arrays.
-        self.nested_outputs = []
-        for output in outputs_and_retained[:self.num_outputs]:
-            self.nested_outputs.append(_from_var(output, device))
-        flat_outputs = _flatten(self.nested_outputs)
-        return tuple(flat_outputs)
+            outputs, self.retained = self.fwd.run_and_retain(
+                entire_inputs, self.runtime_options,
+                self.fwd_output_names[:self.num_outputs],
+                self.fwd_output_names[self.num_outputs:])
+        if self.offload_retained:
+            self.retained.offload()
+
+        nested_outputs = [_from_var(output, device) for output in outputs]
+        self.output_spec = _Spec(nested_outputs)
+        return tuple(self.output_spec.flatten(nested_outputs))
 
     def unflatten_outputs(self, flat_outputs):
-        outputs, _ = _unflatten(flat_outputs, self.nested_outputs)
+        outputs, _ = self.output_spec.unflatten(flat_outputs)
         return outputs
 
     def backward(self, indexes, flat_gys):
         device = chainer.backend.get_device_from_array(flat_gys[0].array)
-        gys, _ = _unflatten(flat_gys, self.nested_outputs)
+        gys, _ = self.output_spec.unflatten(flat_gys)
         gys = [self._to_var(gy) for gy in gys]
-        values = gys + self.retained
+        values = gys + self.retained.take()
 
         del self.retained
-        del self.nested_outputs
+        del self.output_spec
 
         inputs = {}
         assert len(self.bwd_input_names) == len(values)
         for name, value in zip(self.bwd_input_names, values):
             inputs[name] = value
 
-        state = self.bwd.prepare(inputs, **self.runtime_kwargs)
+        state = self.bwd.prepare(inputs, self.runtime_options)
         del inputs
         del values
         with chainer.using_device(self.chainerx_device_name):
             outputs = self.bwd.run(state)
         gxs = []
-        assert len(self.input_tmpl) == len(self.fwd_input_names)
-        for name, tmpl in zip(self.fwd_input_names, self.input_tmpl):
+        input_specs = self.input_spec.children
+        assert len(input_specs) == len(self.fwd_input_names)
+        for name, spec in zip(self.fwd_input_names, input_specs):
             grad_name = 'grad_out@' + name
             if grad_name in outputs:
                 gx = _from_var(outputs[grad_name], device)
-                if _is_array(tmpl):
+                if spec.type is None:
                     gxs.append(gx)
                 else:
-                    assert len(gx) == len(tmpl)
-                    gxs.extend(_flatten_structured(gx, tmpl))
+                    assert len(gx) == len(spec.children)
+                    spec.flatten_structured(gx, gxs)
             else:
-                gxs.extend([None] * len(_flatten(tmpl)))
+                gxs.extend([None] * spec.num_leaves)
 
         for name in self.param_names:
             grad_name = 'grad_out@' + name
@@ -186,39 +258,106 @@ class RunCompiledModel(chainer.function_node.FunctionNode):
         return gxs
 
 
-def export(model, inputs, filename=None, translator='onnx_chainer'):
+def export_model(model, inputs, translator='onnx_chainer'):
+    """Translates `model` into an ONNX `ModelProto` in memory."""
     if translator == 'ch2o':
         from chainer_compiler import ch2o
-        xmodel = ch2o.compile_model(model, inputs)
-        if filename is None:
-            f = tempfile.NamedTemporaryFile(delete=False)
-        else:
-            f = open(filename, 'wb')
-        f.write(xmodel.SerializeToString())
-        f.close()
-        del xmodel
+        return ch2o.compile_model(model, inputs)
     elif translator == 'onnx_chainer':
         import onnx_chainer
-        if filename is None:
-            f = tempfile.NamedTemporaryFile(delete=False)
-        else:
-            f = open(filename, 'wb')
-        onnx_chainer.export(model, inputs, filename=f)
-        f.close()
+        return onnx_chainer.export(model, inputs)
     else:
         raise NotImplementedError('Unsupported translator:',
                                   translator)
 
+
+def export(model, inputs, filename=None, translator='onnx_chainer',
+           external_data=False):
+    """Exports `model` into an ONNX file and returns its name.
+
+    If `external_data` is True, large initializers are saved in
+    `<filename>.data` so models larger than 2GB can be exported and
+    their weights are memory-mapped when they are loaded.
+    """
+    xmodel = export_model(model, inputs, translator=translator)
+    if filename is None:
+        f = tempfile.NamedTemporaryFile(delete=False)
+    else:
+        f = open(filename, 'wb')
+    if external_data:
+        f.close()
+        from chainer_compiler import external_data as external_data_lib
+        external_data_lib.save_model(xmodel, f.name)
+    else:
+        f.write(xmodel.SerializeToString())
+        f.close()
+    del xmodel
     return f.name
 
 
+def _load_graph(onnx_model):
+    """Loads a filename, serialized bytes or a `ModelProto` of ONNX."""
+    if isinstance(onnx_model, str):
+        return _chainer_compiler_core.load(onnx_model)
+    if not isinstance(onnx_model, (bytes, bytearray, memoryview)):
+        onnx_model = onnx_model.SerializeToString()
+    return _chainer_compiler_core.load_from_bytes(onnx_model)
+
+
+def _param_key_rule(translator):
+    if translator == 'ch2o':
+        return lambda key: key  # noqa
+    elif translator == 'onnx_chainer':
+        return lambda key: 'param' + key.replace('/', '_')  # noqa
+
+
+def _live_params(model, translator):
+    """Returns parameters of `model` keyed by their names in ONNX."""
+    convert_rule = _param_key_rule(translator)
+
+    params = {convert_rule(key): value for key, value
+              in model.namedparams()}
+
+    # Since avg_mean and avg_var in BatchNormalization are not parameters
+    # in chainer link, we need an additional handling.
+    for link_name, link in model.namedlinks():
+        if not isinstance(link, chainer.links.BatchNormalization):
+            continue
+        for avg_name in ['avg_mean', 'avg_var']:
+            key = convert_rule(link_name + '/' + avg_name)
+            assert key not in params
+            params[key] = getattr(link, avg_name)
+    return params
+
+
+def _strip_live_params(xmodel, model, translator):
+    """Removes initializers of parameters of `model` from `xmodel`.
+
+    The stripped parameters remain as graph inputs which only carry
+    their shapes and dtypes. `CompiledModel` binds them to the live
+    parameters of `model`, so the weights are never serialized nor
+    copied into the compiler.
+    """
+    params = _live_params(model, translator)
+    initializers = [t for t in xmodel.graph.initializer
+                    if t.name not in params]
+    if len(initializers) == len(xmodel.graph.initializer):
+        return
+    del xmodel.graph.initializer[:]
+    xmodel.graph.initializer.extend(initializers)
+
+
 class CompiledModel(chainer.Chain):
 
     def __init__(self, model, onnx_file, used_translator, dump_onnx=False,
                  computation_order=None,
                  compiler_kwargs=None,
                  runtime_kwargs=None,
-                 quiet_period=0):
+                 quiet_period=0,
+                 keep_programs=False,
+                 cache_entry=None,
+                 inference_only=None,
+                 offload_retained=False):
         super(CompiledModel, self).__init__()
         with self.init_scope():
             self.mc = model
@@ -229,21 +368,60 @@ class CompiledModel(chainer.Chain):
         self.runtime_kwargs = runtime_kwargs
         self.quiet_period = quiet_period
         self.num_iterations = 0
+        # A model compiled under `chainer.no_backprop_mode` is assumed to
+        # be used only for inference, so no backward program is built.
+        if inference_only is None:
+            inference_only = not chainer.config.enable_backprop
+        self.inference_only = inference_only
+        self.offload_retained = offload_retained
+        # Options are built once as converting them is not free.
+        self.quiet_options = _chainer_compiler_core.ChxVMOptions()
+        self.unchecked_options = _chainer_compiler_core.ChxVMOptions(
+            check_types=False)
+        if runtime_kwargs is None:
+            self.runtime_options = self.quiet_options
+        else:
+            self.runtime_options = _chainer_compiler_core.ChxVMOptions(
+                **runtime_kwargs)
 
         self.param_names = None
         self.param_values = None
+        # Compiled nesting structures of inputs keyed by `_signature`.
+        self.input_specs = {}
+        self.keep_programs = keep_programs
+        self.fwd_program = None
+        self.bwd_program = None
+        self.initializer_values = None
         # Propagate device from `model` before compiling it.
         self.to_device(model.device)
-        self.compile(onnx_file)
+        if cache_entry is None:
+            self.compile(onnx_file)
+        else:
+            self.restore(cache_entry)
+
+    def _configure(self):
+        # TODO(hamaji): Revive shape inference.
+        compiler_kwargs = {'skip_inference': True}
+        if self.compiler_kwargs is not None:
+            compiler_kwargs.update(self.compiler_kwargs)
+        _chainer_compiler_core.configure(**compiler_kwargs)
 
     def compile(self, onnx_file):
         if self.compiler_kwargs is not None:
             _chainer_compiler_core.configure(**self.compiler_kwargs)
 
-        graph = _chainer_compiler_core.load(onnx_file)
+        graph = _load_graph(onnx_file)
         self.orig_output_names = graph.output_names()
-
-        if self.computation_order is None:
+        # Parameters stripped by `_strip_live_params` are plain inputs
+        # of the graph.
+        live_params = _live_params(self.mc, self.used_translator)
+        params_by_reference = [name for name in graph.input_names()
+                               if name in live_params]
+
+        if self.inference_only:
+            fwd_graph, bwd_graph = graph, None
+            skip_scheduling = False
+        elif self.computation_order is None:
             fwd_graph, bwd_graph = graph.backward_to(
                 graph.input_names() + graph.param_names())
             skip_scheduling = False
@@ -255,86 +433,227 @@ class CompiledModel(chainer.Chain):
             sys.stderr.write('=== vvv forward vvv ===\n' +
                              fwd_graph.dump() +
                              '\n=== ^^^ forward ^^^ ===\n')
-            sys.stderr.write('=== vvv backward vvv ===\n' +
-                             bwd_graph.dump() +
-                             '\n=== ^^^ backward ^^^ ===\n')
+            if bwd_graph is not None:
+                sys.stderr.write('=== vvv backward vvv ===\n' +
+                                 bwd_graph.dump() +
+                                 '\n=== ^^^ backward ^^^ ===\n')
 
-        # TODO(hamaji): Revive shape inference.
-        compiler_kwargs = {'skip_inference': True}
-        if self.compiler_kwargs is not None:
-            compiler_kwargs.update(self.compiler_kwargs)
-        _chainer_compiler_core.configure(**compiler_kwargs)
+        self._configure()
 
         assert graph.input_names() == fwd_graph.input_names()
-        self.fwd_input_names = fwd_graph.input_names()
+        self.fwd_input_names = [name for name in fwd_graph.input_names()
+                                if name not in live_params]
         self.fwd_output_names = fwd_graph.output_names()
-        self.bwd_input_names = bwd_graph.input_names()
-        self.bwd_output_names = bwd_graph.output_names()
-        self.fwd = fwd_graph.compile(skip_scheduling)
-        self.bwd = bwd_graph.compile(skip_scheduling)
-        self.param_names = fwd_graph.param_names()
-
-        if self.used_translator == 'ch2o':
-            convert_rule = lambda key: key  # noqa
-        elif self.used_translator == 'onnx_chainer':
-            convert_rule = lambda key: 'param' + key.replace('/', '_')  # noqa
-
-        params = {convert_rule(key): value for key, value
-                  in self.mc.namedparams()}
-
-        # Since avg_mean and avg_var in BatchNormalization are not parameters
-        # in chainer link, we need an additional handling.
-        for link_name, link in self.mc.namedlinks():
-            if not isinstance(link, chainer.links.BatchNormalization):
-                continue
-            for avg_name in ['avg_mean', 'avg_var']:
-                key = convert_rule(link_name + '/' + avg_name)
-                assert key not in params
-                params[key] = getattr(link, avg_name)
+        if bwd_graph is None:
+            self.bwd_input_names = []
+            self.bwd_output_names = []
+        else:
+            self.bwd_input_names = bwd_graph.input_names()
+            self.bwd_output_names = bwd_graph.output_names()
+        self.bwd = None
+        if self.keep_programs:
+            self.fwd_program = fwd_graph.compile_program(skip_scheduling)
+            self.fwd = _chainer_compiler_core.load_chxvm(self.fwd_program)
+            if bwd_graph is not None:
+                self.bwd_program = bwd_graph.compile_program(skip_scheduling)
+                self.bwd = _chainer_compiler_core.load_chxvm(self.bwd_program)
+            self.initializer_values = {}
+        else:
+            self.fwd = fwd_graph.compile(skip_scheduling)
+            if bwd_graph is not None:
+                self.bwd = bwd_graph.compile(skip_scheduling)
+        self.param_names = fwd_graph.param_names() + params_by_reference
+
+        fwd_chxvm_vars = None
+
+        def get_initializer(name):
+            # Retrieve the initial value from ONNX initializer
+
+            # TODO(hamaji): Emit `Constant` in onnx-chainer so we will not
+            # need this branch.
+            nonlocal fwd_chxvm_vars
+            if fwd_chxvm_vars is None:
+                fwd_chxvm_vars = fwd_graph.params()
+            if name not in fwd_chxvm_vars:
+                return None
+            array = fwd_chxvm_vars[name].array()
+            if self.initializer_values is not None:
+                self.initializer_values[name] = chainerx.to_numpy(array)
+            return array
+
+        self._bind_params(get_initializer)
+
+    def restore(self, cache_entry):
+        """Restores compiled programs from an entry of `CompileCache`."""
+        self._configure()
+
+        self.orig_output_names = cache_entry['orig_output_names']
+        self.fwd_input_names = cache_entry['fwd_input_names']
+        self.fwd_output_names = cache_entry['fwd_output_names']
+        self.bwd_input_names = cache_entry['bwd_input_names']
+        self.bwd_output_names = cache_entry['bwd_output_names']
+        self.fwd_program = cache_entry['fwd_program']
+        self.bwd_program = cache_entry['bwd_program']
+        self.fwd = _chainer_compiler_core.load_chxvm(self.fwd_program)
+        self.bwd = None
+        if self.bwd_program is not None:
+            self.bwd = _chainer_compiler_core.load_chxvm(self.bwd_program)
+        self.param_names = cache_entry['param_names']
+        self.initializer_values = cache_entry['initializers']
+        self._bind_params(self.initializer_values.get)
+
+    def cache_entry(self):
+        """Returns an entry of `CompileCache` for this model.
+
+        The model must be compiled with `keep_programs=True`.
+        """
+        assert self.fwd_program is not None
+        return {
+            'orig_output_names': self.orig_output_names,
+            'fwd_input_names': self.fwd_input_names,
+            'fwd_output_names': self.fwd_output_names,
+            'bwd_input_names': self.bwd_input_names,
+            'bwd_output_names': self.bwd_output_names,
+            'param_names': self.param_names,
+            'fwd_program': self.fwd_program,
+            'bwd_program': self.bwd_program,
+            'initializers': self.initializer_values,
+        }
+
+    def _bind_params(self, get_initializer):
+        params = _live_params(self.mc, self.used_translator)
 
         self.param_values = []
-        fwd_chxvm_vars = fwd_graph.params()
         for name in self.param_names:
             if name in params:
                 self.param_values.append(params[name])
-            elif name in fwd_chxvm_vars:
-                # Retrieve the initial value from ONNX initializer
-
-                # TODO(hamaji): Emit `Constant` in onnx-chainer so we will not
-                # need this branch.
-                array = fwd_chxvm_vars[name].array()
-                array = self.device.send(array)
-                self.param_values.append(array)
-            else:
+                continue
+            array = get_initializer(name)
+            if array is None:
                 raise NotImplementedError('Initial value is uknown: ' + name)
+            self.param_values.append(self.device.send(array))
+
+    def _input_spec(self, inputs):
+        signature = _signature(inputs)
+        spec = self.input_specs.get(signature)
+        if spec is None:
+            spec = _Spec(inputs)
+            self.input_specs[signature] = spec
+        return spec
 
     def forward(self, *args):
         inputs = list(args)
-        flat_inputs = _flatten(inputs)
+        input_spec = self._input_spec(inputs)
+        flat_inputs = input_spec.flatten(inputs)
 
-        runtime_kwargs = {}
-        if (self.runtime_kwargs is not None and
-            self.num_iterations % (self.quiet_period + 1) == 0):
-            runtime_kwargs.update(self.runtime_kwargs)
+        runtime_options = self.quiet_options
+        if self.num_iterations % (self.quiet_period + 1) == 0:
+            runtime_options = self.runtime_options
         self.num_iterations += 1
 
-        runner = RunCompiledModel(self, inputs, runtime_kwargs)
-        outputs = runner.apply(flat_inputs + self.param_values)
+        if self.inference_only and chainer.config.enable_backprop:
+            # Outputs without a graph would silently get no gradients.
+            raise RuntimeError(
+                'The model is compiled only for inference. Run it under '
+                '`chainer.no_backprop_mode` or compile it with '
+                'inference_only=False')
+        if not chainer.config.enable_backprop:
+            # No gradient will be requested, so skip the FunctionNode.
+            runner, outputs = self._run_without_graph(
+                input_spec, flat_inputs, runtime_options)
+            outputs = [chainer.Variable(y, requires_grad=False)
+                       for y in outputs]
+        else:
+            runner = RunCompiledModel(self, input_spec, runtime_options)
+            outputs = runner.apply(flat_inputs + self.param_values)
         outputs = runner.unflatten_outputs(outputs)
         outputs = outputs[:len(self.orig_output_names)]
         if len(outputs) == 1:
             outputs = outputs[0]
         return outputs
 
+    def _run_without_graph(self, input_spec, flat_inputs, runtime_options):
+        runner = RunCompiledModel(self, input_spec, runtime_options)
+        param_arrays = [p.array if isinstance(p, chainer.Variable) else p
+                        for p in self.param_values]
+        flat_inputs = [x.array if isinstance(x, chainer.Variable) else x
+                       for x in flat_inputs]
+        outputs = runner.forward(tuple(flat_inputs) + tuple(param_arrays))
+        runner.retained.release()
+        del runner.retained
+        return runner, list(outputs)
+
+    def run_arrays(self, inputs, check_types=True):
+        """Runs the forward program without building a computational graph.
+
+        `inputs` is a list of arrays and the flattened outputs are returned
+        as a list of arrays. If `check_types` is False, ChxVM does not check
+        the types of inputs, which then must match the compiled ones.
+        """
+        input_spec = self._input_spec(inputs)
+        options = self.quiet_options
+        if not check_types:
+            options = self.unchecked_options
+        _, outputs = self._run_without_graph(
+            input_spec, input_spec.flatten(inputs), options)
+        return outputs
+
 
-def compile(model, inputs, translator='ch2o', **kwargs):
-    # Run translator internally
-    onnx_file = export(model, inputs, filename=None, translator=translator)
-    compiled_model = CompiledModel(model, onnx_file, translator, **kwargs)
+def compile(model, inputs, translator='ch2o', cache_dir=None,
+            cache_max_bytes=None, weights_by_reference=False, **kwargs):
+    """Compiles a Chainer model into a `CompiledModel`.
+
+    The model is translated into ONNX in memory. If `weights_by_reference`
+    is True, parameters are not passed to the compiler as initializers
+    but bound to the live parameters of `model`, so the time and the
+    memory of compilation do not grow with the size of weights. It cannot
+    be used with `computation_order`, which only differentiates
+    parameters with initializers.
+    """
+    if weights_by_reference and kwargs.get('computation_order') is not None:
+        raise ValueError(
+            'weights_by_reference cannot be used with computation_order')
+
+    def translate():
+        xmodel = export_model(model, inputs, translator=translator)
+        if weights_by_reference:
+            _strip_live_params(xmodel, model, translator)
+        return xmodel
+
+    if cache_dir is None:
+        # Run translator internally
+        compiled_model = CompiledModel(model, translate(), translator,
+                                       **kwargs)
+        return compiled_model
+
+    cache = compile_cache.CompileCache(cache_dir, max_bytes=cache_max_bytes)
+    inference_only = kwargs.pop('inference_only', None)
+    if inference_only is None:
+        inference_only = not chainer.config.enable_backprop
+    key = compile_cache.compute_key(
+        model, inputs, translator,
+        compiler_kwargs=kwargs.get('compiler_kwargs'),
+        computation_order=kwargs.get('computation_order'),
+        inference_only=inference_only,
+        weights_by_reference=weights_by_reference)
+    cache_entry = cache.load(key)
+    if cache_entry is not None:
+        return CompiledModel(model, None, translator,
+                             cache_entry=cache_entry,
+                             inference_only=inference_only, **kwargs)
+
+    compiled_model = CompiledModel(model, translate(), translator,
+                                   keep_programs=True,
+                                   inference_only=inference_only, **kwargs)
+    cache.store(key, compiled_model.cache_entry())
     return compiled_model
 
 
 def compile_onnx(model, onnx_file, used_translator, **kwargs):
+    """Compiles an ONNX model translated from `model`.
+
+    `onnx_file` is a filename, serialized bytes or a `ModelProto`.
+    """
     return CompiledModel(model, onnx_file, used_translator, **kwargs)
 
 
@@ -0,0 +1,212 @@
+"""On-disk cache of compiled ChxVM programs.
+
+An entry holds everything `CompiledModel` needs to skip translation and
+compilation: the serialized forward/backward ChxVM programs, their
+input/output names, the parameter names and the values of parameters
+which only exist as ONNX initializers.
+"""
+
+import errno
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+
+import chainer
+import numpy as np
+
+
+# Bump this when the layout of cache entries changes.
+_FORMAT_VERSION = 1
+
+_META_FILE = 'meta.json'
+_FWD_FILE = 'fwd.chxvm'
+_BWD_FILE = 'bwd.chxvm'
+_INITIALIZERS_FILE = 'initializers.npz'
+
+
+def _class_source(cls):
+    try:
+        return inspect.getsource(cls)
+    except (OSError, TypeError):
+        # Classes defined in an interactive session have no source.
+        return '%s.%s' % (cls.__module__, cls.__qualname__)
+
+
+def _describe_inputs(xs):
+    if isinstance(xs, (list, tuple, range)):
+        return [_describe_inputs(x) for x in xs]
+    if isinstance(xs, chainer.Variable):
+        xs = xs.array
+    if hasattr(xs, 'shape') and hasattr(xs, 'dtype'):
+        return [tuple(xs.shape), str(xs.dtype)]
+    # Python scalars such as int and None may be folded into the graph,
+    # so their values are a part of the key.
+    return [type(xs).__name__, repr(xs)]
+
+
+def _library_version():
+    try:
+        from chainer_compiler.chainer_compiler import _chainer_compiler_core
+    except ImportError:
+        return None
+    core_file = getattr(_chainer_compiler_core, '__file__', None)
+    if core_file is None:
+        return None
+    st = os.stat(core_file)
+    return [os.path.basename(core_file), st.st_size, st.st_mtime_ns]
+
+
+def compute_key(model, inputs, translator, compiler_kwargs=None,
+                computation_order=None, inference_only=False,
+                weights_by_reference=False):
+    """Computes a content-addressed key of a compilation.
+
+    The key covers the source of every link class in `model`, the
+    shapes and dtypes of parameters and array inputs, the values of
+    other inputs, the translator, the compiler options and the version
+    of the native library.
+    """
+    sources = {}
+    for link in model.links():
+        cls = type(link)
+        name = '%s.%s' % (cls.__module__, cls.__qualname__)
+        if name not in sources:
+            sources[name] = _class_source(cls)
+
+    params = []
+    for name, param in sorted(model.namedparams()):
+        params.append([name, tuple(param.shape), str(param.dtype)])
+
+    desc = {
+        'format_version': _FORMAT_VERSION,
+        'chainer_version': chainer.__version__,
+        'library_version': _library_version(),
+        'sources': sorted(sources.items()),
+        'params': params,
+        'inputs': _describe_inputs(inputs),
+        'translator': translator,
+        'compiler_kwargs': sorted((compiler_kwargs or {}).items()),
+        'computation_order': computation_order,
+        'inference_only': inference_only,
+        'weights_by_reference': weights_by_reference,
+    }
+    serialized = json.dumps(desc, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def _dir_size(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            size += os.path.getsize(os.path.join(root, f))
+    return size
+
+
+class CompileCache(object):
+    """A size-bounded directory of compiled models.
+
+    Entries are evicted in least-recently-used order once the total
+    size of the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, cache_dir, max_bytes=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key):
+        entry_dir = self._entry_dir(key)
+        meta_file = os.path.join(entry_dir, _META_FILE)
+        try:
+            with open(meta_file) as f:
+                entry = json.load(f)
+            with open(os.path.join(entry_dir, _FWD_FILE), 'rb') as f:
+                entry['fwd_program'] = f.read()
+            if entry['has_bwd']:
+                with open(os.path.join(entry_dir, _BWD_FILE), 'rb') as f:
+                    entry['bwd_program'] = f.read()
+            else:
+                entry['bwd_program'] = None
+            with np.load(os.path.join(entry_dir, _INITIALIZERS_FILE)) as npz:
+                entry['initializers'] = {name: npz[name]
+                                         for name in npz.files}
+        except (OSError, ValueError, KeyError):
+            # Missing or broken entry. A broken one is discarded so the
+            # next `store` can publish the key again.
+            if os.path.exists(entry_dir):
+                self._discard(entry_dir)
+            return None
+        # Record the access time for LRU eviction.
+        os.utime(meta_file)
+        return entry
+
+    def _discard(self, entry_dir):
+        # Move the entry out of the way first, as removing a directory
+        # is not atomic.
+        trash_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix='.trash_')
+        try:
+            os.rename(entry_dir, os.path.join(trash_dir, 'entry'))
+        except OSError:
+            pass
+        shutil.rmtree(trash_dir, ignore_errors=True)
+
+    def store(self, key, entry):
+        """Publishes `entry` as `key` unless it is already stored."""
+        entry_dir = self._entry_dir(key)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp_')
+        try:
+            meta = {k: v for k, v in entry.items()
+                    if k not in ('fwd_program', 'bwd_program',
+                                 'initializers')}
+            meta['has_bwd'] = entry['bwd_program'] is not None
+            with open(os.path.join(tmp_dir, _META_FILE), 'w') as f:
+                json.dump(meta, f)
+            with open(os.path.join(tmp_dir, _FWD_FILE), 'wb') as f:
+                f.write(entry['fwd_program'])
+            if meta['has_bwd']:
+                with open(os.path.join(tmp_dir, _BWD_FILE), 'wb') as f:
+                    f.write(entry['bwd_program'])
+            np.savez(os.path.join(tmp_dir, _INITIALIZERS_FILE),
+                     **entry['initializers'])
+            # Renaming a directory is atomic, so concurrent readers
+            # never observe a partially written entry.
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if e.errno in (errno.EEXIST, errno.ENOTEMPTY):
+                # Another process has stored the same key, possibly
+                # while others are reading it. Keep its entry.
+                return
+            raise
+        self.evict()
+
+    def entries(self):
+        """Returns (key, last access time, size) of all entries."""
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            if key.startswith('.'):
+                continue
+            entry_dir = self._entry_dir(key)
+            meta_file = os.path.join(entry_dir, _META_FILE)
+            if not os.path.exists(meta_file):
+                continue
+            entries.append((key, os.path.getmtime(meta_file),
+                            _dir_size(entry_dir)))
+        return entries
+
+    def evict(self):
+        if self.max_bytes is None:
+            return
+        entries = sorted(self.entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        for key, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total -= size
@@ -8,6 +8,7 @@ from onnx import numpy_helper
 from onnx import TensorProto
 from onnx import ModelProto
 
+from chainer_compiler import external_data as external_data_lib
 from chainer_compiler.elichika.parser import core
 from chainer_compiler.elichika.parser import graphs
 from chainer_compiler.elichika.parser import values
@@ -17,6 +18,7 @@ from chainer_compiler.elichika.parser import functions_builtin
 from chainer_compiler.elichika.parser import functions_ndarray
 from chainer_compiler.elichika.parser import utils
 from chainer_compiler.elichika.parser import functions_onnx
+from chainer_compiler.elichika.parser import context
 
 import numpy as np
 import collections
@@ -33,6 +35,8 @@ class ONNXModel:
         self.model = None
         self.inputs = []
         self.outputs = []
+        # the conversion context which names inputs and outputs
+        self.context = None
 
 def validate_args(func, converter):
     if len(inspect.signature(func).parameters) != len(converter.expected_args):
@@ -44,6 +48,16 @@ def validate_args(func, converter):
 
 
 def compile_model(model, inputs) -> 'ONNXModel':
+    # All state of a conversion lives in its own context so conversions
+    # can run concurrently on different threads.
+    with context.conversion_context() as ctx:
+        onnx_model = _compile_model(model, inputs)
+    if onnx_model is not None:
+        onnx_model.context = ctx
+    return onnx_model
+
+
+def _compile_model(model, inputs) -> 'ONNXModel':
 
     oc.f_converter.clear()
     oc.chainer_l_converter.clear()
@@ -137,7 +151,7 @@ def compile_model(model, inputs) -> 'ONNXModel':
         validate_args(key, value)
 
     # assign names
-    oc.assigned_names.clear()
+    context.get_context().name_allocator.clear()
     oc.node2onnx_parameter.clear()
     oc.value2onnx_parameter.clear()
 
@@ -161,7 +175,11 @@ def compile_model(model, inputs) -> 'ONNXModel':
     return onnx_model
 
 
-def save_model(path: 'str', model: 'ModelProto'):
+def save_model(path: 'str', model: 'ModelProto', external_data=False):
+    if external_data:
+        # Large initializers are moved to `path + '.data'`.
+        external_data_lib.save_model(model, path)
+        return
     with open(path, "wb") as f:
         f.write(model.SerializeToString())
 
@@ -23,6 +23,7 @@ from chainer_compiler.elichika.parser import functions_dict
 from chainer_compiler.elichika.parser import utils
 from chainer_compiler.elichika.parser import config
 from chainer_compiler.elichika.parser import links_builtin
+from chainer_compiler.elichika.parser import context
 
 import numpy as np
 import collections
@@ -102,9 +103,9 @@ class NodeParse:
                     self.args[k] = att
 
 
-assigned_names = []
-node2onnx_parameter = {}
-value2onnx_parameter = {}
+# Owned by the current `context.ConversionContext`.
+node2onnx_parameter = context.ContextDict('node2onnx_parameter')
+value2onnx_parameter = context.ContextDict('value2onnx_parameter')
 
 
 class NodeONNXParameter:
@@ -136,44 +137,20 @@ def generate_onnx_value_name(value: 'values.Value', none_name=''):
     if base_name == '':
         base_name = none_name
 
-    ind = 0
     name = base_name
 
     if name == '':
         name = 'noname'
 
-    while (name in assigned_names):
-        ind += 1
-        name = base_name + '_' + str(ind)
-
-    assigned_names.append(name)
-    return name
+    return context.get_context().name_allocator.allocate(base_name, name)
 
 
 def generate_onnx_node_name(node: 'nodes.Node'):
-    base_name = str(node)
-
-    ind = 0
-    name = base_name
-    while (name in assigned_names):
-        ind += 1
-        name = base_name + '_' + str(ind)
-
-    assigned_names.append(name)
-    return name
+    return context.get_context().name_allocator.allocate(str(node))
 
 
 def generate_onnx_name(name: 'str'):
-    base_name = str(name)
-
-    ind = 0
-    name = base_name
-    while (name in assigned_names):
-        ind += 1
-        name = base_name + '_' + str(ind)
-
-    assigned_names.append(name)
-    return name
+    return context.get_context().name_allocator.allocate(str(name))
 
 
 def assign_onnx_name_to_value(value: 'values.Value', none_name=''):
@@ -246,8 +223,9 @@ def preprocess(graph: 'graphs.Graph', isMain: 'bool'):
             preprocess(subgraph, False)
 
 
-chainer_l_converter = {}
-f_converter = {}
+# Owned by the current `context.ConversionContext`.
+chainer_l_converter = context.ContextDict('chainer_l_converter')
+f_converter = context.ContextDict('f_converter')
 
 
 def convert_node_aug_assign(onnx_graph, node: 'nodes.NodeAugAssign'):
@@ -1576,8 +1554,9 @@ class ONNXGenerator:
         self.param2name = {id(p): 'param' + n.replace('/', '_')
                            for n, p in model.namedparams()}
 
+        name_allocator = context.get_context().name_allocator
         for p, n in self.param2name.items():
-            assigned_names.append(n)
+            name_allocator.reserve(n)
 
         # assign onnx name
         assign_onnx_name(graph)
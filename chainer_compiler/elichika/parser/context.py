@@ -0,0 +1,175 @@
+import collections.abc
+import contextlib
+import threading
+
+
+class NameAllocator:
+    """Allocates unique names in amortized constant time.
+
+    A name is the base name itself if it is not used yet. Otherwise it is
+    the base name with the smallest suffix `_<n>` which is not used.
+    """
+
+    def __init__(self):
+        self.names = set()
+        # The smallest suffix which may be unused for each base name.
+        self.next_suffixes = {}
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def reserve(self, name):
+        self.names.add(name)
+
+    def allocate(self, base_name, name=None):
+        """Returns a unique name derived from `base_name`.
+
+        `name` is tried first when given instead of `base_name`.
+        """
+        if name is None:
+            name = base_name
+        if name in self.names:
+            # Names are never released, so suffixes tried before are
+            # still in use.
+            suffix = self.next_suffixes.get(base_name, 1)
+            name = base_name + '_' + str(suffix)
+            while name in self.names:
+                suffix += 1
+                name = base_name + '_' + str(suffix)
+            self.next_suffixes[base_name] = suffix + 1
+        self.names.add(name)
+        return name
+
+    def clear(self):
+        self.names.clear()
+        self.next_suffixes.clear()
+
+
+class ConversionContext:
+    """State owned by a single conversion of a model.
+
+    Each thread has its own current context, so conversions running on
+    different threads do not interfere with each other.
+    """
+
+    def __init__(self):
+        # parser
+        self.histories = []
+        # fields which have a collection for each history, keyed by ids
+        self.history_fields = []
+        self.current_id = 0
+
+        # hashable function. key is python function, value is FuncValue
+        self.function_converters = {}
+
+        # unhashable function. key is str, value is FuncValue
+        self.builtin_function_converters = {}
+
+        # an array of convertter from python instance into Value
+        # first argument is module, second argument is python instance
+        self.instance_converters = []
+
+        # onnx_converters
+        self.name_allocator = NameAllocator()
+        self.node2onnx_parameter = {}
+        self.value2onnx_parameter = {}
+        self.chainer_l_converter = {}
+        self.f_converter = {}
+
+
+_local = threading.local()
+
+
+def get_context() -> 'ConversionContext':
+    context = getattr(_local, 'context', None)
+    if context is None:
+        context = ConversionContext()
+        _local.context = context
+    return context
+
+
+@contextlib.contextmanager
+def conversion_context(context: 'ConversionContext' = None):
+    """Makes `context` (or a new one) current in this thread."""
+    if context is None:
+        context = ConversionContext()
+    prev = getattr(_local, 'context', None)
+    _local.context = context
+    try:
+        yield context
+    finally:
+        _local.context = prev
+
+
+class ContextDict(collections.abc.MutableMapping):
+    """A dict stored as an attribute of the current context."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def _get(self):
+        return getattr(get_context(), self._name)
+
+    def __getitem__(self, key):
+        return self._get()[key]
+
+    def __setitem__(self, key, value):
+        self._get()[key] = value
+
+    def __delitem__(self, key):
+        del self._get()[key]
+
+    def __contains__(self, key):
+        return key in self._get()
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def clear(self):
+        self._get().clear()
+
+
+class ContextList(collections.abc.MutableSequence):
+    """A list stored as an attribute of the current context."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def _get(self):
+        return getattr(get_context(), self._name)
+
+    def __getitem__(self, index):
+        return self._get()[index]
+
+    def __setitem__(self, index, value):
+        self._get()[index] = value
+
+    def __delitem__(self, index):
+        del self._get()[index]
+
+    def __contains__(self, value):
+        return value in self._get()
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def insert(self, index, value):
+        self._get().insert(index, value)
+
+    def append(self, value):
+        self._get().append(value)
+
+    def clear(self):
+        self._get().clear()
+
+    def copy(self):
+        return self._get().copy()
@@ -2,6 +2,7 @@
 import chainer
 import chainer.functions as F
 import chainer.links as L
+import copy
 import inspect
 import ast
 import gast
@@ -17,7 +18,7 @@ from chainer_compiler.elichika.parser import functions
 from chainer_compiler.elichika.parser import utils
 from chainer_compiler.elichika.parser import core
 from chainer_compiler.elichika.parser import config
-from chainer_compiler.elichika.parser import canonicalizer
+from chainer_compiler import source_cache
 
 
 def generate_copied_value(value: 'values.Value'):
@@ -382,7 +383,7 @@ class UserDefinedClassConstructorFunction(FunctionBase):
         self.name = func.__name__
         self.filename = inspect.getfile(func)
 
-        sourcelines = inspect.getsourcelines(func)
+        sourcelines = source_cache.get_source(func)
         if sourcelines is None or len(sourcelines) < 1:
             utils.print_warning('Failed to parase {}'.format(classinfo), utils.LineProperty())
             return
@@ -390,13 +391,10 @@ class UserDefinedClassConstructorFunction(FunctionBase):
         self.lineno = sourcelines[1]
         self.classinfo = classinfo
 
-        original_code = inspect.getsource(func)
-        code = utils.clip_head(original_code)
-
         self.args.analyze_args(func)
 
-        ast_ = gast.ast_to_gast(ast.parse(code)).body[0]
-        self.ast = canonicalizer.Canonicalizer().visit(ast_)
+        self.ast = source_cache.get_function_ast(
+            func, utils.clip_head, canonicalize=True)
 
     def vcall(self, module: 'values.Field', graph: 'graphs.Graph', inst: 'values.Object', args: 'FunctionArgInput',
               context: 'VEvalContext' = None, line=-1):
@@ -429,7 +427,7 @@ class UserDefinedFunction(FunctionBase):
         self.inst = func
         self.name = func.__name__
         self.filename = inspect.getfile(func)
-        sourcelines = inspect.getsourcelines(func)
+        sourcelines = source_cache.get_source(func)
         self.lineno = sourcelines[1]
         self.args.analyze_args(func)
 
@@ -438,10 +436,8 @@ class UserDefinedFunction(FunctionBase):
             code = 'return ' + original_code[re.search('lambda.*?:', original_code).end():]
             self.ast = gast.ast_to_gast(ast.parse(code))
         else:
-            original_code = inspect.getsource(func)
-            code = utils.clip_head(original_code)
-            ast_ = gast.ast_to_gast(ast.parse(code)).body[0]
-            self.ast = canonicalizer.Canonicalizer().visit(ast_)
+            self.ast = source_cache.get_function_ast(
+                func, utils.clip_head, canonicalize=True)
 
     def vcall(self, module: 'values.Field', graph: 'graphs.Graph', inst: 'values.Object', args: 'FunctionArgInput',
               context: 'VEvalContext' = None, line=-1):
@@ -492,9 +488,12 @@ class UserDefinedFunctionFromAst(FunctionBase):
         self.name = astc.gast.name if isinstance(astc.nast, gast.FunctionDef) else (lambda: None).__name__
         self.args = args
         self.func_field = func_field
-        if isinstance(astc.nast, gast.Lambda):
-            astc.nast.body = gast.Return(value=astc.nast.body) # Add return to the body
         self.ast = astc.nast
+        if isinstance(astc.nast, gast.Lambda):
+            # Add return to the body. The AST is copied as it may be shared
+            # through source_cache.
+            self.ast = copy.copy(astc.nast)
+            self.ast.body = gast.Return(value=astc.nast.body)
         self.filename = astc.filename
         self.lineno = astc.lineno
 
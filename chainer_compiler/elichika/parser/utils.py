@@ -2,11 +2,10 @@ import os
 import numpy as np
 from chainer_compiler.elichika.parser import config
 from chainer_compiler.elichika.parser import values
+from chainer_compiler.elichika.parser import context
 import inspect
 import re
 
-current_id = 0
-
 slice_int_max = 2 ** 31 - 1
 
 dtype_float32 = np.array(1.0, dtype=np.float32).dtype
@@ -14,15 +13,14 @@ dtype_float64 = np.array(1.0, dtype=np.float64).dtype
 dtype_int = np.array(1.0, dtype=np.int).dtype
 
 def get_guid():
-    global current_id
-    id = current_id
-    current_id += 1
+    ctx = context.get_context()
+    id = ctx.current_id
+    ctx.current_id += 1
     return id
 
 
 def reset_guid():
-    global current_id
-    current_id = 0
+    context.get_context().current_id = 0
 
 def print_warning(s, lineprop):
     print('warning : {} in {}'.format(s, lineprop))
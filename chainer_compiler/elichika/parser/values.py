@@ -18,21 +18,21 @@ from chainer_compiler.elichika.parser import functions
 from chainer_compiler.elichika.parser import utils
 from chainer_compiler.elichika.parser import config
 from chainer_compiler.elichika.parser import flags
+from chainer_compiler.elichika.parser import context
 
 from chainer_compiler.elichika.parser.functions import FunctionBase, UserDefinedFunction
 
-fields = []
-histories = []
+# Registries below are owned by the current `context.ConversionContext`.
 
 # hashable function. key is python function, value is FuncValue
-function_converters = {}
+function_converters = context.ContextDict('function_converters')
 
 # unhashable function. key is str, value is FuncValue
-builtin_function_converters = {}
+builtin_function_converters = context.ContextDict('builtin_function_converters')
 
 # an array of convertter from python instance into Value
 # first argument is module, second argument is python instance
-instance_converters = []
+instance_converters = context.ContextList('instance_converters')
 
 # assign predefined values
 predefined_value_assigners = [] # type: List[PredefinedValueAssigner]
@@ -59,49 +59,55 @@ def create_ref_value_name_with_constant(value):
     return '@C_Unknown'
 
 def reset_field_and_attributes():
-    global fields
-    fields = []
-    histories.clear()
+    ctx = context.get_context()
+    ctx.history_fields = []
+    ctx.histories.clear()
 
 
-def register_field(field: 'Field'):
-    fields.append(weakref.ref(field))
+def _touch_field(field: 'Field', level: 'int'):
+    context.get_context().history_fields[level][field.id] = weakref.ref(field)
 
-def unregister_field(field: 'Field'):
-    global fields
-    fields = [f for f in fields if f() != field]
+def _untouch_field(field: 'Field'):
+    for fields in context.get_context().history_fields:
+        fields.pop(field.id, None)
 
-def push_history(history_id: 'str'):
-    histories.append(history_id)
-    for field in fields:
+def _touched_fields(level: 'int') -> 'List[Field]':
+    # in the order of creation, which is the order of their ids
+    fields = context.get_context().history_fields[level]
+    ret = []
+    for _, field in sorted(fields.items()):
         o = field()
         if o is not None:
-            o.push_history(history_id)
+            ret.append(o)
+    return ret
+
+def push_history(history_id: 'str'):
+    # Fields get a collection for the history when they are accessed, so
+    # only fields read or written in the history are visited afterwards.
+    ctx = context.get_context()
+    ctx.histories.append(history_id)
+    ctx.history_fields.append({})
 
 
 def pop_history():
-    histories.pop()
-    for field in fields:
-        o = field()
-        if o is not None:
-            o.pop_history()
+    ctx = context.get_context()
+    for field in _touched_fields(len(ctx.histories) - 1):
+        field.pop_history()
+    ctx.histories.pop()
+    ctx.history_fields.pop()
 
 
 def get_inputs() -> 'List[FieldInput]':
     ret = []
-    for field in fields:
-        o = field()
-        if o is not None:
-            ret += o.get_inputs()
+    for field in _touched_fields(len(context.get_context().histories) - 1):
+        ret += field.get_inputs()
     return ret
 
 
 def get_outputs() -> 'List[FieldOutput]':
     ret = []
-    for field in fields:
-        o = field()
-        if o is not None:
-            ret += o.get_outputs()
+    for field in _touched_fields(len(context.get_context().histories) - 1):
+        ret += field.get_outputs()
     return ret
 
 
@@ -389,17 +395,20 @@ class FieldAttributeCollection():
 class Field():
     def __init__(self):
         self.collection = FieldAttributeCollection('', None)
-        histories_ = histories.copy()
-        histories_.reverse()
-
-        for history in histories_:
-            collection = FieldAttributeCollection(history, self.collection)
-            self.collection = collection
+        # the number of collections for histories
+        self.depth = 0
+        self.is_disposed = False
 
         self.module = None
         self.id = utils.get_guid()
 
-        register_field(self)
+    def sync_history(self):
+        '''
+        add collections for histories pushed after the last access
+        '''
+        histories = context.get_context().histories
+        while self.depth < len(histories) and not self.is_disposed:
+            self.push_history(histories[self.depth])
 
     def dispose(self):
         '''
@@ -407,7 +416,9 @@ class Field():
         don't touch after dispose
         '''
         self.collection = FieldAttributeCollection('', None)
-        unregister_field(self)
+        self.depth = 0
+        self.is_disposed = True
+        _untouch_field(self)
 
     def set_module(self, module):
         self.module = module
@@ -416,6 +427,7 @@ class Field():
         return self
 
     def has_attribute(self, key) -> 'Boolean':
+        self.sync_history()
         c = self.collection
 
         while c is not None:
@@ -426,9 +438,11 @@ class Field():
         return False
 
     def try_get_attribute(self, key : 'str') -> 'Attribute':
+        self.sync_history()
         return self.collection.try_get_attribute(key)
 
     def get_attribute(self, key: 'str', root_graph : 'graphs.Graph' = None, from_module=False) -> 'Attribute':
+        self.sync_history()
         attribute = self.collection.try_get_attribute(key)
 
         if attribute is not None:
@@ -449,10 +463,13 @@ class Field():
     def push_history(self, history_id: 'str'):
         collection = FieldAttributeCollection(history_id, self.collection)
         self.collection = collection
+        _touch_field(self, self.depth)
+        self.depth += 1
 
     def pop_history(self):
         self.collection.pop_history()
         self.collection = self.collection.parent
+        self.depth -= 1
 
         if self.collection is None:
             self.collection = FieldAttributeCollection('', None)
@@ -464,6 +481,7 @@ class Field():
         return self.collection.get_outputs()
 
     def set_predefined_obj(self, key, obj):
+        self.sync_history()
         collections = []
         c = self.collection
 
@@ -5,13 +5,22 @@ from chainer_compiler.elichika.parser import config
 from chainer_compiler.elichika.parser import utils
 
 import numpy as np
+import threading
 
 # pair op, left, right and result
 binop_type_table = []
 
 is_initialized = False
 
+_initialize_lock = threading.Lock()
+
 def initialize_lazy():
+    if is_initialized:
+        return
+    with _initialize_lock:
+        _initialize_lazy()
+
+def _initialize_lazy():
     global is_initialized
     if is_initialized:
         return
@@ -264,7 +264,7 @@ def veval_ast_if(astc : 'AstContext', local_field : 'values.Field', graph : 'Gra
     # generate pairs
     value_pairs = {}
     for v in true_value_inputs:
-        key = str(v.field.id) + '_' + v.name
+        key = (v.field.id, v.name)
         if not (key in value_pairs.keys()):
             value_pairs[key] = {}
 
@@ -275,7 +275,7 @@ def veval_ast_if(astc : 'AstContext', local_field : 'values.Field', graph : 'Gra
         value_pairs[key]['true_input_obj'] = v.obj
 
     for v in true_value_outputs:
-        key = str(v.field.id) + '_' + v.name
+        key = (v.field.id, v.name)
         if not (key in value_pairs.keys()):
             value_pairs[key] = {}
 
@@ -285,7 +285,7 @@ def veval_ast_if(astc : 'AstContext', local_field : 'values.Field', graph : 'Gra
         value_pairs[key]['true_output_obj'] = v.obj
 
     for v in false_value_inputs:
-        key = str(v.field.id) + '_' + v.name
+        key = (v.field.id, v.name)
         if not (key in value_pairs.keys()):
             value_pairs[key] = {}
 
@@ -296,7 +296,7 @@ def veval_ast_if(astc : 'AstContext', local_field : 'values.Field', graph : 'Gra
         value_pairs[key]['false_input_obj'] = v.obj
 
     for v in false_value_outputs:
-        key = str(v.field.id) + '_' + v.name
+        key = (v.field.id, v.name)
         if not (key in value_pairs.keys()):
             value_pairs[key] = {}
 
@@ -717,7 +717,7 @@ def veval_ast_listcomp(astc : 'AstContext', local_field : 'values.Field', graph
     # generate pairs
     value_pairs = {}
     for v in value_inputs:
-        key = str(v.field.id) + '_' + v.name
+        key = (v.field.id, v.name)
         if not (key in value_pairs.keys()):
             value_pairs[key] = {}
 
@@ -727,7 +727,7 @@ def veval_ast_listcomp(astc : 'AstContext', local_field : 'values.Field', graph
         value_pairs[key]['input_body_value'] = v.value
 
     for v in value_outputs:
-        key = str(v.field.id) + '_' + v.name
+        key = (v.field.id, v.name)
         if not (key in value_pairs.keys()):
             value_pairs[key] = {}
 
@@ -737,13 +737,21 @@ def veval_ast_listcomp(astc : 'AstContext', local_field : 'values.Field', graph
         value_pairs[key]['output_obj'] = v.obj
 
     # remove iterator
-    removed_name = str(local_field.id) + '_' + target_value.name
-    del value_pairs[removed_name]
+    del value_pairs[(local_field.id, target_value.name)]
+
+    # a value which is only read in the body is carried once even if it is
+    # reached through several attributes
+    read_only_values = set()
 
     for k, v in value_pairs.items():
         name = v['name']
         field = v['field']
 
+        if not 'output_body_value' in v:
+            if id(v['input_body_value']) in read_only_values:
+                continue
+            read_only_values.add(id(v['input_body_value']))
+
         if 'input_body_value' in v:
             inputs.append(v['input_value'])
             body_graph.add_input_value(v['input_body_value'])
@@ -1183,7 +1191,7 @@ def veval_ast_for(astc : 'AstContext', local_field : 'values.Field', graph : 'Gr
     # generate pairs
     value_pairs = {}
     for v in value_inputs:
-        key = str(v.field.id) + '_' + v.name
+        key = (v.field.id, v.name)
         if not (key in value_pairs.keys()):
             value_pairs[key] = {}
 
@@ -1193,7 +1201,7 @@ def veval_ast_for(astc : 'AstContext', local_field : 'values.Field', graph : 'Gr
         value_pairs[key]['input_body_value'] = v.value
 
     for v in value_outputs:
-        key = str(v.field.id) + '_' + v.name
+        key = (v.field.id, v.name)
         if not (key in value_pairs.keys()):
             value_pairs[key] = {}
 
@@ -1202,10 +1210,19 @@ def veval_ast_for(astc : 'AstContext', local_field : 'values.Field', graph : 'Gr
         value_pairs[key]['output_body_value'] = v.value
         value_pairs[key]['output_obj'] = v.obj
 
+    # a value which is only read in the body is carried once even if it is
+    # reached through several attributes
+    read_only_values = set()
+
     for k, v in value_pairs.items():
         name = v['name']
         field = v['field']
 
+        if not 'output_body_value' in v:
+            if id(v['input_body_value']) in read_only_values:
+                continue
+            read_only_values.add(id(v['input_body_value']))
+
         if 'input_body_value' in v:
             inputs.append(v['input_value'])
 
@@ -12,7 +12,9 @@ import numpy as np
 import chainer
 
 from chainer_compiler.elichika.chainer2onnx import compile_model
+from chainer_compiler.elichika.chainer2onnx import save_model
 from chainer_compiler.elichika.onnx_converters import onnx_name
+from chainer_compiler.elichika.parser import context
 
 from chainer_compiler.elichika.testtools.test_args import get_test_args
 from chainer_compiler.elichika.testtools.test_args import dprint
@@ -110,10 +112,19 @@ def dump_test_inputs_outputs(inputs, outputs, gradients, test_data_dir):
 
 
 _seen_subnames = set()
+_clean_output_dirs = True
 
 
-def reset_test_generator(args):
+def reset_test_generator(args, clean_output_dirs=True):
+    """Starts a test module with command line `args`.
+
+    Drivers which remove old outputs by themselves pass False to
+    `clean_output_dirs`, since the directories of other modules may
+    share the prefix of this module.
+    """
+    global _clean_output_dirs
     _seen_subnames.clear()
+    _clean_output_dirs = clean_output_dirs
     get_test_args(args)
 
 
@@ -128,7 +139,7 @@ def generate_testcase(model_or_model_gen, orig_xs,
         if backprop:
             output_dir = output_dir + '_backprop'
 
-        if not _seen_subnames:
+        if not _seen_subnames and _clean_output_dirs:
             # Remove all related directories to renamed tests.
             for d in [output_dir] + glob.glob(output_dir + '_*'):
                 if os.path.isdir(d):
@@ -187,11 +198,13 @@ def generate_testcase(model_or_model_gen, orig_xs,
 
     xs = list(map(lambda x: _validate_inout(x), orig_xs))
 
-    dump_test_inputs_outputs(
-        list(zip(input_tensors, xs)),
-        outputs,
-        gradients,
-        os.path.join(output_dir, 'test_data_set_0'))
+    # ONNX names of values are looked up in the context of the conversion.
+    with context.conversion_context(onnxmod.context):
+        dump_test_inputs_outputs(
+            list(zip(input_tensors, xs)),
+            outputs,
+            gradients,
+            os.path.join(output_dir, 'test_data_set_0'))
 
-    with open(os.path.join(output_dir, 'model.onnx'), 'wb') as fp:
-        fp.write(onnxmod.model.SerializeToString())
+    save_model(os.path.join(output_dir, 'model.onnx'), onnxmod.model,
+               external_data=get_test_args().external_data)
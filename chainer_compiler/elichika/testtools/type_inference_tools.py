@@ -1,5 +1,5 @@
-import ast, gast
-import inspect
+import copy
+import gast
 import numpy as np
 import sys
 import typing
@@ -7,6 +7,7 @@ import typing
 from chainer_compiler.elichika.typing import types
 from chainer_compiler.elichika.typing.type_inference import InferenceEngine
 from chainer_compiler.elichika.typing.utils import node_description, is_expr
+from chainer_compiler import source_cache
 from chainer_compiler.elichika.parser import utils
 
 class IDAssignor(gast.NodeVisitor):
@@ -87,10 +88,15 @@ def print_inference_results(id2type, id2node):
         print("{} : \x1b[36m{}\x1b[39m".format(node_description(node), t))
 
 
+def parse_forward(model):
+    # The AST is copied because node2type of each run is keyed on its nodes
+    func_node = source_cache.get_function_ast(model.forward, utils.clip_head)
+    return gast.Module(body=[copy.deepcopy(func_node)], type_ignores=[])
+
+
 # For testing
 def generate_id2type_from_forward(model, args, is_debug=False):
-    code = utils.clip_head(inspect.getsource(model.forward))
-    tree = gast.ast_to_gast(ast.parse(code))
+    tree = parse_forward(model)
     module = sys.modules[model.forward.__module__]
     node2type, subroutine_node = generate_node2type(
             tree, (model,) + args, is_debug=is_debug, module=module,
@@ -102,8 +108,7 @@ def generate_id2type_from_forward(model, args, is_debug=False):
 
 # For debug
 def generate_type_inference_results(model, forward_args, is_debug=False):
-    code = utils.clip_head(inspect.getsource(model.forward))
-    node = gast.ast_to_gast(ast.parse(code))
+    node = parse_forward(model)
     # node = Canonicalizer().visit(node)
     module = sys.modules[model.forward.__module__]
     node2type, subroutine_node = generate_node2type(
@@ -1,5 +1,3 @@
-from   chainer.utils import type_check
-
 from   chainer_compiler.elichika.typing.shape_elem  import *
 from   chainer_compiler.elichika.typing.types       import *
 from   chainer_compiler.elichika.typing             import utils
@@ -100,7 +98,7 @@ def apply_subst(subst, ty):
 
 def apply_subst_shapeElem(subst, e):
     if e.value in subst.keys():
-        return ShapeElem(subst[e.value], expr=type_check.Variable(None, e.value))
+        return variable_ShapeElem(subst[e.value], e.value)
     return e
 
 
@@ -1,5 +1,5 @@
-from   chainer.utils import type_check
 import math
+import weakref
 
 from   chainer_compiler.elichika.typing import utils
 
@@ -8,6 +8,7 @@ __all__ = [ 'ShapeElem'
           , 'unwrap_shape'
           , 'is_incomplete_shape'
           , 'copy_ShapeElem'
+          , 'variable_ShapeElem'
           , 'size_of_ShapeElem'
           , 'unify_shape'
           , 'join_shape'
@@ -34,106 +35,188 @@ binops = {
 def _flip(func):
     return (lambda x, y: func(y, x))
 
-def _make_unaryop(term, symbol):
+
+class _Expr():
+    """A symbolic expression of a shape element.
+
+    Expressions are hash-consed: structurally equal expressions are the
+    same object, so they are compared and hashed by identity. The value
+    and the simplified form of each expression are computed only once.
+    Expressions are immutable and shared by any number of ShapeElems.
+    """
+
+    __slots__ = ('kind', 'args', 'priority', 'value', 'size',
+                 '_simplified', '__weakref__')
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __str__(self):
+        if self.kind == 'const':
+            return str(self.value)
+        if self.kind == 'var':
+            return self.args[0]
+        if self.kind == 'unary':
+            symbol, term = self.args
+            s = str(term)
+            if term.priority < self.priority:
+                s = '(' + s + ')'
+            return symbol + s
+        symbol, lhs, rhs = self.args
+        left, right = str(lhs), str(rhs)
+        if lhs.priority < self.priority:
+            left = '(' + left + ')'
+        if rhs.priority <= self.priority:
+            right = '(' + right + ')'
+        return '{} {} {}'.format(left, symbol, right)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+_exprs = weakref.WeakValueDictionary()
+
+_PRIORITY_ATOM = 8
+
+
+def _intern(kind, args, priority, value, size):
+    # Constants are keyed by their types not to mix up 1 and 1.0.
+    key = (kind, type(args[0]), args) if kind == 'const' else (kind, args)
+    try:
+        expr = _exprs.get(key)
+    except TypeError:
+        key = None
+        expr = None
+    if expr is not None:
+        return expr
+    expr = _Expr()
+    expr.kind = kind
+    expr.args = args
+    expr.priority = priority
+    expr.value = value
+    expr.size = size
+    expr._simplified = None
+    if key is not None:
+        _exprs[key] = expr
+    return expr
+
+
+def _make_constant(value):
+    return _intern('const', (value,), _PRIORITY_ATOM, value, 0)
+
+
+def _make_variable(name):
+    return _intern('var', (name,), _PRIORITY_ATOM, None, 1)
+
+
+def _apply(func, *values):
+    if any(v is None for v in values):
+        return None
+    try:
+        return func(*values)
+    except Exception:
+        return None
+
+
+def _make_unaryop_expr(term, symbol):
     priority, func = unaryops[symbol]
+    return _intern('unary', (symbol, term), priority,
+                   _apply(func, term.value), term.size)
+
+
+def _make_binop_expr(lhs, rhs, symbol):
+    priority, func = binops[symbol]
+    return _intern('binary', (symbol, lhs, rhs), priority,
+                   _apply(func, lhs.value, rhs.value), lhs.size + rhs.size)
+
+
+def _make_unaryop(term, symbol):
+    _, func = unaryops[symbol]
 
     if term.value is None:
         return term
-    expr = type_check.UnaryOperator(priority, term.expr, symbol, func)
+    expr = _make_unaryop_expr(term.expr, symbol)
     return ShapeElem(func(term.value), expr=expr)
 
 def _make_binop(lhs, rhs, symbol):
-    priority, func = binops[symbol]
+    _, func = binops[symbol]
 
     if not isinstance(rhs, ShapeElem):
         if lhs.value is None:
             return ShapeElem(None)
-        expr = type_check.BinaryOperator(
-                priority, lhs.expr, type_check.Constant(rhs), symbol, func)
+        expr = _make_binop_expr(lhs.expr, _make_constant(rhs), symbol)
         return ShapeElem(func(lhs.value, rhs), expr=expr)
 
     if not isinstance(lhs, ShapeElem):
         if rhs.value is None:
             return ShapeElem(None)
-        expr = type_check.BinaryOperator(
-                priority, type_check.Constant(lhs), rhs.expr, symbol, func)
+        expr = _make_binop_expr(_make_constant(lhs), rhs.expr, symbol)
         return ShapeElem(func(lhs, rhs.value), expr=expr)
 
     if lhs.value is None or rhs.value is None:
         return ShapeElem(None)
-    expr = type_check.BinaryOperator(
-            priority, lhs.expr, rhs.expr, symbol, func)
+    expr = _make_binop_expr(lhs.expr, rhs.expr, symbol)
     return ShapeElem(func(lhs.value, rhs.value), expr=expr)
 
 
-def _make_binop_expr(lhs_expr, rhs_expr, symbol):
-    priority, func = binops[symbol]
-    return type_check.BinaryOperator(
-            priority, lhs_expr, rhs_expr, symbol, func)
-
-def _try_eval(expr):
-    try:
-        return expr.eval()
-    except Exception:
-        return None
-
-
 def simplify(expr):
-    n = _try_eval(expr)
-    if n is not None:
-        return type_check.Constant(n)
-
-    if isinstance(expr, type_check.BinaryOperator):
-        rhs_value = _try_eval(expr.rhs)
-        if rhs_value is not None:
-            if (expr.exp == '+' or expr.exp == '-') and rhs_value == 0:
-                return simplify(expr.lhs)
-
-            if expr.exp == '+' and rhs_value < 0:
-                expr_rhs = type_check.Constant(- rhs_value)
-                return simplify(_make_binop_expr(expr.lhs, expr_rhs, '-'))
-
-            if expr.exp == '-' and rhs_value < 0:
-                expr_rhs = type_check.Constant(- rhs_value)
-                return simplify(_make_binop_expr(expr.lhs, expr_rhs, '+'))
-
-            if (expr.exp == '*' or expr.exp == '/' or expr.exp == '//') and rhs_value == 1:
-                return simplify(expr.lhs)
-
-        lhs_value = _try_eval(expr.lhs)
-        if lhs_value is not None:
-            if expr.exp == '+' and lhs_value == 0:
-                return simplify(expr.rhs)
-
-        if isinstance(expr.lhs, type_check.BinaryOperator) and \
-                expr.lhs.priority == expr.priority:
-            if expr.lhs.exp == '+' or expr.lhs.exp == '*':
-                expr_exp = expr.exp
-            elif expr.lhs.exp == '-':
-                if expr.exp == '+':
-                    expr_exp = '-'
-                else:
-                    expr_exp = '+'
+    if expr._simplified is None:
+        expr._simplified = _simplify(expr)
+    return expr._simplified
+
+
+def _simplify(expr):
+    if expr.value is not None:
+        return _make_constant(expr.value)
+
+    if expr.kind == 'binary':
+        exp, lhs, rhs = expr.args
+        if rhs.value is not None:
+            if (exp == '+' or exp == '-') and rhs.value == 0:
+                return simplify(lhs)
+
+            if exp == '+' and rhs.value < 0:
+                expr_rhs = _make_constant(- rhs.value)
+                return simplify(_make_binop_expr(lhs, expr_rhs, '-'))
+
+            if exp == '-' and rhs.value < 0:
+                expr_rhs = _make_constant(- rhs.value)
+                return simplify(_make_binop_expr(lhs, expr_rhs, '+'))
+
+            if (exp == '*' or exp == '/' or exp == '//') and rhs.value == 1:
+                return simplify(lhs)
+
+        if lhs.value is not None:
+            if exp == '+' and lhs.value == 0:
+                return simplify(rhs)
+
+        # (x + c1) + c2 => x + (c1 + c2), etc.
+        if lhs.kind == 'binary' and (
+                lhs.args[0] in ['+', '-'] and exp in ['+', '-'] or
+                lhs.args[0] == '*' and exp == '*'):
+            lhs_exp, lhs_lhs, lhs_rhs = lhs.args
+            if lhs_exp == '+' or lhs_exp == '*':
+                expr_exp = exp
+            elif exp == '+':
+                expr_exp = '-'
             else:
-                assert False
+                expr_exp = '+'
 
-            _, expr_func = binops[expr_exp]
-            expr_rhs = type_check.BinaryOperator(expr.priority,
-                    expr.lhs.rhs, expr.rhs, expr_exp, expr_func)
-            expr_rhs = simplify(expr_rhs)
-            if isinstance(expr_rhs, type_check.Constant):
-                return simplify(type_check.BinaryOperator(expr.lhs.priority,
-                    expr.lhs.lhs, expr_rhs, expr.lhs.exp, expr.lhs.func))
+            expr_rhs = simplify(_make_binop_expr(lhs_rhs, rhs, expr_exp))
+            if expr_rhs.kind == 'const':
+                return simplify(_make_binop_expr(lhs_lhs, expr_rhs, lhs_exp))
 
-        expr.lhs = simplify(expr.lhs)
-        expr.rhs = simplify(expr.rhs)
+        return _make_binop_expr(simplify(lhs), simplify(rhs), exp)
 
-    # if isinstance(expr, type_check.UnaryOperator):
-    #     expr.term = simplify(expr.term)
     return expr
 
 
 class ShapeElem():
+    __slots__ = ('value', 'expr')
+
     def __init__(self, value_or_name, expr=None):
         assert type(value_or_name) in [int, float, str, type(None)]
         if isinstance(value_or_name, str):
@@ -144,12 +227,12 @@ class ShapeElem():
             # value
             self.value = value_or_name
             if expr is None:
-                self.expr = type_check.Constant(value_or_name)
+                self.expr = _make_constant(value_or_name)
             else:
                 self.expr = simplify(expr)
 
     def __str__(self):
-        if isinstance(self.expr, type_check.Constant):
+        if self.expr is not None and self.expr.kind == 'const':
             return str(self.value)
         return "{} ({})".format(self.value, self.expr)
 
@@ -238,14 +321,15 @@ def copy_ShapeElem(e):
     return ShapeElem(e.value, expr=e.expr)
 
 
+def variable_ShapeElem(value, name):
+    return ShapeElem(value, expr=_make_variable(name))
+
+
 def size_of_ShapeElem(e):
-    if isinstance(e.expr, type_check.BinaryOperator):
-        return size_of_ShapeElem(e.lhs) + size_of_ShapeElem(e.rhs)
-    if isinstance(e.expr, type_check.UnaryOperator):
-        return size_of_ShapeElem(e.term)
-    if isinstance(e.expr, type_check.Variable):
-        return 1
-    return 0
+    # The number of variables in the expression
+    if e.expr is None:
+        return 0
+    return e.expr.size
 
 
 def unify_shape(shape1, shape2):
@@ -1,5 +1,6 @@
 import ast
 import collections
+import copy
 import inspect
 import gast
 import numbers
@@ -7,11 +8,13 @@ import sys
 import types
 import typing
 
+from   chainer_compiler                             import source_cache
 from   chainer_compiler.elichika.parser.utils       import clip_head
 from   chainer_compiler.elichika.typing.annotation  import *
 from   chainer_compiler.elichika.typing.types       import *
 from   chainer_compiler.elichika.typing.shape_elem  import *
 from   chainer_compiler.elichika.typing             import utils
+from   chainer_compiler.elichika.typing             import types as elichika_types
 
 from   chainer_compiler.elichika.typing.ext.numpy_functions   import *
 from   chainer_compiler.elichika.typing.ext.chainer_functions import *
@@ -35,17 +38,106 @@ def debug(sth):
     print("[{} {}] {}".format(frame.f_code.co_name, frame.f_lineno, sth))
 
 
-def copy_tyenv(tyenv):
-    new_tyenv = {}
-    for name, ty in tyenv.items():
-        new_tyenv[name] = copy_ty(ty)
-    return new_tyenv
+class TypeEnv():
+    # A type environment which is forked in constant time for the blocks of
+    # if/for statements.
+    #
+    # Entries are kept in a chain of dicts. 'fork' freezes the current dict
+    # and the fork shares the frozen dicts with its parent. A fork copies an
+    # inherited entry with copy_ty when it reads it for the first time, so
+    # that inference of a block never updates the types of its parent, and
+    # the keys in its own dicts are the only ones a join needs to visit.
+
+    # The number of frozen dicts of an environment to merge them into one
+    max_frozen = 8
+
+    def __init__(self, inherited=()):
+        # Entries set since the last 'fork'
+        self.local = {}
+        # Frozen dicts of the entries set by this environment
+        self.frozen = ()
+        # Frozen dicts of the parent, whose entries are copied when read
+        self.inherited = inherited
+
+    def fork(self):
+        if self.local:
+            self.frozen = (self.local,) + self.frozen
+            self.local = {}
+            if len(self.frozen) > self.max_frozen:
+                merged = {}
+                for d in reversed(self.frozen):
+                    merged.update(d)
+                self.frozen = (merged,)
+        return TypeEnv(self.frozen + self.inherited)
+
+    def __contains__(self, key):
+        if key in self.local:
+            return True
+        return any([key in d for d in self.frozen + self.inherited])
+
+    def __getitem__(self, key):
+        if key in self.local:
+            return self.local[key]
+        for d in self.frozen:
+            if key in d:
+                return d[key]
+        for d in self.inherited:
+            if key in d:
+                ty = copy_ty(d[key])
+                self.local[key] = ty
+                return ty
+        raise KeyError(key)
+
+    def __setitem__(self, key, ty):
+        self.local[key] = ty
+
+    def keys(self):
+        keys = set(self.local)
+        for d in self.frozen + self.inherited:
+            keys.update(d)
+        return keys
+
+    def items(self):
+        # Entries are not copied, which is only for printing
+        items = {}
+        for d in reversed((self.local,) + self.frozen + self.inherited):
+            items.update(d)
+        return items.items()
+
+    def updated_keys(self):
+        # Keys set or copied by this environment
+        keys = set(self.local)
+        for d in self.frozen:
+            keys.update(d)
+        return keys
+
+    def keys_updated_since_fork(self):
+        return set(self.local)
+
+
+def join_tyenv(tyenv, tyenv1, tyenv2):
+    # Sets the join of 'tyenv1' and 'tyenv2', which are forks of 'tyenv' or
+    # 'tyenv' itself, to 'tyenv'. Entries which none of them updated after
+    # the fork are the same in all of them, so they are not visited.
+    keys = tyenv.keys_updated_since_fork()
+    for t in [tyenv1, tyenv2]:
+        if t is not tyenv:
+            keys |= t.updated_keys()
+    for key in keys:
+        if key in tyenv1:
+            if key in tyenv2:
+                tyenv[key] = join(tyenv1[key], tyenv2[key])
+            else:
+                tyenv[key] = tyenv1[key]
+        elif key in tyenv2:
+            tyenv[key] = tyenv2[key]
 
 
 def copy_InferenceEngine(tc):
     new_tc = InferenceEngine(
             tyenv=tc.tyenv, attribute_tyenv=tc.attribute_tyenv,
-            is_debug=tc.is_debug, module=tc.module)
+            is_debug=tc.is_debug, module=tc.module,
+            function_summaries=tc.function_summaries)
     return new_tc
 
 
@@ -112,16 +204,220 @@ func_to_ignore = [logging.info]
 
 # ==============================================================================
 
+def parse_function(func_body):
+    # Returns a fresh FunctionDef of 'func_body' and its type hints.
+    # Every call point needs its own AST because the results are keyed on
+    # nodes, so the cached AST is only used as a template.
+    func_node = source_cache.get_function_ast(func_body, clip_head)
+    return copy.deepcopy(func_node), typing.get_type_hints(func_body)
+
+
+def clone_ty(ty, memo, var_offset=0):
+    # Unlike copy_ty, free TyVars and shape elements are copied as well
+    # because unification and unify_shape overwrite them. Types shared in
+    # the original are shared in the copy through 'memo'. Copied TyVars are
+    # renumbered by 'var_offset'.
+    if id(ty) in memo:
+        return memo[id(ty)]
+
+    if isinstance(ty, TyVar):
+        if ty.is_set:
+            ret = clone_ty(ty.ty, memo, var_offset)
+        else:
+            ret = copy.copy(ty)
+            ret.i += var_offset
+    elif isinstance(ty, TyTensor):
+        ret = TyTensor(ty.kind, ty.dtype, [copy.copy(e) for e in ty.shape])
+    elif isinstance(ty, TyArrow):
+        ret = TyArrow([clone_ty(t, memo, var_offset) for t in ty.argty],
+                clone_ty(ty.retty, memo, var_offset))
+    elif isinstance(ty, TyList):
+        ret = TyList(clone_ty(ty.ty, memo, var_offset))
+    elif isinstance(ty, TyTuple):
+        if ty.is_fixed_len:
+            ret = TyTuple([clone_ty(t, memo, var_offset) for t in ty.get_tys()])
+        else:
+            ret = TyTuple(clone_ty(ty.get_ty(), memo, var_offset))
+    elif isinstance(ty, TyDict):
+        ret = TyDict(clone_ty(ty.keyty, memo, var_offset),
+                clone_ty(ty.valty, memo, var_offset))
+    elif isinstance(ty, TyOptional):
+        ret = TyOptional(clone_ty(ty.ty, memo, var_offset))
+    else:
+        ret = copy_ty(ty)
+
+    memo[id(ty)] = ret
+    return ret
+
+
+class FunctionSummary():
+    def __init__(self, func_node, nodetype, subroutine_node, retty,
+            var_counter, num_TyVars):
+        # Inlined function AST of the first call point. Types are copied as
+        # the caller may update the ones shared with its own types.
+        memo = {}
+        self.func_node = func_node
+        self.nodetype = {}
+        for node, ty in nodetype.items():
+            self.nodetype[node] = clone_ty(ty, memo)
+        self.subroutine_node = subroutine_node
+        self.retty = clone_ty(retty, memo)
+        # TyVars created while inferring the function are numbered from
+        # 'var_counter'
+        self.var_counter = var_counter
+        self.num_TyVars = num_TyVars
+
+    def instantiate(self):
+        # Returns (func_node, nodetype, subroutine_node, retty) for a new
+        # call point, with the ASTs copied so that each call point has its
+        # own nodes. TyVars are numbered as if the function was inferred
+        # again.
+        ast_memo = {}
+        func_node, subroutine_node = copy.deepcopy(
+                (self.func_node, self.subroutine_node), ast_memo)
+
+        memo = {}
+        var_offset = elichika_types.var_counter - self.var_counter
+        nodetype = {}
+        for node, ty in self.nodetype.items():
+            nodetype[ast_memo.get(id(node), node)] = \
+                    clone_ty(ty, memo, var_offset)
+        retty = clone_ty(self.retty, memo, var_offset)
+        elichika_types.var_counter += self.num_TyVars
+        return func_node, nodetype, subroutine_node, retty
+
+
+class FunctionSummaries():
+    # Results of user-defined functions keyed on the function and the types
+    # of its arguments, shared by all InferenceEngines of one inference.
+    # Objects are compared structurally so that the blocks of deep models
+    # with the same configuration share their results. Note that types of
+    # such objects in the reused results refer to the first instance.
+    def __init__(self):
+        self.summaries = {}
+        # id -> key of objects, which are kept alive in 'objects'
+        self.value_keys = {}
+        self.objects = []
+
+    def lookup(self, func_body, ty_args):
+        key = self.key_of_call(func_body, ty_args)
+        if key is None:
+            return None, None
+        return key, self.summaries.get(key)
+
+    def key_of_call(self, func_body, ty_args):
+        ty_keys = [self.key_of_ty(t) for t in ty_args]
+        if any([k is None for k in ty_keys]):
+            return None
+        return (getattr(func_body, '__func__', func_body), tuple(ty_keys))
+
+    def key_of_attributes(self, ty_args, attribute_tyenv):
+        # Keys of the types of attributes of instances in arguments. Keys of
+        # instances are computed from the values of attributes, so they do
+        # not change when a subroutine assigns to the attributes.
+        instances = [ty.deref().instance for ty in ty_args
+                if isinstance(ty.deref(), TyUserDefinedClass)]
+        keys = {}
+        for (obj, attr), ty in attribute_tyenv.items():
+            if any([obj is instance for instance in instances]):
+                keys[(id(obj), attr)] = self.key_of_ty(ty)
+        return keys
+
+    def key_of_ty(self, ty):
+        ty = ty.deref()
+        if isinstance(ty, TyNone):
+            return ('none',)
+        if isinstance(ty, TyNum):
+            return ('num', ty.kind, ty.value)
+        if isinstance(ty, TyString):
+            return ('string', ty.value)
+        if isinstance(ty, TyTensor):
+            return ('tensor', ty.kind, ty.dtype.str,
+                    tuple([(e.value, str(e)) for e in ty.shape]))
+        if isinstance(ty, TyDType):
+            return ('dtype', ty.t.str)
+        if isinstance(ty, TyUserDefinedClass):
+            return ('class', ty.name, self.key_of_value(ty.instance))
+        if isinstance(ty, TyList):
+            keys = [self.key_of_ty(ty.ty)]
+        elif isinstance(ty, TyTuple):
+            if ty.is_fixed_len:
+                keys = [self.key_of_ty(t) for t in ty.get_tys()]
+            else:
+                keys = ['*', self.key_of_ty(ty.get_ty())]
+        elif isinstance(ty, TyDict):
+            keys = [self.key_of_ty(ty.keyty), self.key_of_ty(ty.valty)]
+        elif isinstance(ty, TyOptional):
+            keys = [self.key_of_ty(ty.ty)]
+        else:
+            # TyVar, TyArrow
+            return None
+        if any([k is None for k in keys]):
+            return None
+        return (type(ty).__name__,) + tuple(keys)
+
+    def key_of_value(self, value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return (type(value), value)
+        if id(value) in self.value_keys:
+            return self.value_keys[id(value)]
+
+        self.objects.append(value)
+        # Placeholder for recursive references
+        self.value_keys[id(value)] = ('ref', id(value))
+
+        if isinstance(value, np.ndarray):
+            key = ('ndarray', value.dtype.str, value.shape)
+        elif isinstance(value, chainer.Variable):
+            # Parameters may not be initialized yet
+            if value.array is None:
+                key = ('variable',)
+            else:
+                key = ('variable', value.dtype.str, value.shape)
+        elif isinstance(value, torch.Tensor):
+            key = ('tensor', str(value.dtype), tuple(value.shape))
+        elif isinstance(value, (list, tuple)):
+            key = (type(value),) + \
+                    tuple([self.key_of_value(v) for v in value])
+        elif isinstance(value, dict):
+            key = (type(value),) + tuple([
+                (self.key_of_value(k), self.key_of_value(v))
+                for k, v in value.items()])
+        elif isinstance(value, (set, frozenset)):
+            key = (type(value),) + tuple(sorted(
+                [self.key_of_value(v) for v in value], key=repr))
+        elif isinstance(value, (types.FunctionType, types.MethodType,
+                types.BuiltinFunctionType, types.ModuleType, type)) or \
+                not hasattr(value, '__dict__'):
+            key = ('ref', id(value))
+        else:
+            items = []
+            for attr, v in sorted(value.__dict__.items()):
+                # Names of links only differ by their positions in parents
+                if isinstance(value, chainer.Link) and attr == 'name':
+                    continue
+                items.append((attr, self.key_of_value(v)))
+            key = (type(value),) + tuple(items)
+
+        self.value_keys[id(value)] = key
+        return key
+
+    def add(self, key, summary):
+        self.summaries[key] = summary
+
+# ==============================================================================
+
 class InferenceEngine():
-    def __init__(self, tyenv=None, attribute_tyenv=None, is_debug=False, module=None):
+    def __init__(self, tyenv=None, attribute_tyenv=None, is_debug=False,
+            module=None, function_summaries=None):
         # Type environments for local objects
         # string -> TyObj
-        self.tyenv = {} if tyenv is None else copy_tyenv(tyenv)
+        self.tyenv = TypeEnv() if tyenv is None else tyenv.fork()
 
         # Type environments for model attributes
         # (object, str) -> TyObj
-        self.attribute_tyenv = {} if attribute_tyenv is None \
-                else copy_tyenv(attribute_tyenv)
+        self.attribute_tyenv = TypeEnv() if attribute_tyenv is None \
+                else attribute_tyenv.fork()
 
         # Annotation to input AST
         # Node -> TyObj
@@ -137,6 +433,11 @@ class InferenceEngine():
         # Node (Call) -> Node (FunctionDef)
         self.subroutine_node = collections.OrderedDict()
 
+        # Results of user-defined functions to be reused at call points
+        # with the same argument types
+        self.function_summaries = FunctionSummaries() \
+                if function_summaries is None else function_summaries
+
 
     def dump_tyenv(self):
         print("=== tyenv ===")
@@ -232,6 +533,9 @@ class InferenceEngine():
                 for attr, val in ty.instance.__dict__.items():
                     self.attribute_tyenv[(ty.instance, attr)] = \
                             type_of_value(val)
+        # Types of attributes before the function updates them
+        self.attribute_keys = self.function_summaries.key_of_attributes(
+                ty_args, self.attribute_tyenv)
 
         # apply type hints
         subst = match_types([self.tyenv[n] for n in type_hints.keys()],
@@ -248,18 +552,9 @@ class InferenceEngine():
             ty_ret = tc.infer_stmt(stmt)
 
         # unify the intersection of 2 tyenvs and update local tyenv
-        for name, ty in tc.tyenv.items():
-            if name in self.tyenv.keys():
-                self.tyenv[name] = join(ty, self.tyenv[name])
-            else:
-                self.tyenv[name] = ty
-
-        for (obj, name), ty in tc.attribute_tyenv.items():
-            if (obj, name) in self.attribute_tyenv.keys():
-                self.attribute_tyenv[(obj, name)] = \
-                        join(ty, self.attribute_tyenv[(obj, name)])
-            else:
-                self.attribute_tyenv[(obj, name)] = ty
+        join_tyenv(self.tyenv, tc.tyenv, self.tyenv)
+        join_tyenv(self.attribute_tyenv, tc.attribute_tyenv,
+                self.attribute_tyenv)
 
         unify(ty_ret, TyNone())
         return TyNone()
@@ -272,26 +567,9 @@ class InferenceEngine():
             ty_ret2 = tc2.infer_stmt(stmt)
 
         # unify the intersection of 2 tyenvs and update local tyenv
-        for name, ty in tc1.tyenv.items():
-            if name in tc2.tyenv.keys():
-                self.tyenv[name] = join(ty, tc2.tyenv[name])
-            else:
-                self.tyenv[name] = ty
-        for name, ty in tc2.tyenv.items():
-            if name in tc1.tyenv.keys():
-                continue
-            self.tyenv[name] = ty
-
-        for (obj, name), ty in tc1.attribute_tyenv.items():
-            if (obj, name) in tc2.attribute_tyenv.keys():
-                self.attribute_tyenv[(obj, name)] = \
-                        join(ty, tc2.attribute_tyenv[(obj, name)])
-            else:
-                self.attribute_tyenv[(obj, name)] = ty
-        for (obj, name), ty in tc2.attribute_tyenv.items():
-            if (obj, name) in tc1.attribute_tyenv.keys():
-                continue
-            self.attribute_tyenv[(obj, name)] = ty
+        join_tyenv(self.tyenv, tc1.tyenv, tc2.tyenv)
+        join_tyenv(self.attribute_tyenv, tc1.attribute_tyenv,
+                tc2.attribute_tyenv)
 
         return join(ty_ret1, ty_ret2)
 
@@ -352,22 +630,45 @@ class InferenceEngine():
             ty_self = type_of_value(func)
             ty_args = [ty_self] + ty_args
 
-        code = clip_head(inspect.getsource(func_body))
+        key, summary = self.function_summaries.lookup(func_body, ty_args)
+        if summary is not None:
+            func_node, nodetype, subroutine_node, retty = summary.instantiate()
+            self.add_subroutine_node(node, func_node)
+            utils.add_dict(self.nodetype, nodetype)
+            utils.add_dict(self.subroutine_node, subroutine_node)
+            return retty
+
         # FunctionDef of called subroutine
-        func_node = gast.ast_to_gast(ast.parse(code)).body[0]
-        if node not in self.subroutine_node.keys():
-            self.subroutine_node[node] = [func_node]
-        else:
-            self.subroutine_node[node].append(func_node)
+        func_node, type_hints = parse_function(func_body)
+        self.add_subroutine_node(node, func_node)
+        var_counter = elichika_types.var_counter
         tc = InferenceEngine(is_debug=self.is_debug,
-                module=sys.modules[func.__module__])
-        tc.infer_function(func_node, ty_args,
-                type_hints=typing.get_type_hints(func_body))
+                module=sys.modules[func.__module__],
+                function_summaries=self.function_summaries)
+        tc.infer_function(func_node, ty_args, type_hints=type_hints)
+        retty = tc.nodetype[func_node].retty
+
+        # Results are not reusable if the subroutine updated the types of
+        # arguments or their attributes
+        if key is not None and \
+                key == self.function_summaries.key_of_call(func_body, ty_args) and \
+                tc.attribute_keys == self.function_summaries.key_of_attributes(
+                    ty_args, tc.attribute_tyenv):
+            self.function_summaries.add(key, FunctionSummary(
+                func_node, tc.nodetype, tc.subroutine_node, retty,
+                var_counter, elichika_types.var_counter - var_counter))
 
         # copy nodetype and subroutine_node from subroutine
         utils.add_dict(self.nodetype, tc.nodetype)
         utils.add_dict(self.subroutine_node, tc.subroutine_node)
-        return tc.nodetype[func_node].retty
+        return retty
+
+
+    def add_subroutine_node(self, node, func_node):
+        if node not in self.subroutine_node.keys():
+            self.subroutine_node[node] = [func_node]
+        else:
+            self.subroutine_node[node].append(func_node)
 
 
     # ================================ mod =====================================
@@ -717,7 +1018,7 @@ class InferenceEngine():
             return None, None
 
         if isinstance(node, gast.Name):
-            if node.id in self.tyenv.keys():
+            if node.id in self.tyenv:
                 ty = self.tyenv[node.id].deref()
                 if isinstance(ty, TyUserDefinedClass):
                     return ty.instance, None
@@ -778,7 +1079,7 @@ class InferenceEngine():
             # x: value of existing instance
             x = getattr(ty_obj.instance, node.attr)
 
-            if (ty_obj.instance, node.attr) in self.attribute_tyenv.keys():
+            if (ty_obj.instance, node.attr) in self.attribute_tyenv:
                 return self.attribute_tyenv[(ty_obj.instance, node.attr)]
 
             return type_of_value(x)
@@ -855,7 +1156,7 @@ class InferenceEngine():
 
     def infer_Name(self, node):
         # Name(identifier id, expr_context ctx, expr? annotation)
-        if node.id in self.tyenv.keys():
+        if node.id in self.tyenv:
             return self.tyenv[node.id]
         if node.id in __builtins__.keys():
             value = __builtins__[node.id]
@@ -1,4 +1,3 @@
-from   copy import deepcopy
 from   enum import Enum, IntEnum
 
 import chainer
@@ -458,8 +457,12 @@ def extract_value_from_ty(ty):
 
 
 def copy_ty(ty):
-    if isinstance(ty, (TyNone, TyNum, TyString)):
-        return deepcopy(ty)
+    if isinstance(ty, TyNone):
+        return TyNone()
+    if isinstance(ty, TyNum):
+        return TyNum(ty.kind, ty.value)
+    if isinstance(ty, TyString):
+        return TyString(ty.value)
     if isinstance(ty, TyArrow):
         return TyArrow([copy_ty(t) for t in ty.argty], copy_ty(ty.retty))
     if isinstance(ty, TyList):
@@ -0,0 +1,85 @@
+"""Saves ONNX models with their large tensors in an external data file.
+
+Protobuf cannot serialize a message larger than 2GB and parsing a model
+copies all of its weights. `save_model` moves large tensors of a model
+into a separate file following the external data convention of ONNX, so
+the model itself stays small and the loader of the compiler can map the
+weights into memory instead of copying them.
+"""
+
+import os
+
+from onnx import numpy_helper
+from onnx import TensorProto
+
+
+# Tensors in the data file are aligned for SIMD loads of the runtime.
+_ALIGNMENT = 64
+
+_DATA_FIELDS = ['float_data', 'int32_data', 'string_data', 'int64_data',
+                'raw_data', 'double_data', 'uint64_data']
+
+
+def _graph_tensors(xgraph):
+    for xtensor in xgraph.initializer:
+        yield xtensor
+    for xnode in xgraph.node:
+        for xattr in xnode.attribute:
+            if xattr.HasField('t'):
+                yield xattr.t
+            for xtensor in xattr.tensors:
+                yield xtensor
+            if xattr.HasField('g'):
+                for xtensor in _graph_tensors(xattr.g):
+                    yield xtensor
+            for xsubgraph in xattr.graphs:
+                for xtensor in _graph_tensors(xsubgraph):
+                    yield xtensor
+
+
+def _raw_data(xtensor):
+    if xtensor.HasField('raw_data'):
+        return xtensor.raw_data
+    return numpy_helper.to_array(xtensor).tobytes()
+
+
+def save_model(xmodel, filename, size_threshold=1024):
+    """Saves `xmodel` with tensors of `size_threshold` bytes or more in
+    `<filename>.data`.
+
+    The tensors in `xmodel` are modified in place to refer to the data
+    file instead of holding their values.
+    """
+    data_filename = filename + '.data'
+    location = os.path.basename(data_filename)
+    offset = 0
+    with open(data_filename, 'wb') as f:
+        for xtensor in _graph_tensors(xmodel.graph):
+            if (xtensor.data_type == TensorProto.STRING or
+                    xtensor.data_location == TensorProto.EXTERNAL):
+                continue
+            data = _raw_data(xtensor)
+            if len(data) < size_threshold:
+                continue
+
+            padding = -offset % _ALIGNMENT
+            f.write(b'\0' * padding)
+            offset += padding
+            f.write(data)
+
+            for field in _DATA_FIELDS:
+                xtensor.ClearField(field)
+            xtensor.data_location = TensorProto.EXTERNAL
+            for key, value in [('location', location),
+                               ('offset', offset),
+                               ('length', len(data))]:
+                entry = xtensor.external_data.add()
+                entry.key = key
+                entry.value = str(value)
+            offset += len(data)
+
+    if offset == 0:
+        os.remove(data_filename)
+
+    with open(filename, 'wb') as f:
+        f.write(xmodel.SerializeToString())
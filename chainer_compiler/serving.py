@@ -0,0 +1,254 @@
+"""Dynamic batching of inference requests for `CompiledModel`.
+
+`BatchedServer` queues requests coming from many callers, concatenates
+them along the leading (batch) axis and runs the compiled forward
+program once per batch. A batch is dispatched when it reaches
+`max_batch_size` samples or when the oldest request in it has waited for
+`max_latency` seconds, whichever comes first.
+
+ChxVM programs have static input shapes, so `PaddedModel` compiles a
+model for a fixed set of batch sizes and pads each batch to the smallest
+of them which holds the batch.
+
+Requests can be submitted from threads (`submit` returns a
+`concurrent.futures.Future`) or from asyncio coroutines (`infer_async`).
+"""
+
+import asyncio
+import bisect
+import concurrent.futures
+import queue
+import threading
+import time
+
+import chainer
+
+import chainer_compiler
+
+
+_STOP = object()
+
+
+class _Request(object):
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.batch_size = inputs[0].shape[0]
+        self.signature = _signature(inputs)
+        self.future = concurrent.futures.Future()
+        # A monotonic clock keeps deadlines valid across wall-clock jumps.
+        self.arrival = time.monotonic()
+
+
+def _signature(inputs):
+    return tuple((x.shape[1:], x.dtype) for x in inputs)
+
+
+def _concatenate(xs):
+    if len(xs) == 1:
+        return xs[0]
+    xp = chainer.backend.get_array_module(xs[0])
+    return xp.concatenate(xs, axis=0)
+
+
+def _tile(x, batch_size):
+    """Repeats or truncates `x` along the batch axis."""
+    xp = chainer.backend.get_array_module(x)
+    reps = -(-batch_size // x.shape[0])
+    return xp.concatenate([x] * reps, axis=0)[:batch_size]
+
+
+def _pad(x, batch_size):
+    """Appends zeros to `x` along the batch axis."""
+    if x.shape[0] == batch_size:
+        return x
+    xp = chainer.backend.get_array_module(x)
+    padding = xp.zeros((batch_size - x.shape[0],) + x.shape[1:],
+                       dtype=x.dtype)
+    return xp.concatenate([x, padding], axis=0)
+
+
+class PaddedModel(object):
+    """A model compiled for a fixed set of batch sizes.
+
+    Args:
+        model (chainer.Chain): The model to compile. Every input and
+            output of it must be an array whose leading axis is the
+            batch axis.
+        inputs (list): Sample inputs. They are tiled along the batch
+            axis to compile the model for each batch size.
+        batch_sizes (list of int): The batch sizes to compile for.
+        kwargs: Keyword arguments passed to `chainer_compiler.compile`.
+
+    A batch is padded with zeros to the smallest compiled batch size
+    which holds it, and outputs for the padding are dropped. Since the
+    inputs of every run match a compiled program, ChxVM skips checking
+    their types.
+    """
+
+    def __init__(self, model, inputs, batch_sizes=(1, 2, 4, 8, 16, 32),
+                 **kwargs):
+        self.signature = _signature(inputs)
+        self.batch_sizes = sorted(set(batch_sizes))
+        self.compiled_models = {}
+        with chainer.no_backprop_mode():
+            for batch_size in self.batch_sizes:
+                xs = [_tile(x, batch_size) for x in inputs]
+                self.compiled_models[batch_size] = chainer_compiler.compile(
+                    model, xs, **kwargs)
+
+    @property
+    def max_batch_size(self):
+        return self.batch_sizes[-1]
+
+    def run_arrays(self, inputs):
+        """Runs a batch of `inputs` and returns its outputs."""
+        if _signature(inputs) != self.signature:
+            raise ValueError('Inputs of %s do not match the compiled %s' %
+                             (_signature(inputs), self.signature))
+        batch_size = inputs[0].shape[0]
+        if any(x.shape[0] != batch_size for x in inputs):
+            raise ValueError('Inputs have different batch sizes')
+        i = bisect.bisect_left(self.batch_sizes, batch_size)
+        if i == len(self.batch_sizes):
+            raise ValueError('Batch size %d exceeds the maximum %d' %
+                             (batch_size, self.max_batch_size))
+        padded_size = self.batch_sizes[i]
+        compiled_model = self.compiled_models[padded_size]
+        outputs = compiled_model.run_arrays(
+            [_pad(x, padded_size) for x in inputs], check_types=False)
+        return [y[:batch_size] for y in outputs]
+
+
+class BatchedServer(object):
+    """Runs a `PaddedModel` for dynamically batched requests.
+
+    Args:
+        compiled_model (PaddedModel): The model to run.
+        max_batch_size (int): The maximum number of samples in a batch.
+            It defaults to the maximum batch size of `compiled_model`.
+        max_latency (float): The maximum time in seconds a request waits
+            for other requests to be batched with.
+
+    A request may contain more than one sample. It is never split across
+    batches, so a request larger than `max_batch_size` runs alone, and
+    fails if `compiled_model` cannot run a batch of its size.
+    """
+
+    def __init__(self, compiled_model, max_batch_size=None,
+                 max_latency=0.005):
+        if max_batch_size is None:
+            max_batch_size = compiled_model.max_batch_size
+        assert max_batch_size <= compiled_model.max_batch_size
+        self.compiled_model = compiled_model
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.num_batches = 0
+        self.num_requests = 0
+        self._queue = queue.Queue()
+        # A request taken from the queue which did not fit in the
+        # previous batch.
+        self._pending = None
+        self._thread = None
+
+    def start(self):
+        assert self._thread is None
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server after running all requests in the queue."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def submit(self, *inputs):
+        """Queues a request and returns a future of its outputs."""
+        assert self._thread is not None, 'Server is not started'
+        assert inputs
+        request = _Request(inputs)
+        self._queue.put(request)
+        return request.future
+
+    def infer(self, *inputs):
+        """Runs a request and waits for its outputs."""
+        return self.submit(*inputs).result()
+
+    async def infer_async(self, *inputs):
+        """Runs a request without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(*inputs))
+
+    def _next_request(self, timeout=None):
+        if self._pending is not None:
+            request = self._pending
+            self._pending = None
+            return request
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _collect(self):
+        first = self._next_request()
+        if first is _STOP:
+            return None
+        batch = [first]
+        batch_size = first.batch_size
+        deadline = first.arrival + self.max_latency
+        while batch_size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            request = self._next_request(timeout=timeout)
+            if request is None:
+                break
+            if (request is _STOP or
+                    request.signature != first.signature or
+                    batch_size + request.batch_size > self.max_batch_size):
+                self._pending = request
+                break
+            batch.append(request)
+            batch_size += request.batch_size
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            batch = [r for r in batch
+                     if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+
+    def _run_batch(self, batch):
+        num_inputs = len(batch[0].inputs)
+        inputs = [_concatenate([r.inputs[i] for r in batch])
+                  for i in range(num_inputs)]
+        with chainer.no_backprop_mode():
+            outputs = self.compiled_model.run_arrays(inputs)
+        self.num_batches += 1
+        self.num_requests += len(batch)
+
+        offset = 0
+        for request in batch:
+            end = offset + request.batch_size
+            results = tuple(y[offset:end] for y in outputs)
+            offset = end
+            if len(results) == 1:
+                results = results[0]
+            request.future.set_result(results)
@@ -0,0 +1,169 @@
+"""Process-wide cache of the source and parsed ASTs of user functions.
+
+The front ends (ch2o, elichika and the type inference of elichika) parse
+the source of every user-defined function and link `forward` they
+translate. Entries are keyed by the code object of the function and
+invalidated when the file of the function is modified, so each function
+is parsed once per process. Entries keep code objects alive, so only
+the most recently used `max_entries` ones are kept in memory. Parsed
+ASTs can also be pickled into a directory set by `set_cache_dir` (or
+$CHAINER_COMPILER_AST_CACHE_DIR) to be shared across processes.
+
+ASTs returned by this module are shared by all callers and must not be
+modified. Use `copy.deepcopy` to get an AST which can be rewritten or
+used as keys of per-call annotations.
+"""
+
+import ast
+import collections
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+
+import gast
+
+
+# Bump this when the layout of pickled ASTs changes.
+_FORMAT_VERSION = 1
+
+# The maximum number of entries of each cache in memory.
+max_entries = 4096
+
+# (filename, code) -> (mtime, source, lineno)
+_sources = collections.OrderedDict()
+# (filename, code, clip_head, canonicalize) -> (mtime, AST)
+_asts = collections.OrderedDict()
+# Front ends may run in several threads.
+_lock = threading.Lock()
+
+_cache_dir = os.environ.get('CHAINER_COMPILER_AST_CACHE_DIR')
+
+
+def set_cache_dir(cache_dir):
+    """Sets the directory of pickled ASTs. `None` disables it."""
+    global _cache_dir
+    _cache_dir = cache_dir
+
+
+def clear():
+    """Drops all entries in memory."""
+    with _lock:
+        _sources.clear()
+        _asts.clear()
+
+
+def _get(cache, key):
+    with _lock:
+        cached = cache.get(key)
+        if cached is not None:
+            cache.move_to_end(key)
+        return cached
+
+
+def _put(cache, key, value):
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_entries:
+            cache.popitem(last=False)
+
+
+def _mtime(filename):
+    try:
+        return os.stat(filename).st_mtime_ns
+    except OSError:
+        # Functions defined in interactive sessions.
+        return None
+
+
+def _lookup(func):
+    func = getattr(func, '__func__', func)
+    code = func.__code__
+    key = (code.co_filename, code)
+    mtime = _mtime(code.co_filename)
+    cached = _get(_sources, key)
+    if cached is None or cached[0] != mtime:
+        lines, lineno = inspect.getsourcelines(func)
+        cached = (mtime, ''.join(lines), lineno)
+        _put(_sources, key, cached)
+    return key, cached
+
+
+def get_source(func):
+    """Returns the source of `func` and its first line number."""
+    _, (_, source, lineno) = _lookup(func)
+    return source, lineno
+
+
+def get_function_ast(func, clip_head, canonicalize=False):
+    """Returns the gast `FunctionDef` of `func`.
+
+    `clip_head` removes the indentation of the source of methods, which
+    differs among front ends. The AST is canonicalized by the
+    canonicalizer of elichika if `canonicalize` is True.
+    """
+    key, (mtime, source, _) = _lookup(func)
+    key = key + (clip_head, canonicalize)
+    cached = _get(_asts, key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    tree = _load(source, clip_head, canonicalize)
+    _put(_asts, key, (mtime, tree))
+    return tree
+
+
+def _parse(source, clip_head, canonicalize):
+    tree = gast.ast_to_gast(ast.parse(clip_head(source))).body[0]
+    if canonicalize:
+        from chainer_compiler.elichika.parser import canonicalizer
+        tree = canonicalizer.Canonicalizer().visit(tree)
+    return tree
+
+
+def _pickle_filename(source, clip_head, canonicalize):
+    desc = {
+        'format_version': _FORMAT_VERSION,
+        'python_version': sys.version,
+        # Pickled ASTs are stale once gast or the canonicalizer change.
+        'gast': [gast.__file__, _mtime(gast.__file__)],
+        'clip_head': '%s.%s' % (clip_head.__module__,
+                                clip_head.__qualname__),
+        'canonicalize': canonicalize,
+        'source': source,
+    }
+    if canonicalize:
+        from chainer_compiler.elichika.parser import canonicalizer
+        desc['canonicalizer'] = _mtime(canonicalizer.__file__)
+    serialized = json.dumps(desc, sort_keys=True)
+    key = hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+    return os.path.join(_cache_dir, key + '.pickle')
+
+
+def _load(source, clip_head, canonicalize):
+    if _cache_dir is None:
+        return _parse(source, clip_head, canonicalize)
+
+    filename = _pickle_filename(source, clip_head, canonicalize)
+    try:
+        with open(filename, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        # Missing or broken entry, which is overwritten below.
+        pass
+
+    tree = _parse(source, clip_head, canonicalize)
+    try:
+        os.makedirs(_cache_dir, exist_ok=True)
+        fd, tmp_filename = tempfile.mkstemp(dir=_cache_dir, prefix='.tmp_')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(tree, f)
+        os.replace(tmp_filename, filename)
+    except OSError:
+        # The on-disk cache is optional.
+        pass
+    return tree
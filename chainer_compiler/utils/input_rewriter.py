@@ -1,4 +1,5 @@
 import glob
+import multiprocessing
 import os
 import sys
 
@@ -13,13 +14,49 @@ class Type(object):
         self.shape = shape if shape is None else tuple(shape)
 
 
+def _resize_batch(value, batch_size):
+    """Repeats or truncates `value` along the first axis."""
+    reps = -(-batch_size // value.shape[0])
+    return np.concatenate([value] * reps)[:batch_size]
+
+
+def _convert_raw_data(xtensor, new_dtype):
+    """Converts the dtype of `xtensor` with `raw_data` in place.
+
+    Returns False if the tensor does not store its values in `raw_data`.
+    """
+    if not xtensor.HasField('raw_data') or xtensor.external_data:
+        return False
+    dtype = np.dtype(mapping.TENSOR_TYPE_TO_NP_TYPE[xtensor.data_type])
+    if dtype.kind not in 'biuf':
+        return False
+    if dtype != new_dtype:
+        # `raw_data` is always little endian.
+        value = np.frombuffer(xtensor.raw_data, dtype=dtype.newbyteorder('<'))
+        xtensor.raw_data = value.astype(new_dtype.newbyteorder('<')).tobytes()
+        xtensor.data_type = mapping.NP_TYPE_TO_TENSOR_TYPE[new_dtype]
+    return True
+
+
 def rewrite_onnx_tensor(xtensor, new_type):
+    if new_type.shape is None or tuple(xtensor.dims) == new_type.shape:
+        if new_type.dtype is None:
+            return
+        if _convert_raw_data(xtensor, new_type.dtype):
+            return
+
     value = numpy_helper.to_array(xtensor)
     if new_type.shape is not None and value.shape != new_type.shape:
-        sys.stderr.write('The shape of tensor `%s` was changed from '
-                         '%s to %s and values were randomized\n' %
-                         (xtensor.name, value.shape, new_type.shape))
-        value = np.random.rand(*new_type.shape)
+        if (value.ndim and value.ndim == len(new_type.shape) and
+                value.shape[0] and value.shape[1:] == new_type.shape[1:]):
+            # Keep values valid (e.g., labels) when only the batch
+            # size is changed.
+            value = _resize_batch(value, new_type.shape[0])
+        else:
+            sys.stderr.write('The shape of tensor `%s` was changed from '
+                             '%s to %s and values were randomized\n' %
+                             (xtensor.name, value.shape, new_type.shape))
+            value = np.random.rand(*new_type.shape)
     if new_type.dtype is not None:
         value = value.astype(new_type.dtype)
     xtensor.CopyFrom(numpy_helper.from_array(value, xtensor.name))
@@ -83,29 +120,107 @@ def rewrite_onnx_file(model_filename, out_filename, new_input_types):
     return xmodel
 
 
-def rewrite_onnx_testdir(model_testdir, out_testdir, new_input_types):
-    os.makedirs(out_testdir, exist_ok=True)
-    xmodel = rewrite_onnx_file(os.path.join(model_testdir, 'model.onnx'),
-                               os.path.join(out_testdir, 'model.onnx'),
-                               new_input_types)
-
-    name_to_type = {}
-    for vi in (list(xmodel.graph.input) +
-               list(xmodel.graph.value_info) +
-               list(xmodel.graph.output)):
-        dtype = mapping.TENSOR_TYPE_TO_NP_TYPE[vi.type.tensor_type.elem_type]
-        shape = [d.dim_value for d in vi.type.tensor_type.shape.dim]
-        name_to_type[vi.name] = Type(dtype=dtype, shape=shape)
-
-    for test_set in glob.glob(os.path.join(model_testdir, 'test_data_set_*')):
-        dest_dir = os.path.join(out_testdir, os.path.basename(test_set))
-        os.makedirs(dest_dir, exist_ok=True)
-        for tensor_proto in glob.glob(os.path.join(test_set, '*.pb')):
-            xtensor = onnx.load_tensor(tensor_proto)
-            if xtensor.name not in name_to_type:
-                raise RuntimeError('Unknown tensor name: %s' % xtensor.name)
-            rewrite_onnx_tensor(xtensor, name_to_type[xtensor.name])
-
-            out_tensor_proto = os.path.join(dest_dir,
-                                            os.path.basename(tensor_proto))
-            onnx.save_tensor(xtensor, out_tensor_proto)
+def rewrite_onnx_testdir(model_testdir, out_testdir, new_input_types,
+                         jobs=None):
+    rewrite_onnx_testdirs(model_testdir, [(out_testdir, new_input_types)],
+                          jobs=jobs)
+
+
+# (out_testdir, name_to_type) of each variant written by workers. They
+# are inherited by forked workers instead of being sent for each tensor.
+_variants = None
+
+
+def _is_unchanged(xtensor, new_type):
+    dtype = mapping.TENSOR_TYPE_TO_NP_TYPE[xtensor.data_type]
+    return (tuple(xtensor.dims) == new_type.shape and
+            np.dtype(dtype) == new_type.dtype)
+
+
+def _rewrite_tensor_file(task):
+    tensor_proto, relpath = task
+    with open(tensor_proto, 'rb') as f:
+        data = f.read()
+    orig_xtensor = onnx.TensorProto()
+    orig_xtensor.ParseFromString(data)
+
+    for out_testdir, name_to_type in _variants:
+        if orig_xtensor.name not in name_to_type:
+            raise RuntimeError('Unknown tensor name: %s' % orig_xtensor.name)
+        new_type = name_to_type[orig_xtensor.name]
+        out_tensor_proto = os.path.join(out_testdir, relpath)
+        if _is_unchanged(orig_xtensor, new_type):
+            out_data = data
+        else:
+            xtensor = onnx.TensorProto()
+            xtensor.CopyFrom(orig_xtensor)
+            rewrite_onnx_tensor(xtensor, new_type)
+            out_data = xtensor.SerializeToString()
+        with open(out_tensor_proto, 'wb') as f:
+            f.write(out_data)
+    return tensor_proto
+
+
+def rewrite_onnx_testdirs(model_testdir, variants, jobs=None):
+    """Writes a test directory for each (out_testdir, new_input_types).
+
+    The model is loaded once and shape inference runs once per variant.
+    Each tensor file is read once and rewritten for all variants by a
+    pool of `jobs` processes (the number of CPUs by default), so each
+    process holds only a tensor and its rewritten copy at a time.
+    Tensors whose types are unchanged are copied as is.
+    """
+    global _variants
+    orig_xmodel = onnx.load(os.path.join(model_testdir, 'model.onnx'))
+    test_sets = sorted(glob.glob(os.path.join(model_testdir,
+                                              'test_data_set_*')))
+
+    rewritten = []
+    for out_testdir, new_input_types in variants:
+        xmodel = onnx.ModelProto()
+        xmodel.CopyFrom(orig_xmodel)
+        os.makedirs(out_testdir, exist_ok=True)
+        xmodel = rewrite_onnx_model(xmodel, new_input_types)
+        onnx.save(xmodel, os.path.join(out_testdir, 'model.onnx'))
+
+        name_to_type = {}
+        for vi in (list(xmodel.graph.input) +
+                   list(xmodel.graph.value_info) +
+                   list(xmodel.graph.output)):
+            tensor_type = vi.type.tensor_type
+            dtype = mapping.TENSOR_TYPE_TO_NP_TYPE[tensor_type.elem_type]
+            shape = [d.dim_value for d in tensor_type.shape.dim]
+            name_to_type[vi.name] = Type(dtype=dtype, shape=shape)
+        rewritten.append((out_testdir, name_to_type))
+
+        for test_set in test_sets:
+            os.makedirs(os.path.join(out_testdir,
+                                     os.path.basename(test_set)),
+                        exist_ok=True)
+    del orig_xmodel
+
+    tasks = []
+    for test_set in test_sets:
+        for tensor_proto in sorted(glob.glob(os.path.join(test_set,
+                                                          '*.pb'))):
+            tasks.append((tensor_proto,
+                          os.path.relpath(tensor_proto, model_testdir)))
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(tasks))
+
+    _variants = rewritten
+    try:
+        if jobs <= 1:
+            for task in tasks:
+                _rewrite_tensor_file(task)
+        else:
+            context = multiprocessing.get_context('fork')
+            with context.Pool(jobs) as pool:
+                # Tasks are only file names, and a worker takes the next
+                # tensor after writing the last one.
+                for _ in pool.imap_unordered(_rewrite_tensor_file, tasks):
+                    pass
+    finally:
+        _variants = None
@@ -56,3 +56,29 @@ def test_rewrite_onnx_testdir():
             'out/backprop_test_mnist_mlp_fp64/test_data_set_0/*.pb'):
         xtensor = onnx.load_tensor(tensor_proto)
         assert 11 == xtensor.data_type
+
+
+def test_rewrite_onnx_tensor_batch_size():
+    labels = np.array([3, 1, 4], dtype=np.int32)
+    xtensor = onnx.numpy_helper.from_array(labels, 't')
+    input_rewriter.rewrite_onnx_tensor(
+        xtensor, input_rewriter.Type(shape=(7,)))
+    value = onnx.numpy_helper.to_array(xtensor)
+    np.testing.assert_array_equal([3, 1, 4, 3, 1, 4, 3], value)
+
+    input_rewriter.rewrite_onnx_tensor(
+        xtensor, input_rewriter.Type(shape=(2,)))
+    value = onnx.numpy_helper.to_array(xtensor)
+    np.testing.assert_array_equal([3, 1], value)
+
+
+def test_rewrite_onnx_tensor_raw_data():
+    value = np.array([[1.5, -2], [3, 4]], dtype=np.float32)
+    xtensor = onnx.numpy_helper.from_array(value, 't')
+    assert xtensor.raw_data
+    input_rewriter.rewrite_onnx_tensor(
+        xtensor, input_rewriter.Type(dtype=np.float16))
+    assert 10 == xtensor.data_type
+    assert xtensor.raw_data
+    np.testing.assert_array_equal(value.astype(np.float16),
+                                  onnx.numpy_helper.to_array(xtensor))
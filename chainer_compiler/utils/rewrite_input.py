@@ -40,13 +40,15 @@ def main():
                         help='The output ONNX model file or test directory.')
     parser.add_argument('types', type=str,
                         help='A JSON for new input types.')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='The number of processes to rewrite tensors.')
     args = parser.parse_args()
 
     new_input_types = json_to_types(json.loads(args.types))
 
     if os.path.isdir(args.input):
         input_rewriter.rewrite_onnx_testdir(args.input, args.output,
-                                            new_input_types)
+                                            new_input_types, jobs=args.jobs)
     else:
         input_rewriter.rewrite_onnx_file(args.input, args.output,
                                          new_input_types)
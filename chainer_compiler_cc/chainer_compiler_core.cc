@@ -1,3 +1,4 @@
+#include <functional>
 #include <memory>
 
 #include <compiler/onnx.h>
@@ -40,11 +41,21 @@ namespace {
 typedef std::shared_ptr<chainerx::internal::ArrayBody> ArrayBodyPtr;
 typedef std::shared_ptr<runtime::ChxVMVar> VarPtr;
 
-std::shared_ptr<Graph> LoadGraph(const std::string& onnx_path) {
-    onnx::ModelProto xmodel(LoadLargeProto<onnx::ModelProto>(onnx_path));
+std::shared_ptr<Graph> CreateGraph(const onnx::ModelProto& xmodel) {
     return std::make_shared<Graph>(OpsetList(xmodel.opset_import().begin(), xmodel.opset_import().end()), xmodel.graph());
 }
 
+std::shared_ptr<Graph> LoadGraph(const std::string& onnx_path) {
+    return CreateGraph(LoadModelProto(onnx_path));
+}
+
+std::shared_ptr<Graph> LoadGraphFromBuffer(const py::buffer& buffer) {
+    // Parse the serialized model in place without copying it into a
+    // std::string.
+    py::buffer_info info = buffer.request();
+    return CreateGraph(LoadLargeProtoFromArray<onnx::ModelProto>(info.ptr, info.size * info.itemsize));
+}
+
 std::map<std::string, VarPtr> LoadParams(const std::shared_ptr<Graph>& graph) {
     std::map<std::string, VarPtr> params;
     for (auto& p : runtime::LoadParams(*graph)) {
@@ -60,12 +71,30 @@ void Configure(
 #include "chainer_compiler_cc/apply_cxx_args.inc"
 }
 
-std::shared_ptr<runtime::ChxVM> Compile(const std::shared_ptr<Graph>& graph, bool skip_scheduling) {
+void EmitProgram(const std::shared_ptr<Graph>& graph, bool skip_scheduling, runtime::ChxVMProgramProto* chxvm_prog) {
     constexpr bool kBackprop = false;
     RunDefaultPasses(graph.get(), kBackprop, skip_scheduling);
-    runtime::ChxVMProgramProto chxvm_prog;
     constexpr bool kDumpValueNames = false;
-    chxvm::Emit(*graph, &chxvm_prog, kDumpValueNames);
+    chxvm::Emit(*graph, chxvm_prog, kDumpValueNames);
+}
+
+std::shared_ptr<runtime::ChxVM> Compile(const std::shared_ptr<Graph>& graph, bool skip_scheduling) {
+    runtime::ChxVMProgramProto chxvm_prog;
+    EmitProgram(graph, skip_scheduling, &chxvm_prog);
+    return std::make_shared<runtime::ChxVM>(chxvm_prog);
+}
+
+py::bytes CompileToProgram(const std::shared_ptr<Graph>& graph, bool skip_scheduling) {
+    runtime::ChxVMProgramProto chxvm_prog;
+    EmitProgram(graph, skip_scheduling, &chxvm_prog);
+    std::string serialized;
+    CHECK(chxvm_prog.SerializeToString(&serialized));
+    return py::bytes(serialized);
+}
+
+std::shared_ptr<runtime::ChxVM> LoadChxVM(const std::string& serialized) {
+    runtime::ChxVMProgramProto chxvm_prog;
+    CHECK(chxvm_prog.ParseFromString(serialized)) << "Failed to parse a serialized ChxVM program";
     return std::make_shared<runtime::ChxVM>(chxvm_prog);
 }
 
@@ -148,6 +177,7 @@ void InitGraph(py::module& m) {
     py::class_<Graph, std::shared_ptr<Graph>> c{m, "Graph"};
     c.def("params", &LoadParams, "Load parameters of a model");
     c.def("compile", &Compile, "Compile a model", "skip_scheduling"_a = false);
+    c.def("compile_program", &CompileToProgram, "Compile a model into a serialized ChxVM program", "skip_scheduling"_a = false);
     c.def("input_names", &GetInputNames, "Names of inputs");
     c.def("param_names", &GetParamNames, "Names of params");
     c.def("output_names", &GetOutputNames, "Names of outputs");
@@ -218,7 +248,7 @@ runtime::ChxVMOptions CreateOptions(
     return chxvm_opts;
 }
 
-std::shared_ptr<runtime::ChxVMState> Prepare(
+std::map<std::string, VarPtr> Run(
         const std::shared_ptr<runtime::ChxVM>& chxvm,
         const std::map<std::string, VarPtr>& inputs,
         bool trace,
@@ -245,11 +275,83 @@ std::shared_ptr<runtime::ChxVMState> Prepare(
             dump_outputs_dir,
             custom_funcs);
 
-    std::shared_ptr<runtime::ChxVMState> state(chxvm->Prepare(inputs, chxvm_opts));
+    runtime::InOuts outputs(chxvm->Run(inputs, chxvm_opts));
+
+    if (chxvm_opts.chrome_tracing) {
+        chxvm_opts.chrome_tracing->Emit(chrome_tracing);
+    }
+    return outputs;
+}
+
+// ChxVMOptions with the output path of Chrome tracing, which is not a
+// part of `runtime::ChxVMOptions`.
+struct PyChxVMOptions {
+    runtime::ChxVMOptions chxvm_opts;
+    std::string chrome_tracing;
+    // The emitter pointed by `chxvm_opts.chrome_tracing`. It lives as long
+    // as the options since states prepared with them refer to it.
+    std::unique_ptr<runtime::ChromeTracingEmitter> chrome_tracing_emitter;
+};
+
+typedef std::shared_ptr<PyChxVMOptions> OptionsPtr;
+
+OptionsPtr CreatePyOptions(
+        bool trace,
+        bool verbose,
+        bool training,
+        bool check_types,
+        bool check_nans,
+        bool check_infs,
+        int dump_memory_usage,
+        int64_t base_memory_usage,
+        const std::string& chrome_tracing,
+        const std::string& dump_outputs_dir,
+        const std::map<std::string, py::function>& custom_funcs) {
+    auto options = std::make_shared<PyChxVMOptions>();
+    options->chxvm_opts = CreateOptions(
+            trace,
+            verbose,
+            training,
+            check_types,
+            check_nans,
+            check_infs,
+            dump_memory_usage,
+            base_memory_usage,
+            chrome_tracing,
+            dump_outputs_dir,
+            custom_funcs);
+    options->chrome_tracing = chrome_tracing;
+    options->chrome_tracing_emitter.reset(options->chxvm_opts.chrome_tracing);
+    return options;
+}
+
+// Writes events of the last run and drops them, so the options can be
+// reused for later runs.
+void EmitChromeTracing(const PyChxVMOptions& options) {
+    if (options.chrome_tracing_emitter) {
+        options.chrome_tracing_emitter->Emit(options.chrome_tracing);
+        options.chrome_tracing_emitter->Clear();
+    }
+}
+
+// A state prepared with options. It keeps the options alive since the
+// state refers to their Chrome tracing emitter.
+struct PyChxVMState {
+    OptionsPtr options;
+    std::unique_ptr<runtime::ChxVMState> state;
+};
+
+typedef std::shared_ptr<PyChxVMState> StatePtr;
+
+StatePtr PrepareWithOptions(
+        const std::shared_ptr<runtime::ChxVM>& chxvm, const std::map<std::string, VarPtr>& inputs, const OptionsPtr& options) {
+    auto state = std::make_shared<PyChxVMState>();
+    state->options = options;
+    state->state = chxvm->Prepare(inputs, options->chxvm_opts);
     return state;
 }
 
-std::map<std::string, VarPtr> Run(
+StatePtr Prepare(
         const std::shared_ptr<runtime::ChxVM>& chxvm,
         const std::map<std::string, VarPtr>& inputs,
         bool trace,
@@ -263,7 +365,7 @@ std::map<std::string, VarPtr> Run(
         const std::string& chrome_tracing,
         const std::string& dump_outputs_dir,
         const std::map<std::string, py::function>& custom_funcs) {
-    runtime::ChxVMOptions chxvm_opts = CreateOptions(
+    OptionsPtr options = CreatePyOptions(
             trace,
             verbose,
             training,
@@ -275,30 +377,307 @@ std::map<std::string, VarPtr> Run(
             chrome_tracing,
             dump_outputs_dir,
             custom_funcs);
+    return PrepareWithOptions(chxvm, inputs, options);
+}
 
-    runtime::InOuts outputs(chxvm->Run(inputs, chxvm_opts));
+std::map<std::string, VarPtr> RunState(const std::shared_ptr<runtime::ChxVM>& chxvm, const StatePtr& state) {
+    chxvm->Run(state->state.get());
+    EmitChromeTracing(*state->options);
+    return state->state->GetOutputs();
+}
 
-    if (chxvm_opts.chrome_tracing) {
-        chxvm_opts.chrome_tracing->Emit(chrome_tracing);
-    }
+std::map<std::string, VarPtr> RunWithOptions(
+        const std::shared_ptr<runtime::ChxVM>& chxvm, const std::map<std::string, VarPtr>& inputs, const OptionsPtr& options) {
+    runtime::InOuts outputs(chxvm->Run(inputs, options->chxvm_opts));
+    EmitChromeTracing(*options);
     return outputs;
 }
 
-std::map<std::string, VarPtr> RunState(const std::shared_ptr<runtime::ChxVM>& chxvm, const std::shared_ptr<runtime::ChxVMState>& state) {
-    chxvm->Run(state.get());
-    // TODO(hamaji): Revive this.
-#if 0
-    const runtime::ChxVMOptions& chxvm_opts = state->options();
-    if (chxvm_opts.chrome_tracing) {
-        chxvm_opts.chrome_tracing->Emit(chxvm_opts.chrome_tracing);
+void InitChxVMOptions(py::module& m) {
+    py::class_<PyChxVMOptions, OptionsPtr> c{m, "ChxVMOptions"};
+    c.def(py::init(&CreatePyOptions),
+          "Create options of ChxVM",
+          "trace"_a = false,
+          "verbose"_a = false,
+          "training"_a = false,
+          "check_types"_a = true,
+          "check_nans"_a = false,
+          "check_infs"_a = false,
+          "dump_memory_usage"_a = 0,
+          "base_memory_usage"_a = -1,
+          "chrome_tracing"_a = "",
+          "dump_outputs_dir"_a = "",
+          "custom_funcs"_a = py::dict());
+    c.def_property(
+            "trace_level",
+            [](const PyChxVMOptions& o) { return o.chxvm_opts.trace_level; },
+            [](PyChxVMOptions& o, int v) { o.chxvm_opts.trace_level = v; });
+    c.def_property(
+            "training",
+            [](const PyChxVMOptions& o) { return o.chxvm_opts.is_training; },
+            [](PyChxVMOptions& o, bool v) { o.chxvm_opts.is_training = v; });
+    c.def_property(
+            "check_types",
+            [](const PyChxVMOptions& o) { return o.chxvm_opts.check_types; },
+            [](PyChxVMOptions& o, bool v) { o.chxvm_opts.check_types = v; });
+    c.def_property(
+            "check_nans",
+            [](const PyChxVMOptions& o) { return o.chxvm_opts.check_nans; },
+            [](PyChxVMOptions& o, bool v) { o.chxvm_opts.check_nans = v; });
+    c.def_property(
+            "check_infs",
+            [](const PyChxVMOptions& o) { return o.chxvm_opts.check_infs; },
+            [](PyChxVMOptions& o, bool v) { o.chxvm_opts.check_infs = v; });
+    c.def_property(
+            "catch_exception",
+            [](const PyChxVMOptions& o) { return o.chxvm_opts.catch_exception; },
+            [](PyChxVMOptions& o, bool v) { o.chxvm_opts.catch_exception = v; });
+    c.def_property(
+            "dump_memory_usage",
+            [](const PyChxVMOptions& o) { return o.chxvm_opts.dump_memory_usage; },
+            [](PyChxVMOptions& o, int v) { o.chxvm_opts.dump_memory_usage = v; });
+    c.def_property(
+            "dump_outputs_dir",
+            [](const PyChxVMOptions& o) { return o.chxvm_opts.dump_outputs_dir; },
+            [](PyChxVMOptions& o, const std::string& v) { o.chxvm_opts.dump_outputs_dir = v; });
+}
+
+// A persistent execution state of a ChxVM. Inputs are bound by their
+// indices and the state is reused across runs, so a run does not need
+// to convert Python dicts or options.
+class ChxVMSession {
+public:
+    ChxVMSession(
+            const std::shared_ptr<runtime::ChxVM>& chxvm,
+            const std::vector<std::string>& input_names,
+            const std::vector<std::string>& output_names,
+            const OptionsPtr& options)
+        : chxvm_(chxvm), input_names_(input_names), output_names_(output_names), options_(options), inputs_(input_names.size()) {
+    }
+
+    void Bind(int index, const VarPtr& var) {
+        CHECK_LE(0, index) << index;
+        CHECK_GT(inputs_.size(), index) << index;
+        inputs_[index] = var;
+    }
+
+    void BindAll(const std::vector<VarPtr>& vars) {
+        CHECK_EQ(inputs_.size(), vars.size());
+        inputs_ = vars;
+    }
+
+    std::vector<VarPtr> Run() {
+        runtime::InOuts inputs;
+        for (size_t i = 0; i < inputs_.size(); ++i) {
+            CHECK(inputs_[i]) << "Input #" << i << " (" << input_names_[i] << ") is not bound";
+            CHECK(inputs.emplace(input_names_[i], inputs_[i]).second) << "Duplicated input name: " << input_names_[i];
+        }
+
+        // Note the state keeps a copy of the options given at the first
+        // run, so later changes to `options_` are not reflected.
+        const runtime::ChxVMOptions& chxvm_opts = options_->chxvm_opts;
+        if (state_) {
+            chxvm_->CheckInputs(inputs, chxvm_opts);
+            state_->Reset(inputs);
+        } else {
+            state_ = chxvm_->Prepare(inputs, chxvm_opts);
+        }
+        chxvm_->Run(state_.get());
+        EmitChromeTracing(*options_);
+
+        const runtime::InOuts& outputs = state_->GetOutputs();
+        std::vector<VarPtr> results;
+        for (const std::string& name : output_names_) {
+            auto found = outputs.find(name);
+            CHECK(found != outputs.end()) << "Output not found: " << name;
+            results.push_back(found->second);
+        }
+        return results;
+    }
+
+    // Releases inputs and values held by the last run.
+    void Clear() {
+        for (VarPtr& var : inputs_) var.reset();
+        state_.reset();
+    }
+
+    const std::vector<std::string>& input_names() const {
+        return input_names_;
+    }
+
+    const std::vector<std::string>& output_names() const {
+        return output_names_;
+    }
+
+private:
+    std::shared_ptr<runtime::ChxVM> chxvm_;
+    const std::vector<std::string> input_names_;
+    const std::vector<std::string> output_names_;
+    OptionsPtr options_;
+    std::vector<VarPtr> inputs_;
+    std::unique_ptr<runtime::ChxVMState> state_;
+};
+
+// Applies `fn` to all arrays in `var`, including ones in sequences.
+VarPtr MapArrays(const runtime::ChxVMVar& var, const std::function<chainerx::Array(const chainerx::Array&)>& fn) {
+    switch (var.kind()) {
+        case runtime::ChxVMVar::Kind::kArray:
+            return std::make_shared<runtime::ChxVMVar>(fn(var.GetArray()));
+        case runtime::ChxVMVar::Kind::kSequence: {
+            auto seq = std::make_shared<runtime::ChxVMSequence>();
+            seq->reserve(var.GetSequence()->size());
+            for (const runtime::ChxVMVar& v : *var.GetSequence()) seq->push_back(*MapArrays(v, fn));
+            return std::make_shared<runtime::ChxVMVar>(seq);
+        }
+        default:
+            return std::make_shared<runtime::ChxVMVar>(var);
+    }
+}
+
+// Values a forward run retains for its backward run. They stay in C++
+// so that Python code never holds references to them and they are freed
+// as soon as the backward run takes them.
+class ChxVMRetained {
+public:
+    explicit ChxVMRetained(std::vector<VarPtr> values) : values_(std::move(values)) {
+    }
+
+    // Moves retained arrays to the host memory. They are moved back to
+    // their original devices by `Take`.
+    void Offload() {
+        CHECK(!released_) << "Retained values were already released";
+        if (offloaded_) return;
+        for (VarPtr& var : values_) {
+            var = MapArrays(*var, [this](const chainerx::Array& a) {
+                devices_.push_back(&a.device());
+                return a.ToNative();
+            });
+        }
+        offloaded_ = true;
     }
-#endif
-    return state->GetOutputs();
+
+    std::vector<VarPtr> Take() {
+        CHECK(!released_) << "Retained values were already released";
+        if (offloaded_) {
+            size_t i = 0;
+            for (VarPtr& var : values_) {
+                var = MapArrays(*var, [this, &i](const chainerx::Array& a) { return a.ToDevice(*devices_[i++]); });
+            }
+            CHECK_EQ(devices_.size(), i);
+        }
+        std::vector<VarPtr> values;
+        values.swap(values_);
+        Release();
+        return values;
+    }
+
+    void Release() {
+        values_.clear();
+        devices_.clear();
+        released_ = true;
+    }
+
+    int64_t GetNBytes() const {
+        int64_t size = 0;
+        for (const VarPtr& var : values_) {
+            if (var->kind() == runtime::ChxVMVar::Kind::kArray || var->kind() == runtime::ChxVMVar::Kind::kSequence) {
+                size += var->GetNBytes();
+            }
+        }
+        return size;
+    }
+
+    size_t size() const {
+        return values_.size();
+    }
+
+    bool offloaded() const {
+        return offloaded_;
+    }
+
+    bool released() const {
+        return released_;
+    }
+
+private:
+    std::vector<VarPtr> values_;
+    std::vector<chainerx::Device*> devices_;
+    bool offloaded_{false};
+    bool released_{false};
+};
+
+// Runs `chxvm` and returns the values of `output_names` and a handle of
+// the values of `retained_names`.
+std::pair<std::vector<VarPtr>, std::shared_ptr<ChxVMRetained>> RunAndRetain(
+        const std::shared_ptr<runtime::ChxVM>& chxvm,
+        const std::map<std::string, VarPtr>& inputs,
+        const OptionsPtr& options,
+        const std::vector<std::string>& output_names,
+        const std::vector<std::string>& retained_names) {
+    runtime::InOuts outputs(chxvm->Run(inputs, options->chxvm_opts));
+    EmitChromeTracing(*options);
+
+    auto take = [&outputs](const std::string& name) {
+        auto found = outputs.find(name);
+        CHECK(found != outputs.end()) << "Output not found: " << name;
+        VarPtr var = found->second;
+        outputs.erase(found);
+        return var;
+    };
+
+    std::vector<VarPtr> results;
+    for (const std::string& name : output_names) results.push_back(take(name));
+    std::vector<VarPtr> retained;
+    for (const std::string& name : retained_names) retained.push_back(take(name));
+    return std::make_pair(results, std::make_shared<ChxVMRetained>(std::move(retained)));
+}
+
+void InitChxVMRetained(py::module& m) {
+    py::class_<ChxVMRetained, std::shared_ptr<ChxVMRetained>> c{m, "ChxVMRetained"};
+    c.def("offload", &ChxVMRetained::Offload, "Move retained arrays to the host memory");
+    c.def("take", &ChxVMRetained::Take, "Take retained values and release them from the handle");
+    c.def("release", &ChxVMRetained::Release, "Release retained values");
+    c.def("nbytes", &ChxVMRetained::GetNBytes, "Get the total size of retained arrays");
+    c.def("__len__", &ChxVMRetained::size);
+    c.def_property_readonly("offloaded", &ChxVMRetained::offloaded);
+    c.def_property_readonly("released", &ChxVMRetained::released);
+}
+
+std::shared_ptr<ChxVMSession> CreateSession(
+        const std::shared_ptr<runtime::ChxVM>& chxvm,
+        const std::vector<std::string>& input_names,
+        const std::vector<std::string>& output_names,
+        const OptionsPtr& options) {
+    return std::make_shared<ChxVMSession>(chxvm, input_names, output_names, options);
+}
+
+void InitChxVMSession(py::module& m) {
+    py::class_<ChxVMSession, std::shared_ptr<ChxVMSession>> c{m, "ChxVMSession"};
+    c.def("bind", &ChxVMSession::Bind, "Bind an input by its index", "index"_a, "var"_a);
+    c.def("bind_all", &ChxVMSession::BindAll, "Bind all inputs", "vars"_a);
+    c.def("run", &ChxVMSession::Run, "Run the model with bound inputs and return outputs in order");
+    c.def("clear", &ChxVMSession::Clear, "Release inputs and values held by the session");
+    c.def_property_readonly("input_names", &ChxVMSession::input_names);
+    c.def_property_readonly("output_names", &ChxVMSession::output_names);
 }
 
 void InitChxVM(py::module& m) {
     py::class_<runtime::ChxVM, std::shared_ptr<runtime::ChxVM>> c{m, "ChxVM"};
-    // TODO(hamaji): Expose ChxVMOptions to Python.
+    c.def("prepare", &PrepareWithOptions, "Prepare the model", "inputs"_a, "options"_a);
+    c.def("run", &RunWithOptions, "Run the model", "inputs"_a, "options"_a);
+    c.def("run_and_retain",
+          &RunAndRetain,
+          "Run the model and keep retained values in a handle",
+          "inputs"_a,
+          "options"_a,
+          "output_names"_a,
+          "retained_names"_a);
+    c.def("session",
+          &CreateSession,
+          "Create a persistent execution state which binds inputs by index",
+          "input_names"_a,
+          "output_names"_a,
+          "options"_a);
     c.def("prepare",
           &Prepare,
           "Prepare the model",
@@ -333,7 +712,7 @@ void InitChxVM(py::module& m) {
 }
 
 void InitChxVMState(py::module& m) {
-    py::class_<runtime::ChxVMState, std::shared_ptr<runtime::ChxVMState>> c{m, "ChxVMState"};
+    py::class_<PyChxVMState, StatePtr> c{m, "ChxVMState"};
 }
 
 bool IsArray(const VarPtr& v) {
@@ -356,12 +735,26 @@ std::vector<VarPtr> GetSequence(const VarPtr& v) {
     return out;
 }
 
+// Returns arrays in a sequence with a single call, or None if it contains
+// a value which is not an array.
+py::object GetArraySequence(const VarPtr& v) {
+    CHECK(IsSequence(v)) << v->DebugString();
+    std::vector<ArrayBodyPtr> out;
+    out.reserve(v->GetSequence()->size());
+    for (const runtime::ChxVMVar& var : *v->GetSequence()) {
+        if (!var.IsArray()) return py::none();
+        out.push_back(chainerx::internal::GetArrayBody(var.GetArray()));
+    }
+    return py::cast(out);
+}
+
 void InitChxVMVar(py::module& m) {
     py::class_<runtime::ChxVMVar, VarPtr> c{m, "ChxVMVar"};
     c.def("is_array", &IsArray, "Check if the ChxVMVar is an array");
     c.def("is_sequence", &IsSequence, "Check if the ChxVMVar is a sequence");
     c.def("array", &GetArray, "Get an array from a ChxVMVar");
     c.def("sequence", &GetSequence, "Get a array from a ChxVMVar");
+    c.def("array_sequence", &GetArraySequence, "Get arrays from a ChxVMVar of a sequence of arrays");
     c.def("__str__", [](const VarPtr& v) { return "var(" + v->DebugString() + ")"; });
 }
 
@@ -369,6 +762,13 @@ VarPtr CreateValueFromArray(const ArrayBodyPtr& a) {
     return std::make_shared<runtime::ChxVMVar>(chainerx::Array(a));
 }
 
+VarPtr CreateValueFromArrays(const std::vector<ArrayBodyPtr>& arrays) {
+    auto out = std::make_shared<runtime::ChxVMSequence>();
+    out->reserve(arrays.size());
+    for (const ArrayBodyPtr& a : arrays) out->emplace_back(chainerx::Array(a));
+    return std::make_shared<runtime::ChxVMVar>(out);
+}
+
 VarPtr CreateValueFromSequence(const std::vector<VarPtr>& seq) {
     auto out = std::make_shared<runtime::ChxVMSequence>();
     out->reserve(seq.size());
@@ -392,16 +792,25 @@ PYBIND11_MODULE(_chainer_compiler_core, m) {  // NOLINT
 
     InitChxVMVar(m);
 
+    InitChxVMOptions(m);
+
+    InitChxVMSession(m);
+
+    InitChxVMRetained(m);
+
     InitChxVM(m);
 
     InitChxVMState(m);
 
     m.def("load", &LoadGraph, "Load an ONNX model");
+    m.def("load_from_bytes", &LoadGraphFromBuffer, "Load an ONNX model from a serialized ModelProto in memory", "buffer"_a);
+    m.def("load_chxvm", &LoadChxVM, "Load a ChxVM from a serialized ChxVM program");
     m.def("configure", &Configure, "Configure global variables in chainer compiler",
 #include "chainer_compiler_cc/pybind_args.inc"
     );
     m.def("value", &CreateValueFromArray, "Create an ChxVMVar from a ChainerX Array");
     m.def("value", &CreateValueFromSequence, "Create an ChxVMVar from a sequence of ChxVMVars");
+    m.def("value_from_arrays", &CreateValueFromArrays, "Create an ChxVMVar of a sequence from ChainerX Arrays");
 
     m.def("initialize_memory_monitoring", &InitializeMemoryMonitoring, "Initialize function hooks to monitor memory usage");
     m.def("get_peak_memory", &runtime::GetPeakMemory, "Output peak memory usage observed by function hooks");
@@ -13,6 +13,7 @@
 
 #include <google/protobuf/io/coded_stream.h>
 #include <google/protobuf/io/zero_copy_stream_impl.h>
+#include <google/protobuf/io/zero_copy_stream_impl_lite.h>
 
 #include <common/log.h>
 
@@ -31,3 +32,14 @@ Proto LoadLargeProto(const std::string& filename) {
     CHECK(proto.ParseFromCodedStream(&cis)) << "failed to parse " << filename;
     return proto;
 }
+
+template <class Proto>
+Proto LoadLargeProtoFromArray(const void* data, size_t size) {
+    CHECK_LE(size, static_cast<size_t>(std::numeric_limits<int>::max())) << "too large proto: " << size;
+    Proto proto;
+    ::google::protobuf::io::ArrayInputStream ais(data, static_cast<int>(size));
+    ::google::protobuf::io::CodedInputStream cis(&ais);
+    cis.SetTotalBytesLimit(std::numeric_limits<int>::max(), std::numeric_limits<int>::max());
+    CHECK(proto.ParseFromCodedStream(&cis)) << "failed to parse a proto of " << size << " bytes";
+    return proto;
+}
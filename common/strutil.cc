@@ -36,4 +36,10 @@ std::string Basename(const std::string& str) {
     return str.substr(found + 1);
 }
 
+std::string Dirname(const std::string& str) {
+    std::size_t found = str.rfind('/');
+    if (found == std::string::npos) return ".";
+    return str.substr(0, found);
+}
+
 }  // namespace chainer_compiler
@@ -54,4 +54,7 @@ bool HasSuffix(const std::string& str, const std::string& suffix);
 
 std::string Basename(const std::string& str);
 
+// Returns "." if `str` has no directory part.
+std::string Dirname(const std::string& str);
+
 }  // namespace chainer_compiler
@@ -28,5 +28,11 @@ TEST(StrUtilTest, JoinString) {
     EXPECT_EQ("", JoinString({}, ", "));
 }
 
+TEST(StrUtilTest, Dirname) {
+    EXPECT_EQ("out/foo", Dirname("out/foo/model.onnx"));
+    EXPECT_EQ(".", Dirname("model.onnx"));
+    EXPECT_EQ("", Dirname("/model.onnx"));
+}
+
 }  // namespace
 }  // namespace chainer_compiler
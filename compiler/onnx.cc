@@ -1,6 +1,8 @@
 #include <compiler/onnx.h>
 
 #include <common/log.h>
+#include <common/protoutil.h>
+#include <common/strutil.h>
 #include <compiler/flags.h>
 
 namespace chainer_compiler {
@@ -36,4 +38,43 @@ void CheckCanonicalized(const std::string& domain, int version) {
     }
 }
 
+void ResolveExternalDataLocations(const std::string& base_dir, onnx::TensorProto* xtensor) {
+    if (xtensor->data_location() != onnx::TensorProto::EXTERNAL) {
+        return;
+    }
+    for (onnx::StringStringEntryProto& entry : *xtensor->mutable_external_data()) {
+        if (entry.key() == "location" && !HasPrefix(entry.value(), "/")) {
+            entry.set_value(base_dir + "/" + entry.value());
+        }
+    }
+}
+
+void ResolveExternalDataLocations(const std::string& base_dir, onnx::GraphProto* xgraph) {
+    for (onnx::TensorProto& xtensor : *xgraph->mutable_initializer()) {
+        ResolveExternalDataLocations(base_dir, &xtensor);
+    }
+    for (onnx::NodeProto& xnode : *xgraph->mutable_node()) {
+        for (onnx::AttributeProto& xattr : *xnode.mutable_attribute()) {
+            if (xattr.has_t()) {
+                ResolveExternalDataLocations(base_dir, xattr.mutable_t());
+            }
+            for (onnx::TensorProto& xtensor : *xattr.mutable_tensors()) {
+                ResolveExternalDataLocations(base_dir, &xtensor);
+            }
+            if (xattr.has_g()) {
+                ResolveExternalDataLocations(base_dir, xattr.mutable_g());
+            }
+            for (onnx::GraphProto& xsubgraph : *xattr.mutable_graphs()) {
+                ResolveExternalDataLocations(base_dir, &xsubgraph);
+            }
+        }
+    }
+}
+
+onnx::ModelProto LoadModelProto(const std::string& onnx_path) {
+    onnx::ModelProto xmodel(LoadLargeProto<onnx::ModelProto>(onnx_path));
+    ResolveExternalDataLocations(Dirname(onnx_path), xmodel.mutable_graph());
+    return xmodel;
+}
+
 }  // namespace chainer_compiler
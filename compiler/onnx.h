@@ -18,4 +18,13 @@ std::unordered_map<std::string, int> DefaultOpsetImports();
 
 void CheckCanonicalized(const std::string& domain, int version);
 
+// Rewrites relative locations of external data in `xtensor` or tensors
+// in `xgraph` so they are relative to `base_dir` instead of the current
+// directory.
+void ResolveExternalDataLocations(const std::string& base_dir, onnx::TensorProto* xtensor);
+void ResolveExternalDataLocations(const std::string& base_dir, onnx::GraphProto* xgraph);
+
+// Loads an ONNX model whose external data are relative to `onnx_path`.
+onnx::ModelProto LoadModelProto(const std::string& onnx_path);
+
 }  // namespace chainer_compiler
@@ -4,6 +4,7 @@
 #include <cstdlib>
 #include <cstring>
 #include <sstream>
+#include <string>
 
 #include <chainerx/routines/creation.h>
 
@@ -92,6 +93,29 @@ absl::variant<chainerx::Array, std::vector<std::string>> TensorProtoToArray(onnx
         return std::vector<std::string>(xtensor.string_data().begin(), xtensor.string_data().end());
     }
 
+    if (xtensor.data_location() == onnx::TensorProto::EXTERNAL) {
+        // Map the data into memory instead of reading it so large
+        // weights are neither copied nor kept in `xtensor`.
+        std::string location;
+        int64_t offset = 0;
+        int64_t length = -1;
+        for (const onnx::StringStringEntryProto& entry : xtensor.external_data()) {
+            if (entry.key() == "location") {
+                location = entry.value();
+            } else if (entry.key() == "offset") {
+                offset = std::stoll(entry.value());
+            } else if (entry.key() == "length") {
+                length = std::stoll(entry.value());
+            }
+        }
+        CHECK(!location.empty()) << "No location of external data: " << xtensor.name();
+        chainerx::Array array = runtime::MapHostArrayFromFile(dtype.chx(), std::move(shape), location, offset);
+        if (length >= 0) {
+            CHECK_EQ(length, array.GetNBytes()) << "Invalid length of external data: " << xtensor.name();
+        }
+        return array;
+    }
+
     if (xtensor.has_raw_data()) {
         CHECK_EQ(0, xtensor.float_data_size());
         CHECK_EQ(0, xtensor.int32_data_size());
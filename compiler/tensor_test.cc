@@ -1,4 +1,7 @@
+#include <fstream>
 #include <string>
+#include <utility>
+#include <vector>
 
 #include <gtest/gtest.h>
 
@@ -6,7 +9,9 @@
 
 #include <common/log.h>
 #include <common/protoutil.h>
+#include <common/strutil.h>
 #include <compiler/dtype.h>
+#include <compiler/onnx.h>
 #include <compiler/tensor.h>
 
 namespace chainer_compiler {
@@ -23,5 +28,40 @@ TEST(TensorTest, LoadMNISTOutput) {
     EXPECT_EQ(Dtype::kFloat32, tensor.dtype());
 }
 
+TEST(TensorTest, LoadExternalData) {
+    chainerx::testing::ContextSession sess;
+    const std::string path = "/tmp/chainer_compiler_test_external_data.data";
+    const float values[] = {1, 2, 3, 4, 5, 6};
+    {
+        std::ofstream ofs(path, std::ios::binary);
+        ofs << "padding";
+        ofs.write(reinterpret_cast<const char*>(values), sizeof(values));
+    }
+
+    onnx::TensorProto xtensor;
+    xtensor.set_name("external");
+    xtensor.set_data_type(onnx::TensorProto::FLOAT);
+    xtensor.add_dims(2);
+    xtensor.add_dims(3);
+    xtensor.set_data_location(onnx::TensorProto::EXTERNAL);
+    for (const auto& p : std::vector<std::pair<std::string, std::string>>{
+                 {"location", Basename(path)}, {"offset", "7"}, {"length", std::to_string(sizeof(values))}}) {
+        onnx::StringStringEntryProto* entry = xtensor.add_external_data();
+        entry->set_key(p.first);
+        entry->set_value(p.second);
+    }
+    ResolveExternalDataLocations("/tmp", &xtensor);
+    EXPECT_EQ(path, xtensor.external_data(0).value());
+
+    Tensor tensor(xtensor);
+    ASSERT_EQ(2, tensor.dims().size());
+    EXPECT_EQ(2, tensor.dims()[0]);
+    EXPECT_EQ(3, tensor.dims()[1]);
+    EXPECT_EQ(Dtype::kFloat32, tensor.dtype());
+    for (int i = 0; i < 6; ++i) {
+        EXPECT_EQ(values[i], tensor.Get<float>(i));
+    }
+}
+
 }  // namespace
 }  // namespace chainer_compiler
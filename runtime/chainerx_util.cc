@@ -1,6 +1,15 @@
 #include "runtime/chainerx_util.h"
 
+#ifndef _WIN32
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+#include <cerrno>
 #include <cstring>
+#include <fstream>
 #include <limits>
 #include <numeric>
 
@@ -79,6 +88,41 @@ chainerx::Array MakeHostArray(chainerx::Dtype dtype, chainerx::Shape shape, cons
     return array;
 }
 
+chainerx::Array MapHostArrayFromFile(chainerx::Dtype dtype, chainerx::Shape shape, const std::string& filename, int64_t offset) {
+    chainerx::Device& device = chainerx::GetNativeBackend().GetDevice(0);
+    const int64_t size = chainerx::GetItemSize(dtype) * shape.GetTotalSize();
+    if (size == 0) {
+        return chainerx::Empty(shape, dtype, device);
+    }
+
+#ifdef _WIN32
+    std::ifstream ifs(filename, std::ios::binary);
+    CHECK(ifs) << "failed to open " << filename;
+    std::shared_ptr<void> data(new char[size], std::default_delete<char[]>());
+    ifs.seekg(offset);
+    CHECK(ifs.read(static_cast<char*>(data.get()), size)) << "failed to read " << size << " bytes at " << offset << " of " << filename;
+    return chainerx::FromData(shape, dtype, data, absl::nullopt /* strides */, 0 /* offset */, device);
+#else
+    int fd = open(filename.c_str(), O_RDONLY);
+    CHECK_LE(0, fd) << "failed to open " << filename << ": " << strerror(errno);
+    struct stat st;
+    CHECK_EQ(0, fstat(fd, &st)) << "failed to stat: " << filename << ": " << strerror(errno);
+    CHECK_LE(offset + size, st.st_size) << "out of range: " << size << " bytes at " << offset << " of " << filename;
+
+    // mmap requires a page-aligned offset.
+    const int64_t page_size = sysconf(_SC_PAGESIZE);
+    const int64_t map_offset = offset / page_size * page_size;
+    const int64_t map_size = offset - map_offset + size;
+    void* addr = mmap(nullptr, map_size, PROT_READ | PROT_WRITE, MAP_PRIVATE, fd, map_offset);
+    const int mmap_errno = errno;
+    close(fd);
+    CHECK(addr != MAP_FAILED) << "failed to mmap " << filename << ": " << strerror(mmap_errno);
+
+    std::shared_ptr<void> data(addr, [map_size](void* p) { munmap(p, map_size); });
+    return chainerx::FromData(shape, dtype, data, absl::nullopt /* strides */, offset - map_offset, device);
+#endif
+}
+
 std::vector<chainerx::Array> SplitByLengths(const chainerx::Array& input, int axis, const std::vector<int64_t>& split) {
     CHECK_EQ(std::accumulate(split.begin(), split.end(), 0), input.shape()[axis]);
     std::vector<chainerx::Array> results;
@@ -21,6 +21,11 @@ chainerx::Array MakeDtypeScalarArray(chainerx::Dtype dtype, chainerx::Scalar sca
 
 chainerx::Array MakeHostArray(chainerx::Dtype dtype, chainerx::Shape shape, const void* src);
 
+// Maps the bytes at `offset` of `filename` into a host array without
+// copying them. The mapping is private, so updates of the returned array
+// are not written back to the file.
+chainerx::Array MapHostArrayFromFile(chainerx::Dtype dtype, chainerx::Shape shape, const std::string& filename, int64_t offset);
+
 // This function was renamed from `Split` to clearly tell this is
 // different from chainerx::Split.
 std::vector<chainerx::Array> SplitByLengths(const chainerx::Array& input, int axis, const std::vector<int64_t>& split);
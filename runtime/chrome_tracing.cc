@@ -67,5 +67,10 @@ void ChromeTracingEmitter::Emit(const std::string& output_filename) const {
     ofs << "]\n";
 }
 
+void ChromeTracingEmitter::Clear() {
+    events_.clear();
+    base_time_ = std::chrono::system_clock::now();
+}
+
 }  // namespace runtime
 }  // namespace chainer_compiler
@@ -40,6 +40,9 @@ public:
 
     void Emit(const std::string& output_filename) const;
 
+    // Drops all events and restarts the clock of events.
+    void Clear();
+
 private:
     std::vector<std::unique_ptr<Event>> events_;
     std::chrono::system_clock::time_point base_time_;
@@ -137,7 +137,7 @@ void ChxVM::Init() {
     }
 }
 
-std::unique_ptr<ChxVMState> ChxVM::Prepare(const InOuts& program_inputs, const ChxVMOptions& options) {
+void ChxVM::CheckInputs(const InOuts& program_inputs, const ChxVMOptions& options) {
     for (const std::unique_ptr<ChxVMInputDesc>& input : input_descs_) {
         auto found = program_inputs.find(input->name);
         CHECK(found != program_inputs.end()) << "Input '" << input->name << "' not found";
@@ -156,6 +156,10 @@ std::unique_ptr<ChxVMState> ChxVM::Prepare(const InOuts& program_inputs, const C
             CHECK_EQ(static_cast<int>(input->dtype), 0) << "Input '" << input->name << "' must be a tensor";
         }
     }
+}
+
+std::unique_ptr<ChxVMState> ChxVM::Prepare(const InOuts& program_inputs, const ChxVMOptions& options) {
+    CheckInputs(program_inputs, options);
     return std::make_unique<ChxVMState>(options, num_variables_, program_inputs);
 }
 
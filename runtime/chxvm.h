@@ -70,6 +70,7 @@ public:
 
     void Init();
 
+    void CheckInputs(const InOuts& program_inputs, const ChxVMOptions& options);
     std::unique_ptr<ChxVMState> Prepare(const InOuts& program_inputs, const ChxVMOptions& options);
     InOuts Run(const InOuts& program_inputs, const ChxVMOptions& options);
     void Run(ChxVMState* state);
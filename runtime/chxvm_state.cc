@@ -22,6 +22,15 @@ ChxVMState::ChxVMState(const ChxVMOptions& options, int num_variables, const InO
 ChxVMState::~ChxVMState() {
 }
 
+void ChxVMState::Reset(const InOuts& inputs) {
+    pc_ = 0;
+    for (std::unique_ptr<ChxVMVar>& var : variables_) {
+        var.reset();
+    }
+    inputs_ = inputs;
+    outputs_.clear();
+}
+
 chainerx::Array ChxVMState::GetArray(int index) {
     CHECK_LE(0, index) << index;
     CHECK_GT(variables_.size(), index) << index;
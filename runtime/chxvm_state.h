@@ -23,6 +23,10 @@ public:
     ChxVMState(const ChxVMOptions& options, int num_variables, const InOuts& inputs);
     ~ChxVMState();
 
+    // Makes the state ready for another run with `inputs`. This
+    // keeps the options and the storage of variables.
+    void Reset(const InOuts& inputs);
+
     int pc() const {
         return pc_;
     }
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+#
+# Measures ch2o translation time per ONNX node for each debug info mode.
+#
+# Usage:
+#
+# $ ./scripts/bench_ch2o_translation.py --model resnet152 --model vgg19
+
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'scripts'))
+
+import numpy as np  # noqa
+
+import large_models  # noqa
+from chainer_compiler import ch2o  # noqa
+
+
+def count_nodes(graph):
+    num_nodes = 0
+    for node in graph.node:
+        num_nodes += 1
+        for attr in node.attribute:
+            if attr.HasField('g'):
+                num_nodes += count_nodes(attr.g)
+            for g in attr.graphs:
+                num_nodes += count_nodes(g)
+    return num_nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of ch2o translation')
+    parser.add_argument('--model', action='append',
+                        choices=['resnet50', 'resnet152', 'vgg16', 'vgg19'])
+    parser.add_argument('--debug_info', action='append',
+                        choices=ch2o.utils.DEBUG_INFO_MODES)
+    parser.add_argument('--iterations', '-I', type=int, default=3)
+    args = parser.parse_args()
+
+    models = args.model or ['resnet152', 'vgg19']
+    modes = args.debug_info or list(ch2o.utils.DEBUG_INFO_MODES)
+
+    for model_name in models:
+        np.random.seed(42)
+        get_fun = getattr(large_models, 'get_' + model_name)
+        model, inputs = get_fun(np.float32)
+        for mode in modes:
+            elapsed = []
+            for _ in range(args.iterations):
+                start = time.time()
+                xmodel = ch2o.compile_model(model, inputs, debug_info=mode)
+                elapsed.append(time.time() - start)
+            num_nodes = count_nodes(xmodel.graph)
+            best = min(elapsed)
+            print('%s debug_info=%s: %d nodes %.3fsec (%.1fusec/node)' %
+                  (model_name, mode, num_nodes, best,
+                   best * 1e6 / num_nodes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+#
+# Measures the per-call Python overhead of running a ChxVM for MNIST MLP.
+#
+# Usage:
+#
+# $ ./scripts/bench_chxvm_overhead.py
+#
+# This compares `ChxVM.run` with keyword options, `ChxVM.run` with a
+# prebuilt `ChxVMOptions` and a persistent `ChxVMSession`.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import chainerx
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+import chainer_compiler  # noqa
+from chainer_compiler.chainer_compiler import _chainer_compiler_core  # noqa
+
+
+class MLP(chainer.Chain):
+
+    def __init__(self, n_units, n_out):
+        super(MLP, self).__init__()
+        with self.init_scope():
+            self.l1 = L.Linear(None, n_units)
+            self.l2 = L.Linear(None, n_units)
+            self.l3 = L.Linear(None, n_out)
+
+    def forward(self, x):
+        h1 = F.relu(self.l1(x))
+        h2 = F.relu(self.l2(h1))
+        return self.l3(h2)
+
+
+def measure(name, fn, iterations):
+    # Warm up.
+    for _ in range(10):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print('%s: %.1fusec/call' % (name, elapsed * 1e6 / iterations))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of per-call overhead of ChxVM')
+    parser.add_argument('--batchsize', '-b', type=int, default=1)
+    parser.add_argument('--unit', '-u', type=int, default=100)
+    parser.add_argument('--iterations', '-I', type=int, default=10000)
+    args = parser.parse_args()
+
+    np.random.seed(42)
+    model = MLP(args.unit, 10)
+    x = np.random.rand(args.batchsize, 784).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        onnx_file = chainer_compiler.export(
+            model, [x], filename=os.path.join(tmpdir, 'model.onnx'),
+            translator='ch2o')
+        graph = _chainer_compiler_core.load(onnx_file)
+
+    params = graph.params()
+    input_names = graph.input_names()
+    output_names = graph.output_names()
+    chxvm = graph.compile()
+
+    inputs = dict(params)
+    inputs[input_names[0]] = _chainer_compiler_core.value(chainerx.array(x))
+
+    measure('run(**kwargs)', lambda: chxvm.run(inputs, check_types=False),
+            args.iterations)
+
+    options = _chainer_compiler_core.ChxVMOptions(check_types=False)
+    measure('run(options)', lambda: chxvm.run(inputs, options),
+            args.iterations)
+
+    param_names = sorted(params.keys())
+    session = chxvm.session(input_names + param_names, output_names, options)
+    session.bind_all([inputs[name] for name in input_names + param_names])
+    x_var = inputs[input_names[0]]
+
+    def run_session():
+        session.bind(0, x_var)
+        return session.run()
+
+    measure('session', run_session, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
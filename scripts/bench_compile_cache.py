@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+#
+# Measures cold and warm startup time of `chainer_compiler.compile` with
+# the persistent compile cache.
+#
+# Usage:
+#
+# $ ./scripts/bench_compile_cache.py --model resnet50
+#
+# Each measurement runs in a fresh process so it reflects the cost paid
+# on a worker restart.
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'scripts'))
+
+
+def compile_once(args):
+    import large_models
+    import numpy as np
+
+    import chainer_compiler
+
+    np.random.seed(42)
+    get_fun = getattr(large_models, 'get_' + args.model)
+    model, inputs = get_fun(np.float32)
+    start = time.time()
+    chainer_compiler.compile(model, inputs,
+                             translator=args.translator,
+                             cache_dir=args.cache_dir)
+    print('%.3f' % (time.time() - start))
+
+
+def run_child(args, cache_dir):
+    cmd = [sys.executable, os.path.abspath(__file__),
+           '--child',
+           '--model', args.model,
+           '--translator', args.translator,
+           '--cache_dir', cache_dir]
+    output = subprocess.check_output(cmd)
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the compile cache')
+    parser.add_argument('--model', default='resnet50',
+                        choices=['resnet50', 'resnet152', 'vgg16', 'vgg19'])
+    parser.add_argument('--translator', default='onnx_chainer')
+    parser.add_argument('--iterations', '-I', type=int, default=3)
+    parser.add_argument('--cache_dir', default=None)
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        compile_once(args)
+        return
+
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix='compile_cache_')
+    try:
+        colds = []
+        warms = []
+        for i in range(args.iterations):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            colds.append(run_child(args, cache_dir))
+            warms.append(run_child(args, cache_dir))
+            print('Iteration %d: cold=%.3fsec warm=%.3fsec' %
+                  (i, colds[-1], warms[-1]))
+        cold = min(colds)
+        warm = min(warms)
+        print('Cold: %.3fsec Warm: %.3fsec Speedup: %.1fx' %
+              (cold, warm, cold / warm))
+    finally:
+        if args.cache_dir is None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
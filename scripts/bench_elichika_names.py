@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+#
+# Measures the scaling of ONNX name allocation in elichika.
+#
+# Usage:
+#
+# $ ./scripts/bench_elichika_names.py --nodes 10000 --nodes 100000
+#
+# Names are allocated in the same pattern as `assign_onnx_name` does for
+# an unrolled loop: every value and node produced by the same line
+# shares a base name.
+
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from chainer_compiler.elichika.parser.context import NameAllocator  # noqa
+
+
+class ListNameAllocator(object):
+    """The previous allocator which scanned a list of used names."""
+
+    def __init__(self):
+        self.names = []
+
+    def allocate(self, base_name):
+        ind = 0
+        name = base_name
+        while name in self.names:
+            ind += 1
+            name = base_name + '_' + str(ind)
+        self.names.append(name)
+        return name
+
+
+def allocate_names(allocator, num_nodes, num_lines):
+    for i in range(num_nodes):
+        line = i % num_lines
+        # An output value and the node itself.
+        allocator.allocate('h_[L.%d]' % line)
+        allocator.allocate('Node(Add)_[L.%d]' % line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of ONNX name allocation in elichika')
+    parser.add_argument('--nodes', type=int, action='append',
+                        help='The number of nodes')
+    parser.add_argument('--lines', type=int, default=10,
+                        help='The number of distinct lines in the loop body')
+    parser.add_argument('--max_legacy_nodes', type=int, default=1000,
+                        help='Skip the previous allocator for larger graphs')
+    args = parser.parse_args()
+
+    sizes = args.nodes or [1000, 10000, 20000, 50000, 100000]
+    for num_nodes in sizes:
+        allocators = [('hashed', NameAllocator)]
+        if num_nodes <= args.max_legacy_nodes:
+            allocators.append(('list', ListNameAllocator))
+        for name, cls in allocators:
+            start = time.time()
+            allocate_names(cls(), num_nodes, args.lines)
+            elapsed = time.time() - start
+            print('%s nodes=%d: %.3fsec (%.2fusec/node)' %
+                  (name, num_nodes, elapsed, elapsed * 1e6 / num_nodes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+#
+# Measures the time of elichika type inference on the EspNet models of
+# tests/elichika_typing with type environments forked in constant time
+# and with environments copied entirely for each block as before.
+#
+# Usage:
+#
+# $ ./scripts/bench_elichika_tyenv.py
+# $ ./scripts/bench_elichika_tyenv.py --models E2E,Decoder -n 5
+#
+# The outputs of both runs are compared so that forking environments does
+# not change the inferred types.
+
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'tests', 'elichika_typing'))
+
+import EspNet_test  # noqa
+from chainer_compiler.elichika.testtools import type_inference_tools  # noqa
+from chainer_compiler.elichika.typing import type_inference  # noqa
+from chainer_compiler.elichika.typing.types import copy_ty  # noqa
+
+
+MODELS = ['AttDot', 'AttLoc', 'StatelessLSTM', 'VGG2L', 'BLSTM', 'Decoder',
+          'E2E']
+
+
+class CopyingTypeEnv(type_inference.TypeEnv):
+    """Copies all entries for each fork as before."""
+
+    def fork(self):
+        env = CopyingTypeEnv()
+        for key, ty in self.items():
+            env.local[key] = copy_ty(ty)
+        return env
+
+
+def infer(name, num_runs):
+    elapsed = []
+    for _ in range(num_runs):
+        model, forward_args = getattr(EspNet_test, 'gen_%s_model' % name)()
+        start = time.time()
+        id2type = type_inference_tools.generate_id2type_from_forward(
+            model, forward_args)
+        elapsed.append(time.time() - start)
+    return min(elapsed), {i: str(t) for i, t in id2type.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of type environments of elichika')
+    parser.add_argument('--models', default=','.join(MODELS),
+                        help='Comma separated EspNet models')
+    parser.add_argument('--num_runs', '-n', type=int, default=3,
+                        help='The best of the runs is reported')
+    args = parser.parse_args()
+
+    type_env = type_inference.TypeEnv
+    total_base = total = 0
+    ok = True
+    for name in args.models.split(','):
+        type_inference.TypeEnv = CopyingTypeEnv
+        try:
+            base_elapsed, base_types = infer(name, args.num_runs)
+        finally:
+            type_inference.TypeEnv = type_env
+        elapsed, types = infer(name, args.num_runs)
+        total_base += base_elapsed
+        total += elapsed
+        print('%-14s copying: %.3fsec forking: %.3fsec (%.2fx)' %
+              (name, base_elapsed, elapsed, base_elapsed / elapsed))
+        if types != base_types:
+            print('Inferred types of %s differ!' % name)
+            ok = False
+    print('%-14s copying: %.3fsec forking: %.3fsec (%.2fx)' %
+          ('total', total_base, total, total_base / total))
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+#
+# Measures the time of elichika type inference on deep models with and
+# without reusing the results of functions called with the same argument
+# types.
+#
+# Usage:
+#
+# $ ./scripts/bench_elichika_typing.py --model resnet152
+#
+# The outputs of both runs are compared so that the reuse does not
+# change the inferred types.
+
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from chainer_compiler.elichika.testtools import type_inference_tools  # noqa
+from chainer_compiler.elichika.typing import type_inference  # noqa
+from testcases.pytorch import resnet  # noqa
+
+
+class NoFunctionSummaries(type_inference.FunctionSummaries):
+    """Infers every call of user-defined functions as before."""
+
+    def add(self, key, summary):
+        pass
+
+
+def infer(model, args, function_summaries):
+    type_inference_tools.reset_state()
+    forward = model.forward
+    module = sys.modules[forward.__module__]
+    func_node, type_hints = type_inference.parse_function(forward)
+    tc = type_inference.InferenceEngine(
+        module=module, function_summaries=function_summaries)
+    start = time.time()
+    tc.infer_function_value_args(
+        func_node, (model,) + args, type_hints=type_hints)
+    elapsed = time.time() - start
+
+    node2id = type_inference_tools.generate_node2id(
+        func_node, tc.subroutine_node)
+    id2type = type_inference_tools.generate_id2type(tc.nodetype, node2id)
+    return elapsed, {i: str(t) for i, t in id2type.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of elichika type inference')
+    parser.add_argument('--model', default='resnet152',
+                        choices=['resnet18', 'resnet50', 'resnet101',
+                                 'resnet152'])
+    parser.add_argument('--batchsize', '-B', type=int, default=1)
+    args = parser.parse_args()
+
+    model = getattr(resnet, args.model)()
+    inputs = (torch.ones(args.batchsize, 3, 224, 224),)
+
+    base_elapsed, base_types = infer(model, inputs, NoFunctionSummaries())
+    print('without summaries: %.3fsec' % base_elapsed)
+    summaries = type_inference.FunctionSummaries()
+    elapsed, types = infer(model, inputs, summaries)
+    print('with summaries: %.3fsec (%d summaries, %.1fx)' %
+          (elapsed, len(summaries.summaries), base_elapsed / elapsed))
+
+    if types != base_types:
+        print('Inferred types differ!')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+#
+# Measures the per-call overhead of flattening and unflattening nested
+# inputs and outputs of `CompiledModel` for sequence models.
+#
+# Usage:
+#
+# $ ./scripts/bench_flatten.py --model nstep_lstm --batchsize 256
+#
+# Both a model with NStepLSTM from the ch2o tests and a sentiment
+# analysis model similar to the one in `scripts/sentiment.py` take a
+# list of per-sequence arrays.
+
+import argparse
+import os
+import sys
+import time
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'scripts'))
+
+import chainer_compiler  # noqa
+from chainer_compiler import chainer_compiler as cc  # noqa
+import sentiment  # noqa
+from testcases.ch2o_tests.node import NStepLSTM  # noqa
+
+
+class Sentiment(chainer.Chain):
+
+    def __init__(self, num_vocabs, num_hidden):
+        super(Sentiment, self).__init__()
+        with self.init_scope():
+            self.embed = L.EmbedID(num_vocabs, num_hidden)
+            self.lstm = L.NStepLSTM(1, num_hidden, num_hidden, 0.0)
+            self.linear = L.Linear(num_hidden, 2)
+
+    def forward(self, xs):
+        exs = [self.embed(x) for x in xs]
+        hy, _, _ = self.lstm(None, None, exs)
+        return self.linear(hy[-1])
+
+
+def get_model(args):
+    if args.model == 'nstep_lstm':
+        model = NStepLSTM.A(1, args.unit, args.unit)
+        lengths = np.random.randint(1, args.length, size=args.batchsize)
+        xs = [np.random.rand(l, args.unit).astype(np.float32)
+              for l in lengths]
+    else:
+        num_vocabs = 100
+        model = Sentiment(num_vocabs, args.unit)
+        labels, lengths = sentiment._gen_random_sequence(
+            args.batchsize, args.length, num_vocabs)
+        xs = [v[:l].astype(np.int32) for v, l in zip(labels, lengths)]
+    return model, [xs]
+
+
+def measure(name, fn, iterations):
+    fn()
+    start = time.time()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.time() - start
+    print('%s: %.3fmsec/call' % (name, elapsed * 1000 / iterations))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of flatten/unflatten of nested values')
+    parser.add_argument('--model', default='nstep_lstm',
+                        choices=['nstep_lstm', 'sentiment'])
+    parser.add_argument('--batchsize', '-B', type=int, default=256)
+    parser.add_argument('--length', type=int, default=10)
+    parser.add_argument('--unit', '-u', type=int, default=16)
+    parser.add_argument('--iterations', '-I', type=int, default=100)
+    args = parser.parse_args()
+
+    np.random.seed(42)
+    model, inputs = get_model(args)
+
+    def legacy():
+        flat = cc._flatten(inputs)
+        cc._unflatten(flat, inputs)
+
+    specs = {cc._signature(inputs): cc._Spec(inputs)}
+
+    def planned():
+        # Includes the lookup of the compiled plan done on every call.
+        spec = specs[cc._signature(inputs)]
+        flat = spec.flatten(inputs)
+        spec.unflatten(flat)
+
+    iterations = args.iterations * 10
+    measure('recursive flatten/unflatten', legacy, iterations)
+    measure('flat plan flatten/unflatten', planned, iterations)
+
+    compiled = chainer_compiler.compile(model, inputs)
+
+    def fwd_bwd():
+        compiled.cleargrads()
+        y = compiled(*inputs)
+        if isinstance(y, (list, tuple)):
+            y = F.sum(F.stack([F.sum(v) for v in cc._flatten(y)]))
+        F.sum(y).backward()
+
+    measure('forward/backward', fwd_bwd, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
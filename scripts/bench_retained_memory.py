@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+#
+# Measures the peak GPU memory of a training step of a compiled model
+# with and without offloading values retained for backward.
+#
+# Usage:
+#
+# $ ./scripts/bench_retained_memory.py --model resnet50
+#
+# Each configuration runs in a fresh process because the memory monitor
+# cannot be reset while arrays are alive.
+
+import argparse
+import os
+import subprocess
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'scripts'))
+
+
+def measure(args):
+    import chainer
+    import numpy as np
+
+    import chainer_compiler
+    import large_models
+    from chainer_compiler.chainer_compiler import _chainer_compiler_core
+
+    np.random.seed(42)
+    device = chainer.get_device(args.device)
+    device.use()
+    # Start monitoring before any array is allocated on the device as
+    # the monitor only knows arrays allocated after this.
+    _chainer_compiler_core.initialize_memory_monitoring(args.device)
+    get_fun = getattr(large_models, 'get_' + args.model)
+    model, inputs = get_fun(np.float32)
+    model.to_device(device)
+    inputs = [device.send(x) for x in inputs]
+
+    compiled = chainer_compiler.compile(
+        model, inputs, offload_retained=args.offload_retained)
+    for _ in range(args.iterations):
+        compiled.cleargrads()
+        loss = compiled(*inputs)
+        loss.backward()
+        del loss
+    print(_chainer_compiler_core.get_peak_memory())
+
+
+def run_child(args, offload_retained):
+    cmd = [sys.executable, os.path.abspath(__file__),
+           '--child',
+           '--model', args.model,
+           '--device', args.device,
+           '--iterations', str(args.iterations)]
+    if offload_retained:
+        cmd.append('--offload_retained')
+    output = subprocess.check_output(cmd)
+    return int(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of peak memory of a training step')
+    parser.add_argument('--model', default='resnet50',
+                        choices=['resnet50', 'resnet152', 'vgg16', 'vgg19'])
+    parser.add_argument('--device', default='cuda:0')
+    parser.add_argument('--iterations', '-I', type=int, default=3)
+    parser.add_argument('--offload_retained', action='store_true')
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(args)
+        return
+
+    for offload_retained in [False, True]:
+        peak = run_child(args, offload_retained)
+        print('offload_retained=%s: peak=%.1fMB' %
+              (offload_retained, peak / 1000 / 1000))
+
+
+if __name__ == '__main__':
+    main()
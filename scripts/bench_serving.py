@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+#
+# Measures throughput and latency of dynamically batched inference by
+# `chainer_compiler.serving.BatchedServer` using ch2o test models.
+#
+# Usage:
+#
+# $ ./scripts/bench_serving.py --model mlp --clients 16
+#
+# Each client sends single-sample requests back to back. The baseline
+# runs every request by its own `fwd.run`. The batched server runs the
+# model compiled for powers of two up to --max_batch_size.
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import chainer
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+import chainer_compiler  # noqa
+from chainer_compiler import serving  # noqa
+from testcases.ch2o_tests.model import MLP_with_loss  # noqa
+from testcases.ch2o_tests.model import Resnet_with_loss  # noqa
+
+
+class MLP(MLP_with_loss.MLP):
+
+    def forward(self, x):
+        h1 = chainer.functions.relu(self.l1(x))
+        h2 = chainer.functions.relu(self.l2(h1))
+        return self.l3(h2)
+
+
+def get_model(name):
+    if name == 'mlp':
+        return MLP(100, 10), (784,)
+    elif name == 'resnet_block':
+        return Resnet_with_loss.Block(3, 64, 32, 64, stride=1), (64, 14, 14)
+    raise RuntimeError('Unknown model: %s' % name)
+
+
+def run_clients(infer, x, args):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        mine = []
+        for _ in range(args.requests):
+            start = time.time()
+            infer(x)
+            mine.append(time.time() - start)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+    return elapsed, sorted(latencies)
+
+
+def report(name, elapsed, latencies):
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    print('%s: %.1f req/s p50=%.2fmsec p99=%.2fmsec' %
+          (name, len(latencies) / elapsed,
+           percentile(0.5) * 1000, percentile(0.99) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of batched inference serving')
+    parser.add_argument('--model', default='mlp',
+                        choices=['mlp', 'resnet_block'])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100,
+                        help='The number of requests per client')
+    parser.add_argument('--max_batch_size', type=int, default=32)
+    parser.add_argument('--max_latency', type=float, default=0.005)
+    args = parser.parse_args()
+
+    np.random.seed(42)
+    model, shape = get_model(args.model)
+    x = np.random.rand(1, *shape).astype(np.float32)
+    batch_sizes = [b for b in [1, 2, 4, 8, 16, 32, 64, 128]
+                   if b < args.max_batch_size] + [args.max_batch_size]
+    with chainer.using_config('train', False), chainer.no_backprop_mode():
+        model(x)
+        compiled = chainer_compiler.compile(model, [x])
+        padded = serving.PaddedModel(model, [x], batch_sizes=batch_sizes)
+
+    # The baseline runs one request at a time as a naive server would do.
+    run_lock = threading.Lock()
+
+    def infer_unbatched(x):
+        with run_lock, chainer.no_backprop_mode():
+            return compiled.run_arrays([x])
+
+    infer_unbatched(x)
+    report('unbatched', *run_clients(infer_unbatched, x, args))
+
+    with serving.BatchedServer(padded,
+                               max_latency=args.max_latency) as server:
+        server.infer(x)
+        report('batched', *run_clients(server.infer, x, args))
+    print('Average batch size: %.1f' %
+          (server.num_requests / server.num_batches))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+#
+# Measures the startup time of utils/run_onnx_*.py backend runners
+# spent in loading test data of onnx_real tests.
+#
+# Usage:
+#
+# $ ./scripts/runtests.py onnx_real  # Download the tests.
+# $ ./scripts/bench_test_data_loading.py
+#
+# Parsing all tensors eagerly, as run_onnx_util did, is compared with
+# `run_onnx_util.load_test_data`, which memory-maps raw payloads. "startup" is the time until a runner gets the data
+# set and "touch" includes reading all values once.
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import onnx
+import onnx.numpy_helper
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, 'utils'))
+
+import run_onnx_util  # noqa
+
+
+def load_eagerly(data_dir, input_names, output_names):
+    inout_values = []
+    for kind, names in [('input', input_names), ('output', output_names)]:
+        names = list(names)
+        values = []
+        for pb in sorted(glob.glob(os.path.join(data_dir, '%s_*.pb' % kind))):
+            with open(pb, 'rb') as f:
+                tensor = onnx.TensorProto()
+                tensor.ParseFromString(f.read())
+            if tensor.name in names:
+                name = tensor.name
+                names.remove(name)
+            else:
+                name = names.pop(0)
+            values.append((name, onnx.numpy_helper.to_array(tensor)))
+        inout_values.append(values)
+    return tuple(inout_values)
+
+
+def touch(values):
+    for _, value in values:
+        value.sum()
+
+
+def measure(fn, iterations):
+    best_startup = best_total = None
+    for _ in range(iterations):
+        start = time.time()
+        inputs, outputs = fn()
+        startup = time.time() - start
+        touch(inputs)
+        touch(outputs)
+        total = time.time() - start
+        if best_startup is None or startup < best_startup:
+            best_startup = startup
+        if best_total is None or total < best_total:
+            best_total = total
+    return best_startup, best_total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of test data loading')
+    parser.add_argument('test_dirs', nargs='*',
+                        help='Test directories (default: out/onnx_real_*)')
+    parser.add_argument('--iterations', '-I', type=int, default=3)
+    args = parser.parse_args()
+
+    test_dirs = args.test_dirs or sorted(glob.glob('out/onnx_real_*'))
+    if not test_dirs:
+        print('No test found. Run `runtests.py onnx_real` first.')
+        sys.exit(1)
+
+    print('%-32s %20s %20s' % ('test', 'eager startup/touch',
+                               'lazy startup/touch'))
+    for test_dir in test_dirs:
+        onnx_filename = run_onnx_util.onnx_model_file(test_dir, None)
+        input_names, output_names = run_onnx_util.onnx_input_output_names(
+            onnx_filename)
+        data_dir = os.path.join(test_dir, 'test_data_set_0')
+
+        results = []
+        for loader in [load_eagerly, run_onnx_util.load_test_data]:
+            results.append(measure(
+                lambda: loader(data_dir, input_names, output_names),
+                args.iterations))
+
+        print('%-32s %8.1f/%8.1fmsec %8.1f/%8.1fmsec' % (
+            os.path.basename(test_dir),
+            results[0][0] * 1000, results[0][1] * 1000,
+            results[1][0] * 1000, results[1][1] * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+#
+# Runs ONNX tests with ChxVM (build/tools/run_onnx) and the backend
+# runners in utils/ and shows matrices of latency, throughput and memory
+# to decide which backend serves each model fastest.
+#
+# Usage:
+#
+# $ ./scripts/compare_backends.py out/onnx_real_resnet50 out/onnx_real_vgg19
+# $ ./scripts/compare_backends.py --backends chxvm,onnxruntime \
+#       --iterations 30 --json out/backends.json out/onnx_real_*
+#
+# Outputs are checked against the expected outputs of each test by the
+# runners. Backends whose Python modules are not installed are skipped,
+# and GPU-only backends (TVM and TensorRT) are run only with --gpu.
+
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Backend(object):
+    def __init__(self, name, modules, gpu_only=False):
+        self.name = name
+        self.modules = modules
+        self.gpu_only = gpu_only
+
+    def missing_modules(self, args):
+        return [m for m in self.modules
+                if importlib.util.find_spec(m) is None]
+
+    def command(self, args, test_dir, report_json):
+        runner = os.path.join(project_root, 'utils',
+                              'run_onnx_%s.py' % self.name)
+        cmd = [sys.executable, runner, test_dir,
+               '--iterations', str(args.iterations + 1),
+               '--warmup', str(args.warmup),
+               '--report_json', report_json]
+        if args.cpus:
+            cmd.extend(['--cpus', args.cpus])
+        return cmd
+
+
+class ChxVMBackend(Backend):
+    def __init__(self):
+        super(ChxVMBackend, self).__init__('chxvm', [])
+
+    def _run_onnx(self, args):
+        return os.path.join(args.build_dir, 'tools', 'run_onnx')
+
+    def missing_modules(self, args):
+        if os.path.exists(self._run_onnx(args)):
+            return []
+        return [self._run_onnx(args)]
+
+    def command(self, args, test_dir, report_json):
+        cmd = [self._run_onnx(args), '--test', test_dir,
+               # run_onnx checks values only for a single iteration.
+               '--iterations', '1',
+               '--report_json', report_json]
+        if args.cpus:
+            cmd = ['taskset', '-c', args.cpus] + cmd
+        return cmd
+
+    def benchmark_command(self, args, test_dir, report_json):
+        cmd = self.command(args, test_dir, report_json)
+        i = cmd.index('--iterations')
+        # The first iteration is excluded by --warmup 1 of run_onnx.
+        cmd[i + 1] = str(args.iterations + args.warmup + 1)
+        cmd.extend(['--warmup', str(args.warmup + 1)])
+        return cmd
+
+
+BACKENDS = [
+    ChxVMBackend(),
+    Backend('onnxruntime', ['onnxruntime']),
+    Backend('ngraph', ['ngraph', 'ngraph_onnx']),
+    Backend('dldt', ['openvino', 'mo']),
+    Backend('tf', ['tensorflow', 'onnx_tf']),
+    Backend('tvm', ['tvm', 'cupy'], gpu_only=True),
+    Backend('tensorrt', ['tensorrt', 'cupy'], gpu_only=True),
+]
+
+
+def run_with_rusage(cmd, log_filename, timeout):
+    """Runs `cmd` and returns its exit code, elapsed time and peak RSS.
+
+    The exit code is None if `cmd` timed out.
+    """
+    start = time.time()
+    with open(log_filename, 'wb') as log:
+        proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT,
+                                cwd=project_root)
+        timed_out = False
+        while True:
+            # Unlike `Popen.wait`, `wait4` tells the resource usage of
+            # this child only.
+            pid, status, rusage = os.wait4(
+                proc.pid, 0 if timeout is None else os.WNOHANG)
+            if pid:
+                break
+            if not timed_out and time.time() - start > timeout:
+                proc.kill()
+                timed_out = True
+            time.sleep(0.01)
+
+    if os.WIFEXITED(status):
+        proc.returncode = os.WEXITSTATUS(status)
+    else:
+        proc.returncode = -os.WTERMSIG(status)
+    code = None if timed_out else proc.returncode
+    # ru_maxrss is in KiB on Linux.
+    return code, time.time() - start, rusage.ru_maxrss * 1024
+
+
+def _load_report(report_json):
+    if not os.path.exists(report_json):
+        return None
+    with open(report_json) as f:
+        return json.load(f)
+
+
+def run_test(args, backend, test_dir, tmpdir):
+    result = {'backend': backend.name, 'test': test_dir}
+    log_filename = os.path.join(
+        tmpdir, '%s_%s.log' % (os.path.basename(test_dir), backend.name))
+    report_json = os.path.join(tmpdir, 'report.json')
+    result['log'] = log_filename
+
+    if isinstance(backend, ChxVMBackend):
+        # Check outputs first since run_onnx does not verify them when
+        # it is run repeatedly.
+        status, _, _ = run_with_rusage(
+            backend.command(args, test_dir, report_json), log_filename,
+            args.timeout)
+        if status != 0:
+            result['status'] = 'FAIL' if status is not None else 'TIMEOUT'
+            return result
+        cmd = backend.benchmark_command(args, test_dir, report_json)
+    else:
+        cmd = backend.command(args, test_dir, report_json)
+
+    if os.path.exists(report_json):
+        os.unlink(report_json)
+    status, elapsed, peak_rss = run_with_rusage(cmd, log_filename,
+                                                args.timeout)
+    if status is None:
+        result['status'] = 'TIMEOUT'
+        return result
+    if status != 0:
+        result['status'] = 'FAIL'
+        return result
+
+    report = _load_report(report_json)
+    if report is None or not report.get('stats'):
+        result['status'] = 'NO_REPORT'
+        return result
+    result['status'] = 'OK'
+    result['stats'] = report['stats']
+    result['p50'] = report['stats']['p50']
+    result['throughput'] = 1000.0 / result['p50'] if result['p50'] else None
+    result['peak_rss'] = peak_rss
+    result['wall_time'] = elapsed
+    return result
+
+
+def _format_cell(result, key):
+    if result is None:
+        return '-'
+    if result['status'] != 'OK':
+        return result['status']
+    value = result[key]
+    if key == 'p50':
+        return '%.2f' % value
+    if key == 'throughput':
+        return '%.1f' % value if value is not None else 'inf'
+    if key == 'peak_rss':
+        return '%.0fMB' % (value / 1000 / 1000)
+    raise RuntimeError('Unknown key: %s' % key)
+
+
+def print_matrix(title, key, test_dirs, backends, results, best):
+    print(title)
+    names = [os.path.basename(os.path.normpath(d)) for d in test_dirs]
+    name_width = max([len('test')] + [len(n) for n in names])
+    width = max([12] + [len(b.name) + 1 for b in backends])
+    print('%-*s' % (name_width, 'test') +
+          ''.join(' %*s' % (width, b.name) for b in backends))
+    for test_dir, name in zip(test_dirs, names):
+        row = '%-*s' % (name_width, name)
+        for backend in backends:
+            result = results.get((test_dir, backend.name))
+            cell = _format_cell(result, key)
+            if best.get(test_dir) == backend.name:
+                cell = '*' + cell
+            row += ' %*s' % (width, cell)
+        print(row)
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare ONNX backends on test directories')
+    parser.add_argument('test_dirs', nargs='+',
+                        help='ONNX test directories with test_data_set_0')
+    parser.add_argument('--backends', default=None,
+                        help='Comma separated backends to run (default: '
+                        'all available)')
+    parser.add_argument('--build_dir', '-b',
+                        default=os.path.join(project_root, 'build'),
+                        help='The build directory of run_onnx')
+    parser.add_argument('--gpu', action='store_true',
+                        help='Also run GPU-only backends')
+    parser.add_argument('--iterations', '-I', type=int, default=10,
+                        help='The number of timed iterations')
+    parser.add_argument('--warmup', type=int, default=1,
+                        help='The number of untimed iterations')
+    parser.add_argument('--cpus', default=None,
+                        help='Pin backends to CPUs such as "0-3"')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Timeout of each run in seconds')
+    parser.add_argument('--json', default=None,
+                        help='Dump all results in a JSON')
+    args = parser.parse_args()
+
+    backends = BACKENDS
+    if args.backends:
+        names = args.backends.split(',')
+        unknown = set(names) - set(b.name for b in BACKENDS)
+        if unknown:
+            parser.error('Unknown backends: %s' % ', '.join(sorted(unknown)))
+        backends = [b for b in BACKENDS if b.name in names]
+
+    available = []
+    for backend in backends:
+        if backend.gpu_only and not args.gpu:
+            print('Skipping %s: it requires GPU (use --gpu)' % backend.name)
+            continue
+        missing = backend.missing_modules(args)
+        if missing:
+            print('Skipping %s: %s not found' %
+                  (backend.name, ', '.join(missing)))
+            continue
+        available.append(backend)
+    if not available:
+        print('No backend is available')
+        sys.exit(1)
+
+    test_dirs = [os.path.abspath(d) for d in args.test_dirs]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for test_dir in test_dirs:
+            for backend in available:
+                sys.stdout.write('%s on %s... ' %
+                                 (os.path.basename(test_dir), backend.name))
+                sys.stdout.flush()
+                result = run_test(args, backend, test_dir, tmpdir)
+                if result['status'] == 'OK':
+                    print('%.2f msec' % result['p50'])
+                else:
+                    with open(result['log'], 'rb') as f:
+                        log = f.read().decode('utf-8', 'replace')
+                    print('%s\n%s' % (result['status'], log[-2000:]))
+                del result['log']
+                results[(test_dir, backend.name)] = result
+    print()
+
+    best = {}
+    for test_dir in test_dirs:
+        oks = [r for r in (results.get((test_dir, b.name))
+                           for b in available)
+               if r is not None and r['status'] == 'OK']
+        if oks:
+            best[test_dir] = min(oks, key=lambda r: r['p50'])['backend']
+
+    print_matrix('Latency (p50 msec, * is the fastest)', 'p50',
+                 test_dirs, available, results, best)
+    print_matrix('Throughput (runs/sec)', 'throughput',
+                 test_dirs, available, results, best)
+    print_matrix('Peak RSS', 'peak_rss', test_dirs, available, results, {})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'results': list(results.values()), 'best': best}, f,
+                      indent=2)
+
+
+if __name__ == '__main__':
+    main()
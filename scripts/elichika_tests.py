@@ -6,9 +6,11 @@
 import importlib
 import glob
 import os
+import shutil
 import subprocess
 import sys
 
+import incremental_gen
 from test_case import TestCase
 
 
@@ -141,18 +143,67 @@ def get_source_dir():
     return os.path.dirname(os.path.dirname(sys.argv[0]))
 
 
-def generate_tests(dirname):
+def _out_dir(gen):
+    return os.path.join(get_source_dir(), 'out', 'elichika_%s_%s' %
+                        (gen.category, gen.filename))
+
+
+def _output_dirs(gen):
+    """Returns directories generated by `gen`.
+
+    Directories of another generator whose name starts with the name of
+    `gen` (e.g., For and ForAndIf) are excluded.
+    """
+    out_dir = _out_dir(gen)
+    others = [_out_dir(g) for g in TESTS
+              if _out_dir(g) != out_dir and _out_dir(g).startswith(out_dir)]
+    dirs = []
+    for d in [out_dir] + sorted(glob.glob(out_dir + '_*')):
+        if not os.path.isdir(d):
+            continue
+        if any(d == o or d.startswith(o + '_') for o in others):
+            continue
+        dirs.append(d)
+    return dirs
+
+
+def _generate(gen):
     from chainer_compiler.elichika.testtools import testcasegen
 
+    py = os.path.join('testcases', 'elichika_tests',
+                      gen.dirname, gen.filename)
+    print('Running %s' % py)
+    module = importlib.import_module(py.replace('/', '.'))
+    testcasegen.reset_test_generator([_out_dir(gen)],
+                                     clean_output_dirs=False)
+    module.main()
+
+
+def generate_tests(dirname):
+    source_dir = get_source_dir()
+    package_dir = os.path.join(source_dir, 'chainer_compiler')
+    front_end = [os.path.join(package_dir, 'elichika'),
+                 os.path.join(package_dir, 'external_data.py'),
+                 os.path.join(package_dir, 'source_cache.py')]
+    versions = incremental_gen.module_versions('chainer', 'numpy', 'onnx')
+
+    tasks = []
     for gen in get_test_generators(dirname):
-        py = os.path.join('testcases', 'elichika_tests',
-                          gen.dirname, gen.filename)
-        out_dir = os.path.join(get_source_dir(), 'out', 'elichika_%s_%s' %
-                               (gen.category, gen.filename))
-        print('Running %s' % py)
-        module = importlib.import_module(py.replace('/', '.'))
-        testcasegen.reset_test_generator([out_dir])
-        module.main()
+        py = os.path.join(source_dir, 'testcases', 'elichika_tests',
+                          gen.dirname, gen.filename + '.py')
+        tasks.append(incremental_gen.Task(
+            'elichika_%s_%s' % (gen.category, gen.filename),
+            lambda gen=gen: _generate(gen),
+            incremental_gen.fingerprint([py] + front_end, versions),
+            lambda gen=gen: _output_dirs(gen)))
+
+    stamp_dir = os.path.join(source_dir, 'out', '.gen_stamps')
+    # Remove outputs of stale generators here rather than in workers,
+    # which would race with other generators sharing the prefix.
+    for task in incremental_gen.stale_tasks(tasks, stamp_dir):
+        for d in task.output_dirs():
+            shutil.rmtree(d)
+    incremental_gen.run(tasks, stamp_dir=stamp_dir)
 
 
 def get():
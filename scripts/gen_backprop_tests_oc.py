@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 
+import os
 import shutil
 
 import chainer
 import numpy as np
 import onnx_chainer
 
+import incremental_gen
 from test_case import TestCase
 
 
@@ -284,8 +286,15 @@ def get_backprop_tests():
 
 
 def main():
+    fingerprint = incremental_gen.fingerprint(
+        [os.path.abspath(__file__),
+         os.path.dirname(onnx_chainer.__file__)],
+        incremental_gen.module_versions('chainer', 'numpy', 'onnx'))
+    tasks = []
     for test in get_backprop_tests():
-        test.generate()
+        tasks.append(incremental_gen.Task(
+            test.name, test.generate, fingerprint, [test.test_dir]))
+    incremental_gen.run(tasks)
 
 
 if __name__ == '__main__':
@@ -7,6 +7,7 @@ import chainer
 import numpy as np
 import onnx
 
+import incremental_gen
 from test_case import TestCase
 
 
@@ -328,10 +329,21 @@ def _get_backprop_tests(dtype):
     return tests
 
 
+def _generate(test):
+    np.random.seed(42)
+    test.generate()
+
+
 def main():
+    fingerprint = incremental_gen.fingerprint(
+        [os.path.abspath(__file__), os.path.dirname(ch2o.__file__)],
+        incremental_gen.module_versions('chainer', 'numpy', 'onnx'))
+    tasks = []
     for test in get_backprop_tests():
-        np.random.seed(42)
-        test.generate()
+        tasks.append(incremental_gen.Task(
+            test.name, lambda test=test: _generate(test), fingerprint,
+            [test.test_dir]))
+    incremental_gen.run(tasks)
 
 
 if __name__ == '__main__':
@@ -10,6 +10,7 @@ import numpy as np
 import onnx
 import onnx_chainer
 
+import incremental_gen
 import test_case
 
 _has_chnainercv = True
@@ -52,8 +53,17 @@ def get_tests():
 
 
 def main():
+    fingerprint = incremental_gen.fingerprint(
+        [os.path.abspath(__file__),
+         os.path.dirname(onnx_chainer.__file__)],
+        incremental_gen.module_versions('chainer', 'chainercv', 'numpy',
+                                        'onnx'))
+    tasks = []
     for test in get_tests():
-        test.func(test.name)
+        tasks.append(incremental_gen.Task(
+            test.name, lambda test=test: test.func(test.name),
+            fingerprint, [test.test_dir]))
+    incremental_gen.run(tasks)
 
 
 if __name__ == '__main__':
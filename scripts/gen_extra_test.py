@@ -1,12 +1,15 @@
 """Yet another ONNX test generator for custom ops and new ops."""
 
 
+import os
+
 import chainer
 import chainer.functions as F
 import chainer.links as L
 import numpy as np
 import onnx
 
+import incremental_gen
 import onnx_script
 import test_case
 
@@ -1330,8 +1333,19 @@ def get_tests():
 
 
 def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    fingerprint = incremental_gen.fingerprint(
+        [os.path.join(script_dir, f) for f in [
+            'gen_extra_test.py', 'onnx_script.py', 'sentiment.py',
+            'gen_chainercv_op_tests.py', 'chainercv_rpn.py']],
+        incremental_gen.module_versions('chainer', 'chainercv', 'numpy',
+                                        'onnx'))
+    tasks = []
     for test in get_tests():
-        test.func(test.name)
+        tasks.append(incremental_gen.Task(
+            test.name, lambda test=test: test.func(test.name),
+            fingerprint, [test.test_dir]))
+    incremental_gen.run(tasks)
 
 
 if __name__ == '__main__':
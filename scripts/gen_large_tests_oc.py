@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 
+import os
 import shutil
+import sys
 
 import chainer
 import numpy as np
+import onnx
 import onnx_chainer
 
+import incremental_gen
 import large_models
 
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from chainer_compiler import external_data  # noqa
+
 
 def create_test(test_name, get_fun, dtype):
     np.random.seed(314)
@@ -30,6 +39,11 @@ def create_test(test_name, get_fun, dtype):
                                  train=True,
                                  output_names='loss')
 
+    # Move weights out of the model so it can be memory-mapped by
+    # run_onnx and stays below the 2GB limit of protobuf.
+    model_path = os.path.join(test_dir, 'model.onnx')
+    external_data.save_model(onnx.load(model_path), model_path)
+
 
 def get_large_tests():
     tests = []
@@ -57,8 +71,24 @@ def get_large_tests():
 
 
 def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    fingerprint = incremental_gen.fingerprint(
+        [os.path.join(script_dir, 'gen_large_tests_oc.py'),
+         os.path.join(script_dir, 'large_models.py'),
+         os.path.dirname(onnx_chainer.__file__),
+         external_data.__file__],
+        incremental_gen.module_versions('chainer', 'numpy', 'onnx') +
+        # Expected values are computed on GPU if available.
+        ['cuda=%s' % chainer.cuda.available])
+    tasks = []
     for test_name, get_fun, dtype, _ in get_large_tests():
-        create_test(test_name, get_fun, dtype)
+        tasks.append(incremental_gen.Task(
+            test_name,
+            lambda args=(test_name, get_fun, dtype): create_test(*args),
+            fingerprint, [os.path.join('out', test_name)]))
+    # CUDA cannot be used in forked processes and a single model fills
+    # the GPU anyway.
+    incremental_gen.run(tasks, jobs=1)
 
 
 if __name__ == '__main__':
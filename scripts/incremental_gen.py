@@ -0,0 +1,157 @@
+"""Incremental generation of ONNX tests.
+
+Each test generator is fingerprinted by the sources it depends on (the
+test module and the compiler front end, typically) and the versions of
+libraries producing expected values. A generator whose fingerprint and
+outputs are the same as the last successful run is skipped, and the
+rest run in a process pool.
+
+The number of processes is $CHAINER_COMPILER_GEN_JOBS (the number of
+CPUs by default), and $CHAINER_COMPILER_GEN_FORCE=1 regenerates all.
+"""
+
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+
+
+def _source_files(path):
+    """Returns (name, filename) of Python sources in `path`."""
+    if not os.path.isdir(path):
+        return [(os.path.basename(path), path)]
+    sources = []
+    for dirpath, dirnames, files in os.walk(path):
+        dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+        for f in sorted(files):
+            if f.endswith('.py'):
+                filename = os.path.join(dirpath, f)
+                sources.append((os.path.relpath(filename, path), filename))
+    return sources
+
+
+def fingerprint(paths, extra=()):
+    """Returns a hash of Python sources in `paths` and `extra` strings.
+
+    Directories in `paths` are scanned recursively. Contents are hashed
+    instead of modification times so checkouts do not invalidate tests.
+    """
+    h = hashlib.sha256()
+    for path in paths:
+        for name, filename in _source_files(path):
+            with open(filename, 'rb') as f:
+                content = f.read()
+            h.update(name.encode() + b'\0')
+            h.update(hashlib.sha256(content).digest())
+    for e in extra:
+        h.update(str(e).encode() + b'\0')
+    return h.hexdigest()
+
+
+def module_versions(*names):
+    """Returns "name=version" of modules for `fingerprint`."""
+    versions = []
+    for name in names:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            versions.append('%s=None' % name)
+            continue
+        versions.append('%s=%s' % (name, getattr(module, '__version__', '')))
+    return versions
+
+
+class Task(object):
+    """A generator of tests.
+
+    `generate` is called without arguments. `outputs` is a list of test
+    directories or a function which returns them after `generate`.
+    """
+
+    def __init__(self, name, generate, fingerprint, outputs):
+        self.name = name
+        self.generate = generate
+        self.fingerprint = fingerprint
+        self.outputs = outputs
+
+    def output_dirs(self):
+        if callable(self.outputs):
+            return self.outputs()
+        return list(self.outputs)
+
+
+def _stamp_filename(stamp_dir, task):
+    return os.path.join(stamp_dir, task.name.replace('/', '_') + '.json')
+
+
+def is_fresh(task, stamp_dir):
+    try:
+        with open(_stamp_filename(stamp_dir, task)) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if stamp.get('fingerprint') != task.fingerprint:
+        return False
+    outputs = stamp.get('outputs')
+    return bool(outputs) and all(os.path.isdir(d) for d in outputs)
+
+
+def _record(task, stamp_dir):
+    os.makedirs(stamp_dir, exist_ok=True)
+    filename = _stamp_filename(stamp_dir, task)
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'w') as f:
+        json.dump({'fingerprint': task.fingerprint,
+                   'outputs': task.output_dirs()}, f)
+    os.replace(tmp_filename, filename)
+
+
+# Tasks run by workers. They are inherited by forked workers since
+# generators are usually closures, which cannot be pickled.
+_tasks = None
+
+
+def _run_task(index):
+    _tasks[index].generate()
+    return index
+
+
+def stale_tasks(tasks, stamp_dir):
+    if os.environ.get('CHAINER_COMPILER_GEN_FORCE') == '1':
+        return list(tasks)
+    return [task for task in tasks if not is_fresh(task, stamp_dir)]
+
+
+def run(tasks, stamp_dir='out/.gen_stamps', jobs=None):
+    """Runs `tasks` which are not fresh and returns them.
+
+    A stamp of each task is recorded as soon as it succeeds, so only
+    failed and remaining tasks run again after an error.
+    """
+    global _tasks
+    stale = stale_tasks(tasks, stamp_dir)
+    if len(stale) < len(tasks):
+        print('Skipping %d up-to-date test generators' %
+              (len(tasks) - len(stale)))
+
+    if jobs is None:
+        jobs = int(os.environ.get('CHAINER_COMPILER_GEN_JOBS',
+                                  os.cpu_count() or 1))
+    jobs = min(jobs, len(stale))
+
+    _tasks = stale
+    try:
+        if jobs <= 1:
+            for index in range(len(stale)):
+                _run_task(index)
+                _record(stale[index], stamp_dir)
+        else:
+            context = multiprocessing.get_context('fork')
+            with context.Pool(jobs) as pool:
+                for index in pool.imap_unordered(_run_task,
+                                                 range(len(stale))):
+                    _record(stale[index], stamp_dir)
+    finally:
+        _tasks = None
+    return stale
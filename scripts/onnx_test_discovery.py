@@ -0,0 +1,95 @@
+"""Finds ONNX tests in backend test data trees with a cache.
+
+A test is a directory with model.onnx two levels below the root of a
+tree, like node/test_add in the backend test data of ONNX. Finding them
+stats every test directory, so the tests of each category directory
+are cached in a JSON file with the modification time of the category,
+which changes when tests are added or removed. Categories are scanned
+by a thread pool since the scan is dominated by file system latency.
+"""
+
+import concurrent.futures
+import json
+import os
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _scan_category(category_dir):
+    tests = []
+    with os.scandir(category_dir) as it:
+        for entry in it:
+            if (entry.is_dir() and not entry.name.startswith('.') and
+                    os.path.exists(os.path.join(entry.path, 'model.onnx'))):
+                tests.append(entry.name)
+    return sorted(tests)
+
+
+class DiscoveryCache(object):
+
+    def __init__(self, filename):
+        self.filename = filename
+        # Category directories to [mtime, test names].
+        self.categories = {}
+        if filename is not None and os.path.exists(filename):
+            try:
+                with open(filename) as f:
+                    self.categories = json.load(f)['categories']
+            except (ValueError, KeyError):
+                # A broken cache is the same as no cache.
+                pass
+        self.modified = False
+
+    def save(self):
+        if self.filename is None or not self.modified:
+            return
+        dirname = os.path.dirname(self.filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'w') as f:
+            json.dump({'categories': self.categories}, f)
+        os.replace(tmp_filename, self.filename)
+
+    def _category_dirs(self, tests_dir):
+        if not os.path.isdir(tests_dir):
+            return []
+        with os.scandir(tests_dir) as it:
+            return sorted(e.path for e in it
+                          if e.is_dir() and not e.name.startswith('.'))
+
+    def find_tests(self, tests_dirs, max_workers=None):
+        """Returns sorted test directories in each of `tests_dirs`."""
+        category_dirs = [self._category_dirs(d) for d in tests_dirs]
+
+        stale = []
+        mtimes = {}
+        for category_dir in sum(category_dirs, []):
+            mtime = _mtime(category_dir)
+            mtimes[category_dir] = mtime
+            cached = self.categories.get(category_dir)
+            if cached is None or cached[0] != mtime:
+                stale.append(category_dir)
+
+        if stale:
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max_workers) as executor:
+                scanned = executor.map(_scan_category, stale)
+                for category_dir, tests in zip(stale, scanned):
+                    self.categories[category_dir] = [
+                        mtimes[category_dir], tests]
+            self.modified = True
+
+        results = []
+        for dirs in category_dirs:
+            tests = []
+            for category_dir in dirs:
+                names = self.categories[category_dir][1]
+                tests.extend(os.path.join(category_dir, n) for n in names)
+            results.append(sorted(tests))
+        return results
@@ -2,26 +2,25 @@
 
 import argparse
 import copy
-import glob
+import heapq
+import itertools
+import json
 import multiprocessing
 import os
+import queue
 import re
 import sys
 import subprocess
+import threading
+import time
 
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
-import ch2o_tests
-import elichika_tests
-import gen_backprop_tests_oc
-import gen_backprop_tests_pc
-import gen_chainercv_model_tests
-import gen_extra_test
-import gen_large_tests_oc
-import onnx_chainer_tests
-import onnx_real_tests
+import onnx_test_discovery
 from test_case import TestCase
+from test_result_cache import TestResultCache
+import timing_db
 
 
 parser = argparse.ArgumentParser(description='Run tests for chainer_compiler')
@@ -48,6 +47,19 @@ parser.add_argument('--failed', action='store_true',
                     help='Run tests which failed last time')
 parser.add_argument('--failure_log', default='out/failed_tests.log',
                     help='The file where names of failed tests are stored')
+parser.add_argument('--result_cache', default='out/test_results.json',
+                    help='The file where results of tests are stored')
+parser.add_argument('--no_result_cache', action='store_true',
+                    help='Run tests even if they passed with the same inputs')
+parser.add_argument('--discovery_cache',
+                    default='out/onnx_test_discovery.json',
+                    help='The file where ONNX tests found by --all are cached')
+parser.add_argument('--timing_db', default=timing_db.DEFAULT_DB,
+                    help='The file where performance of tests is stored')
+parser.add_argument('--run_name', default=None,
+                    help='The name of this run in the timing database')
+parser.add_argument('--iterations', '-I', type=int, default=None,
+                    help='Run each test multiple times to measure performance')
 parser.add_argument('--fuse', action='store_true', help='Enable fusion')
 parser.add_argument('--ngraph', action='store_true', help='Enable nGraph')
 parser.add_argument('--snpe', action='store_true', help='Enable SNPE')
@@ -730,89 +742,111 @@ opsets_blacklist = {
     ]),
 }
 
-if args.all:
-    def extend_all_onnx_test_data(opset_version=None):
-        tests_dir = ONNX_TEST_DATA
-        if opset_version is not None:
-            tests_dir = tests_dir.replace(
-                'third_party/onnx/',
-                'third_party/onnx-{}/'.format(opset_version))
-        models = glob.glob(os.path.join(tests_dir, '*/*/model.onnx'))
-        for onnx in sorted(models):
-            path = os.path.dirname(onnx)
-            if path not in TEST_PATHS:
-                case = TestCase(os.path.dirname(path), os.path.basename(path),
-                                fail=True)
-                TEST_CASES.append(case)
+discovery_cache = onnx_test_discovery.DiscoveryCache(args.discovery_cache)
+
+
+def _opset_test_dir(test_dir, opset_version):
+    return test_dir.replace('third_party/onnx/',
+                            'third_party/onnx-{}/'.format(opset_version))
+
 
-    extend_all_onnx_test_data()
+def all_onnx_test_data():
+    """Yields ONNX backend tests which are not listed in TEST_CASES."""
+    tests_dirs = [ONNX_TEST_DATA]
     for opset in target_opsets:
-        extend_all_onnx_test_data(opset)
-elif len(target_opsets) > 0:
+        tests_dirs.append(_opset_test_dir(ONNX_TEST_DATA, opset))
+    found = discovery_cache.find_tests(tests_dirs)
+    discovery_cache.save()
+    for paths in found:
+        for path in paths:
+            if path not in TEST_PATHS:
+                yield TestCase(os.path.dirname(path), os.path.basename(path),
+                               fail=True)
+
+
+def opset_variants(test_cases):
     print('Finding opset variants: {}'.format(target_opsets))
-    new_tcs = []
     skip_tcs = {}
     for opset in target_opsets:
-        for tc in TEST_CASES:
+        for tc in test_cases:
             if opset in opsets_blacklist and tc.name in opsets_blacklist[opset]:
                 continue
 
-            var_test_dir = tc.test_dir.replace(
-                'third_party/onnx/',
-                'third_party/onnx-{}/'.format(opset))
+            var_test_dir = _opset_test_dir(tc.test_dir, opset)
             if os.path.isdir(var_test_dir) is False:
                 if tc.name not in skip_tcs:
                     skip_tcs[tc.name] = []
                 skip_tcs[tc.name].append(opset)
                 continue
-            new_tcs.append(TestCase(
+            yield TestCase(
                 name=tc.name, test_dir=var_test_dir,
                 rtol=tc.rtol, atol=tc.atol, equal_nan=tc.equal_nan,
-                fail=tc.fail, opset_version=opset))
+                fail=tc.fail, opset_version=opset)
 
     for tc_name, opsets in skip_tcs.items():
         print('Skipping {} for opsets: {}'.format(tc_name, opsets))
-    TEST_CASES.extend(new_tcs)
 
-num_official_onnx_tests = len(TEST_CASES)
 
-for backprop_test in gen_backprop_tests_oc.get_backprop_tests():
-    assert os.path.exists(backprop_test.test_dir)
-    TEST_CASES.append(backprop_test)
+def official_onnx_tests():
+    yield from TEST_CASES
+    if args.all:
+        yield from all_onnx_test_data()
+    elif len(target_opsets) > 0:
+        yield from opset_variants(TEST_CASES)
+
 
-for backprop_test in gen_backprop_tests_pc.get_backprop_tests():
-    assert os.path.exists(backprop_test.test_dir)
-    TEST_CASES.append(backprop_test)
+def generated_tests():
+    # Generators import Chainer and build models, which takes a while,
+    # so they are imported after the official ONNX tests are found.
+    import ch2o_tests
+    import elichika_tests
+    import gen_backprop_tests_oc
+    import gen_backprop_tests_pc
+    import gen_chainercv_model_tests
+    import gen_extra_test
+    import gen_large_tests_oc
+    import onnx_chainer_tests
+    import onnx_real_tests
 
-for test in gen_extra_test.get_tests():
-    assert os.path.exists(test.test_dir), test.test_dir
-    TEST_CASES.append(test)
+    for backprop_test in gen_backprop_tests_oc.get_backprop_tests():
+        assert os.path.exists(backprop_test.test_dir)
+        yield backprop_test
 
-for name, _, _, kwargs in gen_large_tests_oc.get_large_tests():
-    dirname = 'out'
-    TEST_CASES.append(TestCase(dirname, name, want_gpu=True, **kwargs))
+    for backprop_test in gen_backprop_tests_pc.get_backprop_tests():
+        assert os.path.exists(backprop_test.test_dir)
+        yield backprop_test
 
-TEST_CASES.append(TestCase('out', 'backprop_test_mnist_mlp'))
+    for test in gen_extra_test.get_tests():
+        assert os.path.exists(test.test_dir), test.test_dir
+        yield test
 
-TEST_CASES.append(TestCase('data', 'shufflenet', want_gpu=True))
-TEST_CASES.append(TestCase('data', 'squeezenet1.1', want_gpu=True))
-TEST_CASES.append(TestCase('data', 'mobilenetv2-1.0', want_gpu=True, rtol=1e-2))
-TEST_CASES.append(TestCase('data', 'mnist'))
+    for name, _, _, kwargs in gen_large_tests_oc.get_large_tests():
+        dirname = 'out'
+        yield TestCase(dirname, name, want_gpu=True, **kwargs)
 
-TEST_CASES.extend(ch2o_tests.get())
+    yield TestCase('out', 'backprop_test_mnist_mlp')
 
-TEST_CASES.extend(elichika_tests.get())
+    yield TestCase('data', 'shufflenet', want_gpu=True)
+    yield TestCase('data', 'squeezenet1.1', want_gpu=True)
+    yield TestCase('data', 'mobilenetv2-1.0', want_gpu=True, rtol=1e-2)
+    yield TestCase('data', 'mnist')
 
-TEST_CASES.extend(onnx_chainer_tests.get(target_opsets))
+    yield from ch2o_tests.get()
 
-TEST_CASES.extend(onnx_real_tests.get())
+    yield from elichika_tests.get()
 
-TEST_CASES.extend(gen_chainercv_model_tests.get_tests())
+    yield from onnx_chainer_tests.get(target_opsets)
 
-new_tests = []
-for test in TEST_CASES:
+    yield from onnx_real_tests.get()
+
+    yield from gen_chainercv_model_tests.get_tests()
+
+
+def test_variants(test):
+    """Returns tests derived from `test`, e.g., two-phase backprop."""
+    new_tests = []
     if not test.is_backprop:
-        continue
+        return new_tests
 
     # TODO(mkusumoto): remove this "if" after fixing issue
     if not test.name.startswith('large_oc'):
@@ -823,14 +857,14 @@ for test in TEST_CASES:
 
     # TODO(hamaji): Temporarily disabled due to shape inference change in ONNX.
     if test.name.startswith('backprop_test_oc_split_2'):
-        continue
+        return new_tests
 
     # TODO(hamaji): Unexpected shape will appear due to broadcast.
     if test.name.startswith('backprop_test_oc_pow_const'):
-        continue
+        return new_tests
 
     if test.fixed_batch_norm:
-        continue
+        return new_tests
 
     # computation_order is supported in limited test cases
     if test.name.startswith('backprop_test_oc'):
@@ -888,36 +922,38 @@ for test in TEST_CASES:
         new_test.want_gpu = True
         new_tests.append(new_test)
 
-for test in new_tests:
-    TEST_CASES.append(test)
-
-
-if args.ngraph:
-    # TODO(hamaji): Triage these failures.
-    ngraph_blacklist = [
-        'extra_test_loop_scan_out',
-        'extra_backprop_test_need_stack_loop',
-        'ch2o_node_Linear_backprop',
-        'ch2o_node_Linear_backprop_diversed',
-        'backprop_test_oc_mul_same_float32_two_phase',
-        'backprop_test_oc_mul_same_float64_two_phase',
-        'backprop_test_oc_sigmoid_float64_two_phase',
-        'extra_backprop_test_need_stack_loop_two_phase',
-        'test_gemm_default_no_bias',
-    ]
-    for test in TEST_CASES:
-        if test.name in ngraph_blacklist:
-            test.fail = True
-        if '_float16' in test.name:
-            # TODO(hamaji): Skip float16 tests since nGraph
-            # automatically promote float16 to float32.
-            test.fail = True
-        if test.name.endswith('_sigmoid_float64'):
-            # TODO(hamaji): nGraph seems not to support fp64 sigmoid.
-            test.fail = True
-        if re.search(r'grouped_conv_.*float64', test.name):
-            test.fail = True
+    return new_tests
+
+
+# TODO(hamaji): Triage these failures.
+ngraph_blacklist = [
+    'extra_test_loop_scan_out',
+    'extra_backprop_test_need_stack_loop',
+    'ch2o_node_Linear_backprop',
+    'ch2o_node_Linear_backprop_diversed',
+    'backprop_test_oc_mul_same_float32_two_phase',
+    'backprop_test_oc_mul_same_float64_two_phase',
+    'backprop_test_oc_sigmoid_float64_two_phase',
+    'extra_backprop_test_need_stack_loop_two_phase',
+    'test_gemm_default_no_bias',
+]
+
 
+def mark_ngraph_failures(test):
+    if test.name in ngraph_blacklist:
+        test.fail = True
+    if '_float16' in test.name:
+        # TODO(hamaji): Skip float16 tests since nGraph
+        # automatically promote float16 to float32.
+        test.fail = True
+    if test.name.endswith('_sigmoid_float64'):
+        # TODO(hamaji): nGraph seems not to support fp64 sigmoid.
+        test.fail = True
+    if re.search(r'grouped_conv_.*float64', test.name):
+        test.fail = True
+
+
+failed_test_names = None
 if args.failed:
     if not os.path.exists(args.failure_log):
         raise RuntimeError('No failure log in %s' % args.failure_log)
@@ -928,15 +964,36 @@ if args.failed:
                 matched = re.match(r'=== (\S+) ===', line.decode())
                 if matched:
                     failed_test_names.add(matched.group(1))
-    TEST_CASES = [case for case in TEST_CASES
-                  if case.name in failed_test_names]
 
+test_filter = None
 if args.test_filter is not None:
-    reg = re.compile(args.test_filter)
-    TEST_CASES = [case for case in TEST_CASES if reg.search(case.name)]
+    test_filter = re.compile(args.test_filter)
+
+
+def is_selected(test):
+    if failed_test_names is not None and test.name not in failed_test_names:
+        return False
+    if test_filter is not None and not test_filter.search(test.name):
+        return False
+    return args.all or not test.fail
+
+
+num_official_onnx_tests = 0
+
 
-if not args.all:
-    TEST_CASES = [case for case in TEST_CASES if not case.fail]
+def discover_test_cases():
+    """Yields test cases to be run as soon as they are found."""
+    global num_official_onnx_tests
+    for tests, official in [(official_onnx_tests(), True),
+                            (generated_tests(), False)]:
+        for test in tests:
+            if official:
+                num_official_onnx_tests += 1
+            for t in [test] + test_variants(test):
+                if args.ngraph:
+                    mark_ngraph_failures(t)
+                if is_selected(t):
+                    yield t
 
 
 def _start_output(msg):
@@ -948,34 +1005,106 @@ def _start_output(msg):
         sys.stdout.write(msg)
 
 
+def _queue_of(test_cases):
+    test_queue = queue.Queue()
+    for test_case in test_cases:
+        test_queue.put(test_case)
+    test_queue.put(None)
+    return test_queue
+
+
 class TestRunner(object):
-    def __init__(self, test_cases, show_log):
-        self.test_cases = test_cases
+    """Runs tests taken from a queue which is terminated by None.
+
+    Tests can be put into the queue while others are running.
+    """
+
+    def __init__(self, test_queue, show_log, result_cache):
+        self.test_queue = test_queue
+        self.discovery_done = False
+        self.pending = []
+        self.pending_count = itertools.count()
         self.tested = []
         self.failed = []
+        self.cached = []
         self.show_log = show_log
+        self.result_cache = result_cache
+        self.timing_records = []
+
+    def _push(self, test_case):
+        # Longest job first. Tests which have never run are started
+        # first as their elapsed times are unknown.
+        elapsed = self.result_cache.elapsed(test_case)
+        priority = float('inf') if elapsed is None else elapsed
+        heapq.heappush(self.pending,
+                       (-priority, next(self.pending_count), test_case))
+
+    def _take_discovered(self, block, timeout=None):
+        while not self.discovery_done:
+            try:
+                test_case = self.test_queue.get(block=block, timeout=timeout)
+            except queue.Empty:
+                return
+            block = False
+            if test_case is None:
+                self.discovery_done = True
+            else:
+                self._push(test_case)
+
+    def _is_cached(self, test_case):
+        test_case.result_key = self.result_cache.compute_key(test_case)
+        # Tests always run when their performance is measured.
+        return (not args.no_result_cache and not args.iterations and
+                not test_case.fail and
+                self.result_cache.is_passed(test_case, test_case.result_key))
 
     def run(self, num_parallel_jobs):
-        tests = list(reversed(self.test_cases))
         procs = {}
-        while tests or procs:
-            if tests and len(procs) < num_parallel_jobs:
-                test_case = tests.pop()
+        while True:
+            self._take_discovered(block=not procs and not self.pending)
+            if self.pending and len(procs) < num_parallel_jobs:
+                test_case = heapq.heappop(self.pending)[2]
+                test_case.prepare()
+                if self._is_cached(test_case):
+                    self.cached.append(test_case)
+                    continue
                 if num_parallel_jobs == 1:
                     _start_output('%s... ' % test_case.name)
                 log_file = open(test_case.log_filename, 'wb')
+                if (test_case.report_json is not None and
+                        os.path.exists(test_case.report_json)):
+                    os.unlink(test_case.report_json)
                 proc = subprocess.Popen(test_case.args,
                                         stdout=subprocess.PIPE,
                                         stderr=log_file)
-                procs[proc.pid] = (test_case, proc, log_file)
+                procs[proc.pid] = (test_case, proc, log_file, time.time())
+                continue
+
+            if not procs:
+                if self.discovery_done and not self.pending:
+                    break
                 continue
 
-            assert procs
-            pid, status = os.wait()
+            if self.discovery_done or len(procs) >= num_parallel_jobs:
+                pid, status = os.wait()
+            else:
+                # Keep taking new tests while children are running.
+                pid, status = os.waitpid(-1, os.WNOHANG)
+                if not pid:
+                    self._take_discovered(block=True, timeout=0.05)
+                    continue
             assert pid in procs
-            test_case, proc, log_file = procs[pid]
+            test_case, proc, log_file, start_time = procs[pid]
             del procs[pid]
             log_file.close()
+            self.result_cache.record(test_case, test_case.result_key,
+                                     status == 0, time.time() - start_time)
+            if (test_case.report_json is not None and
+                    os.path.exists(test_case.report_json)):
+                with open(test_case.report_json) as f:
+                    report = json.load(f)
+                self.timing_records.append(timing_db.make_record(
+                    args.run_name, test_case.name, test_case.args, report))
 
             if num_parallel_jobs != 1:
                 _start_output('%s... ' % test_case.name)
@@ -1002,6 +1131,115 @@ class TestRunner(object):
         sys.stdout.write('\n')
 
 
+def configure_test_case(test_case, run_onnx, run_onnx_menoh):
+    """Sets the command line of `test_case`.
+
+    Returns whether the test runs on GPU, or None if it should not run.
+    """
+    runner = run_onnx_menoh
+    if (test_case.is_backprop or
+        test_case.is_backprop_two_phase or
+        test_case.equal_nan or
+        test_case.skip_shape_inference or
+        test_case.skip_runtime_type_check or
+        test_case.want_gpu or
+        test_case.computation_order or
+        not test_case.test_dir.startswith(NODE_TEST)):
+        runner = run_onnx
+
+    if len(target_opsets) != 0:
+        if args.only_opset_targetable and test_case.opset_version is None:
+            return None
+        if test_case.opset_version is not None and not (test_case.opset_version in target_opsets):
+            return None
+
+    test_case.runner = run_onnx
+    test_case.args = [runner, '--test', test_case.test_dir]
+    test_case.args.append('--compiler_log')
+    is_gpu = False
+    if test_case.rtol is not None:
+        test_case.args += ['--rtol', str(test_case.rtol)]
+    if test_case.atol is not None:
+        test_case.args += ['--atol', str(test_case.atol)]
+    if test_case.equal_nan:
+        test_case.args += ['--equal_nan']
+    if test_case.skip_shape_inference:
+        test_case.args.append('--skip_inference')
+    if test_case.skip_runtime_type_check:
+        test_case.args.append('--skip_runtime_type_check')
+    if test_case.fixed_batch_norm:
+        test_case.args.append('--fixed_batch_norm')
+    if test_case.is_backprop_two_phase:
+        test_case.args.append('--backprop_two_phase')
+    elif test_case.is_backprop:
+        test_case.args.append('--backprop')
+
+    if test_case.computation_order:
+        test_case.args.append(
+            '--computation_order=' + test_case.computation_order)
+    elif args.computation_order:
+        test_case.args.append(
+            '--computation_order=' + args.computation_order)
+
+    if test_case.backend is not None:
+        test_case.args.append('--backend')
+        test_case.args.append(test_case.backend)
+    if args.verbose:
+        test_case.args.append('--verbose')
+    if args.iterations:
+        test_case.args.extend(['-I', str(args.iterations)])
+    if runner == run_onnx:
+        test_case.report_json = os.path.join(test_case.log_dirname,
+                                             'report.json')
+        test_case.args.extend(['--report_json', test_case.report_json])
+    device = args.device
+    if test_case.want_gpu or args.use_gpu_all:
+        if not args.use_gpu and not args.use_gpu_all:
+            return None
+        if device is None:
+            device = 'cuda'
+        is_gpu = True
+    if device is not None:
+        test_case.args.extend(['-d', device])
+
+    if args.fuse:
+        test_case.args.append('--fuse_operations')
+        if is_gpu:
+            test_case.args.append('--use_nvrtc')
+    if args.ngraph:
+        test_case.args.append('--fuse_operations')
+        test_case.args.append('--use_ngraph')
+
+    if args.snpe:
+        test_case.args.append('--use_snpe')
+
+    if args.cache:
+        test_case.args.append('--use_cached_model')
+
+    return is_gpu
+
+
+def discover(test_queue, gpu_tests, run_onnx, run_onnx_menoh, errors):
+    """Puts tests found by `discover_test_cases` into `test_queue`.
+
+    GPU tests are run one by one after others, so they are collected
+    in `gpu_tests` instead.
+    """
+    try:
+        for test_case in discover_test_cases():
+            is_gpu = configure_test_case(test_case, run_onnx, run_onnx_menoh)
+            if is_gpu is None:
+                continue
+            if is_gpu:
+                gpu_tests.append(test_case)
+            else:
+                test_queue.put(test_case)
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        test_queue.put(None)
+
+
 def main():
     if not args.skip_build:
         if os.path.exists('Makefile'):
@@ -1020,101 +1258,49 @@ def main():
     run_onnx = os.path.join(args.build_dir, 'tools/run_onnx')
     run_onnx_menoh = os.path.join(args.build_dir, 'menoh/run_onnx_menoh')
 
-    tested = []
-    failed = []
-    tests = []
-    gpu_tests = []
-    for test_case in TEST_CASES:
-        runner = run_onnx_menoh
-        if (test_case.is_backprop or
-            test_case.is_backprop_two_phase or
-            test_case.equal_nan or
-            test_case.skip_shape_inference or
-            test_case.skip_runtime_type_check or
-            test_case.want_gpu or
-            test_case.computation_order or
-            not test_case.test_dir.startswith(NODE_TEST)):
-            runner = run_onnx
-
-        if len(target_opsets) != 0:
-            if args.only_opset_targetable and test_case.opset_version is None:
-                continue
-            if test_case.opset_version is not None and not (test_case.opset_version in target_opsets):
-                continue
-
-        test_case.runner = run_onnx
-        test_case.args = [runner, '--test', test_case.test_dir]
-        test_case.args.append('--compiler_log')
-        is_gpu = False
-        if test_case.rtol is not None:
-            test_case.args += ['--rtol', str(test_case.rtol)]
-        if test_case.atol is not None:
-            test_case.args += ['--atol', str(test_case.atol)]
-        if test_case.equal_nan:
-            test_case.args += ['--equal_nan']
-        if test_case.skip_shape_inference:
-            test_case.args.append('--skip_inference')
-        if test_case.skip_runtime_type_check:
-            test_case.args.append('--skip_runtime_type_check')
-        if test_case.fixed_batch_norm:
-            test_case.args.append('--fixed_batch_norm')
-        if test_case.is_backprop_two_phase:
-            test_case.args.append('--backprop_two_phase')
-        elif test_case.is_backprop:
-            test_case.args.append('--backprop')
-
-        if test_case.computation_order:
-            test_case.args.append(
-                '--computation_order=' + test_case.computation_order)
-        elif args.computation_order:
-            test_case.args.append(
-                '--computation_order=' + args.computation_order)
-
-        if test_case.backend is not None:
-            test_case.args.append('--backend')
-            test_case.args.append(test_case.backend)
-        if args.verbose:
-            test_case.args.append('--verbose')
-        device = args.device
-        if test_case.want_gpu or args.use_gpu_all:
-            if not args.use_gpu and not args.use_gpu_all:
-                continue
-            if device is None:
-                device = 'cuda'
-            is_gpu = True
-        if device is not None:
-            test_case.args.extend(['-d', device])
-
-        if args.fuse:
-            test_case.args.append('--fuse_operations')
-            if is_gpu:
-                test_case.args.append('--use_nvrtc')
-        if args.ngraph:
-            test_case.args.append('--fuse_operations')
-            test_case.args.append('--use_ngraph')
+    print('Testing with %s and %s' % (run_onnx, run_onnx_menoh))
 
-        if args.snpe:
-            test_case.args.append('--use_snpe')
-
-        if args.cache:
-            test_case.args.append('--use_cached_model')
-
-        if is_gpu:
-            gpu_tests.append(test_case)
-        else:
-            tests.append(test_case)
+    # Tests start running while the rest are being discovered.
+    test_queue = queue.Queue()
+    gpu_tests = []
+    errors = []
+    discoverer = threading.Thread(
+        target=discover,
+        args=(test_queue, gpu_tests, run_onnx, run_onnx_menoh, errors),
+        daemon=True)
+    discoverer.start()
 
-    print('Testing %d tests with %s and %s' %
-          (len(tests + gpu_tests), run_onnx, run_onnx_menoh))
+    result_cache = TestResultCache(args.result_cache, args.build_dir)
 
-    for test in tests + gpu_tests:
-        test.prepare()
+    if args.run_name is None:
+        args.run_name = timing_db.new_run_name()
+    tested = []
+    failed = []
+    num_cached = 0
+    timing_records = []
 
-    for tests, num_jobs in [(tests, args.jobs), (gpu_tests, 1)]:
-        runner = TestRunner(tests, args.show_log)
+    def run_tests(test_queue, num_jobs):
+        nonlocal num_cached
+        runner = TestRunner(test_queue, args.show_log, result_cache)
         runner.run(num_jobs)
-        tested += runner.tested
-        failed += runner.failed
+        tested.extend(runner.cached + runner.tested)
+        failed.extend(runner.failed)
+        num_cached += len(runner.cached)
+        timing_records.extend(runner.timing_records)
+
+    try:
+        run_tests(test_queue, args.jobs)
+        discoverer.join()
+        if errors:
+            raise errors[0]
+        run_tests(_queue_of(gpu_tests), 1)
+    finally:
+        result_cache.save()
+        timing_db.append_records(args.timing_db, timing_records)
+
+    if num_cached:
+        print('Skipped %d tests which passed with the same inputs' %
+              num_cached)
 
     if failed:
         with open(args.failure_log, 'wb') as f:
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+#
+# Sweeps batch sizes, spatial resolutions and dtypes of inputs of ONNX
+# tests with run_onnx and finds the batch size which maximizes the
+# throughput under a latency bound.
+#
+# Usage:
+#
+# $ ./scripts/sweep_inputs.py out/onnx_real_resnet50 \
+#       --batch_sizes 1,2,4,8,16,32 --latency_bound 50
+# $ ./scripts/sweep_inputs.py --resolutions 224x224,320x320 \
+#       --dtypes float32,float16 -d cuda out/onnx_real_resnet50
+#
+# Variants are written by chainer_compiler/utils/input_rewriter.py and
+# cached in --cache_dir, so repeated sweeps only measure them. Values of
+# rewritten outputs are not recomputed, so run_onnx runs variants for
+# multiple iterations, which do not check values.
+
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import shlex
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import onnx
+from onnx import numpy_helper
+
+from compare_backends import run_with_rusage
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, 'chainer_compiler', 'utils'))
+
+import input_rewriter  # noqa
+
+
+# Bump this when the layout of rewritten variants changes.
+_CACHE_VERSION = 1
+
+
+class Variant(object):
+    def __init__(self, batch_size, resolution, dtype):
+        self.batch_size = batch_size
+        self.resolution = resolution
+        self.dtype = dtype
+
+    def name(self):
+        name = 'bs%d' % self.batch_size
+        if self.resolution is not None:
+            name += '_%dx%d' % self.resolution
+        if self.dtype is not None:
+            name += '_%s' % self.dtype
+        return name
+
+    def spec(self):
+        return {'batch_size': self.batch_size,
+                'resolution': self.resolution,
+                'dtype': self.dtype}
+
+    def input_types(self, input_values):
+        """Returns new types of inputs which had `input_values`.
+
+        The first axis of every input is the batch and the last two
+        axes of 4D inputs are spatial. Only floating point inputs are
+        converted to `dtype`.
+        """
+        types = []
+        for value in input_values:
+            shape = list(value.shape)
+            if shape:
+                shape[0] = self.batch_size
+            if self.resolution is not None and len(shape) == 4:
+                shape[2:] = self.resolution
+            dtype = None
+            if self.dtype is not None and value.dtype.kind == 'f':
+                dtype = self.dtype
+            types.append(input_rewriter.Type(dtype=dtype, shape=shape))
+        return types
+
+
+def _input_values(test_dir):
+    data_dir = os.path.join(test_dir, 'test_data_set_0')
+    filenames = glob.glob(os.path.join(data_dir, 'input_*.pb'))
+    # Puts input_10.pb after input_9.pb.
+    filenames.sort(key=lambda f: (len(f), f))
+    return [numpy_helper.to_array(onnx.load_tensor(f))
+            for f in filenames]
+
+
+def _hash_test_dir(test_dir):
+    h = hashlib.sha256()
+    filenames = [os.path.join(test_dir, 'model.onnx')]
+    filenames += sorted(glob.glob(os.path.join(test_dir,
+                                               'test_data_set_*', '*.pb')))
+    for filename in filenames:
+        h.update(os.path.relpath(filename, test_dir).encode() + b'\0')
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def prepare_variants(test_dir, variants, cache_dir):
+    """Returns test directories of `variants` rewritten from `test_dir`.
+
+    Each directory is keyed by the contents of `test_dir` and the
+    variant, and only missing ones are written.
+    """
+    test_hash = _hash_test_dir(test_dir)
+    variant_dirs = []
+    missing = []
+    for variant in variants:
+        desc = json.dumps({'version': _CACHE_VERSION, 'test': test_hash,
+                           'variant': variant.spec()}, sort_keys=True)
+        key = hashlib.sha256(desc.encode()).hexdigest()[:16]
+        variant_dir = os.path.join(cache_dir, '%s_%s_%s' % (
+            os.path.basename(os.path.normpath(test_dir)), variant.name(),
+            key))
+        variant_dirs.append(variant_dir)
+        if not os.path.exists(os.path.join(variant_dir, 'variant.json')):
+            missing.append((variant, variant_dir, desc))
+
+    if missing:
+        input_values = _input_values(test_dir)
+        for _, variant_dir, _ in missing:
+            shutil.rmtree(variant_dir, ignore_errors=True)
+        input_rewriter.rewrite_onnx_testdirs(
+            test_dir,
+            [(d, v.input_types(input_values)) for v, d, _ in missing])
+        # The stamp is written last so broken variants are rewritten.
+        for _, variant_dir, desc in missing:
+            with open(os.path.join(variant_dir, 'variant.json'), 'w') as f:
+                f.write(desc)
+    return variant_dirs
+
+
+def measure(args, variant, variant_dir, tmpdir):
+    result = variant.spec()
+    log_filename = os.path.join(tmpdir, 'run_onnx.log')
+    report_json = os.path.join(tmpdir, 'report.json')
+    if os.path.exists(report_json):
+        os.unlink(report_json)
+
+    cmd = [os.path.join(args.build_dir, 'tools', 'run_onnx'),
+           '--test', variant_dir,
+           # The first iteration is excluded by --warmup 1 of run_onnx.
+           '--iterations', str(args.iterations + args.warmup + 1),
+           '--warmup', str(args.warmup + 1),
+           '--report_json', report_json]
+    if args.device:
+        cmd.extend(['-d', args.device])
+    cmd.extend(shlex.split(args.run_onnx_args))
+    if args.cpus:
+        cmd = ['taskset', '-c', args.cpus] + cmd
+
+    status, _, peak_rss = run_with_rusage(cmd, log_filename, args.timeout)
+    if status != 0 or not os.path.exists(report_json):
+        result['status'] = 'TIMEOUT' if status is None else 'FAIL'
+        with open(log_filename, 'rb') as f:
+            result['log'] = f.read().decode('utf-8', 'replace')[-2000:]
+        return result
+
+    with open(report_json) as f:
+        report = json.load(f)
+    stats = report['stats']
+    result['status'] = 'OK'
+    result['stats'] = stats
+    result['compile_time'] = report.get('compile_time')
+    result['throughput'] = variant.batch_size * 1000.0 / stats['p50']
+    result['peak_memory'] = report.get('peak_memory')
+    result['peak_rss'] = peak_rss
+    return result
+
+
+def find_best(results, percentile, latency_bound):
+    """Returns the best result for each resolution and dtype."""
+    best = {}
+    for result in results:
+        if result['status'] != 'OK':
+            continue
+        if (latency_bound is not None and
+                result['stats'][percentile] > latency_bound):
+            continue
+        group = (result['resolution'], result['dtype'])
+        if (group not in best or
+                result['throughput'] > best[group]['throughput']):
+            best[group] = result
+    return best
+
+
+def _format_bytes(num_bytes):
+    if num_bytes is None or num_bytes < 0:
+        return '-'
+    return '%.0fMB' % (num_bytes / 1000 / 1000)
+
+
+def print_results(test_dir, results, best, percentile):
+    print(test_dir)
+    print('  %5s %10s %8s %9s %9s %11s %8s %8s' % (
+        'batch', 'resolution', 'dtype', 'p50', percentile, 'samples/s',
+        'memory', 'RSS'))
+    best_ids = set(id(r) for r in best.values())
+    for result in results:
+        resolution = result['resolution']
+        row = '%s %5d %10s %8s' % (
+            '*' if id(result) in best_ids else ' ',
+            result['batch_size'],
+            '%dx%d' % resolution if resolution else '-',
+            result['dtype'] or '-')
+        if result['status'] == 'OK':
+            row += ' %9.3f %9.3f %11.1f %8s %8s' % (
+                result['stats']['p50'], result['stats'][percentile],
+                result['throughput'], _format_bytes(result['peak_memory']),
+                _format_bytes(result['peak_rss']))
+        else:
+            row += ' %s' % result['status']
+        print(' ' + row)
+    print()
+
+
+def _parse_resolution(s):
+    h, w = s.split('x')
+    return (int(h), int(w))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sweep input shapes and dtypes of ONNX tests')
+    parser.add_argument('test_dirs', nargs='+',
+                        help='ONNX test directories with test_data_set_0')
+    parser.add_argument('--batch_sizes', default='1,2,4,8,16,32',
+                        help='Comma separated batch sizes')
+    parser.add_argument('--resolutions', default=None,
+                        help='Comma separated HxW of 4D inputs such as '
+                        '"224x224,320x320" (default: unchanged)')
+    parser.add_argument('--dtypes', default=None,
+                        help='Comma separated dtypes of floating point '
+                        'inputs and parameters (default: unchanged)')
+    parser.add_argument('--latency_bound', type=float, default=None,
+                        help='The latency bound in msec')
+    parser.add_argument('--percentile', default='p99',
+                        choices=['p50', 'p90', 'p99'],
+                        help='The latency percentile bounded by '
+                        '--latency_bound')
+    parser.add_argument('--build_dir', '-b',
+                        default=os.path.join(project_root, 'build'),
+                        help='The build directory of run_onnx')
+    parser.add_argument('--device', '-d', default=None,
+                        help='ChainerX device to be used')
+    parser.add_argument('--run_onnx_args', default='',
+                        help='Extra flags of run_onnx such as '
+                        '"--fuse_operations"')
+    parser.add_argument('--iterations', '-I', type=int, default=10,
+                        help='The number of timed iterations')
+    parser.add_argument('--warmup', type=int, default=1,
+                        help='The number of untimed iterations')
+    parser.add_argument('--cpus', default=None,
+                        help='Pin run_onnx to CPUs such as "0-3"')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Timeout of each run in seconds')
+    parser.add_argument('--cache_dir',
+                        default=os.path.join(project_root, 'out',
+                                             'sweep_inputs'),
+                        help='The directory of rewritten variants')
+    parser.add_argument('--json', default=None,
+                        help='Dump all results in a JSON')
+    args = parser.parse_args()
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+    resolutions = [None]
+    if args.resolutions:
+        resolutions = [_parse_resolution(r)
+                       for r in args.resolutions.split(',')]
+    dtypes = [None]
+    if args.dtypes:
+        dtypes = [np.dtype(d).name for d in args.dtypes.split(',')]
+    variants = [Variant(*v) for v in itertools.product(
+        batch_sizes, resolutions, dtypes)]
+
+    all_results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for test_dir in args.test_dirs:
+            variant_dirs = prepare_variants(test_dir, variants,
+                                            args.cache_dir)
+            results = []
+            for variant, variant_dir in zip(variants, variant_dirs):
+                sys.stdout.write('%s %s... ' % (test_dir, variant.name()))
+                sys.stdout.flush()
+                result = measure(args, variant, variant_dir, tmpdir)
+                if result['status'] == 'OK':
+                    print('%.3f msec' % result['stats']['p50'])
+                else:
+                    print('%s\n%s' % (result['status'], result['log']))
+                results.append(result)
+            all_results[test_dir] = results
+    print()
+
+    summary = {}
+    for test_dir, results in all_results.items():
+        best = find_best(results, args.percentile, args.latency_bound)
+        print_results(test_dir, results, best, args.percentile)
+        for (resolution, dtype), result in sorted(
+                best.items(), key=lambda kv: str(kv[0])):
+            print('Best batch size for %s%s%s: %d (%.1f samples/s, '
+                  '%s=%.3f msec)' % (
+                      test_dir,
+                      ' %dx%d' % resolution if resolution else '',
+                      ' %s' % dtype if dtype else '',
+                      result['batch_size'], result['throughput'],
+                      args.percentile, result['stats'][args.percentile]))
+        if not best:
+            print('No variant of %s meets the latency bound' % test_dir)
+        print()
+        summary[test_dir] = list(best.values())
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'results': all_results, 'best': summary}, f,
+                      indent=2)
+
+
+if __name__ == '__main__':
+    main()
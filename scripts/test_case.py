@@ -34,6 +34,10 @@ class TestCase(object):
         self.skip_runtime_type_check = skip_runtime_type_check
         self.fixed_batch_norm = fixed_batch_norm
         self.args = None
+        # The key of this test in `TestResultCache`.
+        self.result_key = None
+        # The JSON file where run_onnx writes performance numbers.
+        self.report_json = None
         self.is_backprop = 'backprop' in name
         self.is_backprop_two_phase = False
         self.computation_order = None
@@ -0,0 +1,126 @@
+"""A database of results of tests run by runtests.py.
+
+Each test is keyed by the hashes of its model and test data, the hashes
+of the runner binary and the shared libraries in the build directory,
+and the command line flags. A test which passed with the same key last
+time does not need to run again. Elapsed times are recorded for all
+tests so that the longest tests can be started first.
+"""
+
+import hashlib
+import json
+import os
+
+
+def _hash_file(filename):
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _test_files(test_dir):
+    model = os.path.join(test_dir, 'model.onnx')
+    if os.path.exists(model):
+        yield model
+    for d in sorted(os.listdir(test_dir)):
+        if not d.startswith('test_data_set_'):
+            continue
+        data_dir = os.path.join(test_dir, d)
+        for f in sorted(os.listdir(data_dir)):
+            yield os.path.join(data_dir, f)
+
+
+def _shared_libraries(build_dir):
+    for dirpath, dirnames, filenames in os.walk(build_dir):
+        dirnames.sort()
+        for f in sorted(filenames):
+            if f.endswith('.so') or '.so.' in f or f.endswith('.dylib'):
+                yield os.path.join(dirpath, f)
+
+
+class TestResultCache(object):
+
+    def __init__(self, filename, build_dir=None):
+        self.filename = filename
+        # Runners are linked with libraries in `build_dir`, which are
+        # hashed once as they do not change while tests run.
+        self.build_dir = build_dir
+        self.libraries_key = None
+        self.results = {}
+        # Hashes of files keyed by their paths. Each value is a list of
+        # (size, mtime, hash) so unchanged files are not read again.
+        self.file_hashes = {}
+        if os.path.exists(filename):
+            try:
+                with open(filename) as f:
+                    db = json.load(f)
+                self.results = db['results']
+                self.file_hashes = db['file_hashes']
+            except (ValueError, KeyError):
+                # A broken database is the same as no database.
+                pass
+
+    def save(self):
+        dirname = os.path.dirname(self.filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'w') as f:
+            json.dump({'results': self.results,
+                       'file_hashes': self.file_hashes}, f)
+        os.replace(tmp_filename, self.filename)
+
+    def hash_file(self, filename):
+        st = os.stat(filename)
+        cached = self.file_hashes.get(filename)
+        if cached is not None and cached[:2] == [st.st_size, st.st_mtime_ns]:
+            return cached[2]
+        digest = _hash_file(filename)
+        self.file_hashes[filename] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def hash_libraries(self):
+        if self.libraries_key is None:
+            h = hashlib.sha256()
+            if self.build_dir is not None:
+                for filename in _shared_libraries(self.build_dir):
+                    h.update(filename.encode() + b'\0')
+                    h.update(self.hash_file(filename).encode())
+            self.libraries_key = h.hexdigest()
+        return self.libraries_key
+
+    def compute_key(self, test_case):
+        """Returns the key of `test_case`, or None if it cannot be cached."""
+        if (not os.path.exists(test_case.args[0]) or
+                not os.path.isdir(test_case.test_dir)):
+            return None
+        h = hashlib.sha256()
+        h.update(self.hash_file(test_case.args[0]).encode())
+        h.update(self.hash_libraries().encode())
+        for arg in test_case.args[1:]:
+            h.update(arg.encode() + b'\0')
+        for filename in _test_files(test_case.test_dir):
+            h.update(filename.encode() + b'\0')
+            h.update(self.hash_file(filename).encode())
+        return h.hexdigest()
+
+    def is_passed(self, test_case, key):
+        result = self.results.get(test_case.name)
+        return (key is not None and result is not None and
+                result['key'] == key and result['ok'])
+
+    def elapsed(self, test_case):
+        """Returns the elapsed time of the last run or None."""
+        result = self.results.get(test_case.name)
+        if result is None:
+            return None
+        return result['elapsed']
+
+    def record(self, test_case, key, ok, elapsed):
+        self.results[test_case.name] = {
+            'key': key,
+            'ok': ok,
+            'elapsed': elapsed,
+        }
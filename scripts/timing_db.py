@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+#
+# A database of performance numbers of tests run by runtests.py.
+#
+# Usage:
+#
+# $ ./scripts/runtests.py -g onnx_real --iterations 10 --run_name base
+# (change the compiler)
+# $ ./scripts/runtests.py -g onnx_real --iterations 10 --run_name new
+# $ ./scripts/timing_db.py show --run new onnx_real
+# $ ./scripts/timing_db.py compare base new --threshold 0.05
+#
+# The database is a JSON lines file where each line is a record of a
+# single test in a single run.
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+
+DEFAULT_DB = 'out/timings.jsonl'
+
+METRICS = ['compile_time', 'first_run_time', 'steady_time', 'peak_memory']
+
+
+def new_run_name():
+    return time.strftime('%Y%m%d-%H%M%S')
+
+
+def make_record(run_name, test_name, args, report):
+    record = {
+        'run': run_name,
+        'test': test_name,
+        'flags': args[1:],
+        'time': time.time(),
+    }
+    for key in METRICS + ['flops', 'stats']:
+        record[key] = report.get(key)
+    return record
+
+
+def append_records(db, records):
+    dirname = os.path.dirname(db)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(db, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def load_records(db):
+    records = []
+    with open(db) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def get_run(records, run_name):
+    """Returns records of a run keyed by test names."""
+    run = {}
+    for record in records:
+        if record['run'] == run_name:
+            run[record['test']] = record
+    return run
+
+
+def last_runs(records, num_runs):
+    runs = []
+    for record in records:
+        if record['run'] not in runs:
+            runs.append(record['run'])
+    return runs[-num_runs:]
+
+
+def _format(metric, value):
+    if value is None:
+        return '-'
+    if metric == 'peak_memory':
+        return '%.1fMB' % (value / 1000 / 1000)
+    return '%.3fms' % value
+
+
+def show(args, records):
+    run_name = args.run or last_runs(records, 1)[0]
+    run = get_run(records, run_name)
+    reg = re.compile(args.test_filter) if args.test_filter else None
+    print('Run: %s' % run_name)
+    for name, record in sorted(run.items()):
+        if reg and not reg.search(name):
+            continue
+        values = ' '.join('%s=%s' % (m, _format(m, record[m]))
+                          for m in METRICS)
+        print('%s %s' % (name, values))
+
+
+def compare_records(base, new, threshold, min_time, metrics=METRICS):
+    """Yields (test, metric, base value, new value, ratio) of regressions.
+
+    A metric regresses when it grows more than `threshold` relative to
+    the base. Time metrics below `min_time` msec in both runs are
+    ignored as they are dominated by noise.
+    """
+    for name in sorted(set(base) & set(new)):
+        for metric in metrics:
+            b = base[name].get(metric)
+            n = new[name].get(metric)
+            if b is None or n is None or b <= 0:
+                continue
+            if metric != 'peak_memory' and max(b, n) < min_time:
+                continue
+            ratio = n / b
+            if ratio > 1 + threshold:
+                yield name, metric, b, n, ratio
+
+
+def compare(args, records):
+    if args.base is None or args.new is None:
+        base_name, new_name = last_runs(records, 2)
+    else:
+        base_name, new_name = args.base, args.new
+    base = get_run(records, base_name)
+    new = get_run(records, new_name)
+    metrics = args.metric or METRICS
+    print('Comparing %s (%d tests) with %s (%d tests)' %
+          (new_name, len(new), base_name, len(base)))
+    regressions = list(compare_records(
+        base, new, args.threshold, args.min_time, metrics))
+    for name, metric, b, n, ratio in regressions:
+        print('REGRESSION %s %s: %s => %s (%+.1f%%)' %
+              (name, metric, _format(metric, b), _format(metric, n),
+               (ratio - 1) * 100))
+    if regressions:
+        print('%d regressions found' % len(regressions))
+        sys.exit(1)
+    print('No regressions')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Show and compare performance of tests')
+    parser.add_argument('--db', default=DEFAULT_DB,
+                        help='The database written by runtests.py')
+    subparsers = parser.add_subparsers(dest='command')
+
+    show_parser = subparsers.add_parser('show', help='Show a run')
+    show_parser.add_argument('test_filter', default=None, nargs='?',
+                             help='A regular expression to filter tests')
+    show_parser.add_argument('--run', default=None,
+                             help='The name of the run (default: last)')
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='Find regressions between two runs')
+    compare_parser.add_argument('base', default=None, nargs='?',
+                                help='The baseline run')
+    compare_parser.add_argument('new', default=None, nargs='?',
+                                help='The run to be checked')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='Allowed relative slowdown')
+    compare_parser.add_argument('--min_time', type=float, default=1.0,
+                                help='Ignore tests faster than this (msec)')
+    compare_parser.add_argument('--metric', action='append',
+                                choices=METRICS,
+                                help='Metrics to be compared')
+    args = parser.parse_args()
+
+    records = load_records(args.db)
+    if args.command == 'compare':
+        compare(args, records)
+    else:
+        if not hasattr(args, 'run'):
+            args.run = None
+            args.test_filter = None
+        show(args, records)
+
+
+if __name__ == '__main__':
+    main()
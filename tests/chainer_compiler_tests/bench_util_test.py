@@ -0,0 +1,58 @@
+import json
+import os
+import sys
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(project_root, 'utils'))
+
+import bench_util  # noqa
+
+
+def test_parse_cpus():
+    assert [0] == bench_util.parse_cpus('0')
+    assert [0, 2, 3, 4] == bench_util.parse_cpus('0,2-4')
+
+
+def test_percentile():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert 1.0 == bench_util.percentile(values, 0)
+    assert 3.0 == bench_util.percentile(values, 50)
+    assert 4.6 == bench_util.percentile(values, 90)
+    assert 5.0 == bench_util.percentile(values, 100)
+    assert 7.0 == bench_util.percentile([7.0], 99)
+
+
+def test_summarize():
+    values = [10.0 + i * 0.1 for i in range(20)] + [100.0]
+    stats = bench_util.summarize(values)
+    assert 1 == stats['num_outliers']
+    assert 21 == stats['num_samples']
+    # The outlier is only excluded from the mean and the stdev.
+    assert abs(10.95 - stats['mean']) < 1e-9
+    assert stats['stdev'] < 1.0
+    assert 10.0 == stats['min']
+    assert 100.0 == stats['max']
+    assert abs(11.0 - stats['p50']) < 1e-9
+    assert stats['p99'] > 11.9
+    lo, hi = stats['p50_ci95']
+    assert lo <= stats['p50'] <= hi
+    assert stats['p50'] <= stats['p90'] <= stats['p99'] <= stats['max']
+
+
+def test_measure():
+    calls = []
+    syncs = []
+    report = bench_util.measure(lambda: calls.append(None), 5, warmup=2,
+                                sync=lambda: syncs.append(None))
+    assert 7 == len(calls)
+    assert 7 == len(syncs)
+    assert 5 == len(report['elapsed_times'])
+    assert 2 == report['warmup']
+    assert 5 == report['stats']['num_samples']
+    assert report['peak_rss'] > 0
+    json.dumps(report)
+
+    report = bench_util.measure(lambda: None, 0)
+    assert report['stats'] is None
+    assert report['steady_time'] is None
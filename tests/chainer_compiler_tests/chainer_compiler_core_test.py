@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 
@@ -48,6 +49,68 @@ def test_inference():
     assert 'op_type: "ChainerLinear"' in graph.dump()
 
 
+def test_load_from_bytes():
+    filename = 'out/ch2o_node_Linear/model.onnx'
+    with open(filename, 'rb') as f:
+        serialized = f.read()
+    expected = _chainer_compiler_core.load(filename)
+    for buf in [serialized, bytearray(serialized), memoryview(serialized)]:
+        graph = _chainer_compiler_core.load_from_bytes(buf)
+        assert graph.input_names() == expected.input_names()
+        assert graph.param_names() == expected.param_names()
+        assert graph.output_names() == expected.output_names()
+        assert graph.dump() == expected.dump()
+
+
+def test_session():
+    graph = _chainer_compiler_core.load('out/ch2o_node_Linear/model.onnx')
+    params = graph.params()
+    input_names = graph.input_names()
+    output_names = graph.output_names()
+
+    chxvm = graph.compile()
+    options = _chainer_compiler_core.ChxVMOptions(check_nans=True)
+    assert options.check_nans
+    assert options.check_types
+
+    param_names = sorted(params.keys())
+    session = chxvm.session(input_names + param_names, output_names, options)
+    for i, name in enumerate(param_names):
+        session.bind(len(input_names) + i, params[name])
+
+    for i in range(3):
+        t1 = aranges(5, 7) + i
+        session.bind(0, _chainer_compiler_core.value(t1))
+        outputs = session.run()
+        assert len(outputs) == 2
+
+        inputs = dict(params)
+        inputs[input_names[0]] = _chainer_compiler_core.value(t1)
+        expected = chxvm.run(inputs, options)
+        for name, actual in zip(output_names, outputs):
+            chainerx.testing.assert_allclose(expected[name].array(),
+                                             actual.array())
+
+
+def test_chrome_tracing_reused_options(tmpdir):
+    graph = _chainer_compiler_core.load('out/ch2o_node_Linear/model.onnx')
+    inputs = dict(graph.params())
+    inputs[graph.input_names()[0]] = _chainer_compiler_core.value(
+        aranges(5, 7))
+    chxvm = graph.compile()
+    trace_file = str(tmpdir.join('trace.json'))
+    options = _chainer_compiler_core.ChxVMOptions(chrome_tracing=trace_file)
+
+    num_events = []
+    for i in range(3):
+        chxvm.run(inputs, options)
+        with open(trace_file) as f:
+            num_events.append(len(json.load(f)))
+    # Each file only has events of its own run.
+    assert num_events[0] > 0
+    assert num_events == [num_events[0]] * 3
+
+
 def test_backprop():
     graph = _chainer_compiler_core.load('out/ch2o_node_Linear_backprop/model.onnx')
     params = graph.params()
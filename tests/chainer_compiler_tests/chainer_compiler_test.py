@@ -59,6 +59,28 @@ def test_unflatten():
     assert i == len(flat)
 
 
+def test_spec():
+    flat = [np.array(x) for x in [0, 1, 2, 3, 4, 5]]
+    nested = [flat[0], [flat[1], flat[2]], [(flat[3], [flat[4], flat[5]])]]
+    spec = chainer_compiler._Spec(nested)
+    assert spec.num_leaves == 6
+    assert not spec.is_flat
+    assert spec.children[1].is_flat
+    assert flat == spec.flatten(nested)
+    unflat, i = spec.unflatten(flat)
+    assert nested == unflat
+    assert i == len(flat)
+
+    o = []
+    spec.children[2].flatten_structured([[]], o)
+    assert o == [None, None, None]
+
+    signature = chainer_compiler._signature(nested)
+    other = [flat[5], [flat[4], flat[3]], [(flat[2], [flat[1], flat[0]])]]
+    assert signature == chainer_compiler._signature(other)
+    assert signature != chainer_compiler._signature(other[:2])
+
+
 def _assert_allclose(e, a, **kwargs):
     if has_cupy and isinstance(e, cupy.ndarray):
         e = chainer.cuda.to_cpu(e)
@@ -449,3 +471,182 @@ def test_partially_differentiable(device_name, translator):
     #     assert e is not None
     #     assert a is not None
     #     _assert_allclose(e, a)
+
+
+@pytest.mark.parametrize('device_name', ['@numpy'])
+@pytest.mark.parametrize('translator', ['ch2o'])
+def test_compile_cache(device_name, translator, tmpdir):
+    np.random.seed(40)
+    device = chainer.get_device(device_name)
+    device.use()
+
+    batch_size = 3
+    in_size = 5
+    n_units = 4
+    n_out = 10
+
+    mlp = MLP(n_units, n_out)
+    mlp.to_device(device)
+    input = np.random.rand(batch_size, in_size).astype(np.float32)
+    target = np.random.randint(n_out, size=batch_size)
+
+    cache_dir = str(tmpdir.join('cache'))
+    cold = chainer_compiler.compile(mlp, [input], translator=translator,
+                                    cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+    expected_loss, expected_grads = _run_fwd_bwd(
+        L.Classifier(cold), [input, target])
+
+    warm = chainer_compiler.compile(mlp, [input], translator=translator,
+                                    cache_dir=cache_dir)
+    assert warm.fwd_program == cold.fwd_program
+    assert warm.bwd_program == cold.bwd_program
+    actual_loss, actual_grads = _run_fwd_bwd(
+        L.Classifier(warm), [input, target])
+
+    _assert_allclose(expected_loss, actual_loss)
+    assert len(expected_grads) == len(actual_grads)
+    for (e_name, e_grad), (a_name, a_grad) in zip(
+            expected_grads, actual_grads):
+        assert e_name == a_name
+        _assert_allclose(e_grad, a_grad, rtol=1e-4)
+
+    # A different input shape must not hit the cached entry.
+    input2 = np.random.rand(batch_size + 1, in_size).astype(np.float32)
+    chainer_compiler.compile(mlp, [input2], translator=translator,
+                             cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
+
+
+@pytest.mark.parametrize('device_name', all_device_names)
+@pytest.mark.parametrize('translator', all_translators)
+def test_inference_only(device_name, translator):
+    np.random.seed(40)
+    device = chainer.get_device(device_name)
+    device.use()
+
+    batch_size = 3
+    in_size = 5
+    n_units = 4
+    n_out = 10
+
+    mlp = MLP(n_units, n_out)
+    mlp.to_device(device)
+    input = np.random.rand(batch_size, in_size).astype(np.float32)
+    input = device.xp.array(input)
+    expected = mlp(input)
+
+    with chainer.no_backprop_mode():
+        mlp_compiled = chainer_compiler.compile(mlp, [input],
+                                                translator=translator)
+    assert mlp_compiled.inference_only
+    assert mlp_compiled.bwd is None
+    assert (mlp_compiled.fwd_output_names ==
+            mlp_compiled.orig_output_names)
+
+    with chainer.no_backprop_mode():
+        actual = mlp_compiled(input)
+    assert actual.creator is None
+    assert not actual.requires_grad
+    _assert_allclose(_array(expected), _array(actual), rtol=1e-5)
+
+    # It has no backward program to compute gradients.
+    with pytest.raises(RuntimeError):
+        mlp_compiled(input)
+
+
+@pytest.mark.parametrize('device_name', all_device_names)
+@pytest.mark.parametrize('translator', all_translators)
+def test_weights_by_reference(device_name, translator):
+    if skip_check(device_name, translator, None):
+        pytest.skip()
+
+    np.random.seed(40)
+    device = chainer.get_device(device_name)
+    device.use()
+
+    batch_size = 3
+    in_size = 5
+    n_units = 4
+    n_out = 10
+
+    bn = BN(in_size, n_out)
+    bn.to_device(device)
+    input = np.random.rand(batch_size, in_size, 1, 1).astype(np.float32)
+    input = device.xp.array(input)
+    target = device.xp.array(np.random.randint(n_out, size=batch_size))
+
+    xmodel = chainer_compiler.export_model(bn, [input], translator=translator)
+    chainer_compiler._strip_live_params(xmodel, bn, translator)
+    params = chainer_compiler._live_params(bn, translator)
+    assert not [t for t in xmodel.graph.initializer if t.name in params]
+
+    expected_loss, expected_grads = _run_fwd_bwd(
+        L.Classifier(bn), [input, target])
+
+    bn_compiled = chainer_compiler.compile(
+        bn, [input], translator=translator, weights_by_reference=True)
+    assert len(bn_compiled.fwd_input_names) == 1
+    assert set(bn_compiled.param_names) <= set(params)
+
+    actual_loss, actual_grads = _run_fwd_bwd(
+        L.Classifier(bn_compiled), [input, target])
+    _assert_allclose(expected_loss, actual_loss, rtol=1e-5)
+    for (e_name, e_grad), (a_name, a_grad) in zip(
+            expected_grads, actual_grads):
+        assert e_name == a_name
+        _assert_allclose(e_grad, a_grad, rtol=1e-4)
+
+    # Updates of the live parameters are seen by the compiled model.
+    bn.linear.W.array[...] = 0
+    bn.linear.b.array[...] = 0
+    y = bn_compiled(input)
+    _assert_allclose(np.zeros((batch_size, n_out), dtype=np.float32),
+                     _array(y))
+
+    with pytest.raises(ValueError):
+        chainer_compiler.compile(
+            bn, [input], translator=translator, weights_by_reference=True,
+            computation_order='dummy')
+
+
+@pytest.mark.parametrize('device_name', all_device_names)
+@pytest.mark.parametrize('offload_retained', [False, True])
+def test_retained(device_name, offload_retained):
+    np.random.seed(40)
+    device = chainer.get_device(device_name)
+    device.use()
+
+    batch_size = 3
+    in_size = 5
+    n_units = 4
+    n_out = 10
+
+    mlp = MLP(n_units, n_out)
+    mlp.to_device(device)
+    input = np.random.rand(batch_size, in_size).astype(np.float32)
+    input = device.xp.array(input)
+    target = device.xp.array(np.random.randint(n_out, size=batch_size))
+
+    expected_loss, expected_grads = _run_fwd_bwd(
+        L.Classifier(mlp), [input, target])
+
+    mlp_compiled = chainer_compiler.compile(
+        mlp, [input], offload_retained=offload_retained)
+    y = mlp_compiled(input)
+    runner = y.creator
+    assert len(runner.retained) > 0
+    assert runner.retained.offloaded == offload_retained
+    retained = runner.retained
+    F.sum(y).backward()
+    # Retained values are released right after the backward run.
+    assert retained.released
+    assert len(retained) == 0
+
+    actual_loss, actual_grads = _run_fwd_bwd(
+        L.Classifier(mlp_compiled), [input, target])
+    _assert_allclose(expected_loss, actual_loss)
+    for (e_name, e_grad), (a_name, a_grad) in zip(
+            expected_grads, actual_grads):
+        assert e_name == a_name
+        _assert_allclose(e_grad, a_grad, rtol=1e-4)
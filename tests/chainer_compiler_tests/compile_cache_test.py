@@ -0,0 +1,93 @@
+import concurrent.futures
+import os
+import sys
+
+import chainer
+import numpy as np
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+from chainer_compiler import compile_cache  # noqa
+
+
+def _entry(size):
+    return {
+        'orig_output_names': ['y'],
+        'fwd_input_names': ['x'],
+        'fwd_output_names': ['y'],
+        'bwd_input_names': ['grad_in@y'],
+        'bwd_output_names': ['grad_out@x'],
+        'param_names': ['w'],
+        'fwd_program': b'\0' * size,
+        'bwd_program': b'',
+        'initializers': {'w': np.arange(6).reshape(2, 3)},
+    }
+
+
+def test_store_load(tmpdir):
+    cache = compile_cache.CompileCache(str(tmpdir))
+    assert cache.load('k') is None
+    cache.store('k', _entry(10))
+    entry = cache.load('k')
+    assert entry['fwd_program'] == b'\0' * 10
+    assert entry['bwd_program'] == b''
+    assert entry['param_names'] == ['w']
+    np.testing.assert_array_equal(np.arange(6).reshape(2, 3),
+                                  entry['initializers']['w'])
+
+
+def test_store_existing_key(tmpdir):
+    cache = compile_cache.CompileCache(str(tmpdir))
+    cache.store('k', _entry(10))
+    # The first entry is kept for readers of it.
+    cache.store('k', _entry(20))
+    assert cache.load('k')['fwd_program'] == b'\0' * 10
+
+
+def test_concurrent_store(tmpdir):
+    cache = compile_cache.CompileCache(str(tmpdir))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.store, 'k', _entry(100000))
+                   for _ in range(16)]
+        for future in futures:
+            future.result()
+    assert cache.load('k')['fwd_program'] == b'\0' * 100000
+    assert sorted(os.listdir(str(tmpdir))) == ['k']
+
+
+def test_load_broken(tmpdir):
+    cache = compile_cache.CompileCache(str(tmpdir))
+    cache.store('k', _entry(10))
+    os.unlink(os.path.join(str(tmpdir), 'k', 'fwd.chxvm'))
+    assert cache.load('k') is None
+    cache.store('k', _entry(20))
+    assert cache.load('k')['fwd_program'] == b'\0' * 20
+
+
+def test_evict(tmpdir):
+    cache = compile_cache.CompileCache(str(tmpdir), max_bytes=25000)
+    cache.store('a', _entry(10000))
+    cache.store('b', _entry(10000))
+    # Touch `a` so `b` becomes the least recently used entry.
+    os.utime(os.path.join(str(tmpdir), 'b', 'meta.json'), (0, 0))
+    assert cache.load('a') is not None
+    cache.store('c', _entry(10000))
+    assert cache.load('a') is not None
+    assert cache.load('b') is None
+    assert cache.load('c') is not None
+
+
+def test_compute_key_scalar_input():
+    model = chainer.Chain()
+    x = np.zeros((2, 3), dtype=np.float32)
+
+    def key(inputs):
+        return compile_cache.compute_key(model, inputs, 'ch2o')
+
+    assert key([x, 3]) == key([x, 3])
+    assert key([x, 3]) != key([x, 4])
+    assert key([x, 3]) != key([x, 3.0])
+    assert key([x, None]) != key([x, 0])
+    assert key([x, 3]) != key([np.zeros((2, 4), dtype=np.float32), 3])
@@ -0,0 +1,84 @@
+import os
+import sys
+
+import numpy as np
+import onnx
+from onnx import helper
+from onnx import numpy_helper
+from onnx import TensorProto
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'utils'))
+
+from chainer_compiler import external_data  # noqa
+import run_onnx_util  # noqa
+
+
+def _make_model():
+    w = np.random.rand(32, 16).astype(np.float32)
+    b = np.random.rand(16).astype(np.float32)
+    shape = np.array([-1, 16], dtype=np.int64)
+    nodes = [
+        helper.make_node('MatMul', ['x', 'w'], ['h']),
+        helper.make_node('Add', ['h', 'b'], ['y0']),
+        helper.make_node('Reshape', ['y0', 'shape'], ['y']),
+    ]
+    inputs = [
+        helper.make_tensor_value_info('x', TensorProto.FLOAT, (4, 32)),
+        helper.make_tensor_value_info('w', TensorProto.FLOAT, w.shape),
+        helper.make_tensor_value_info('b', TensorProto.FLOAT, b.shape),
+        helper.make_tensor_value_info('shape', TensorProto.INT64, (2,)),
+    ]
+    outputs = [helper.make_tensor_value_info('y', TensorProto.FLOAT, (4, 16))]
+    initializers = [numpy_helper.from_array(w, 'w'),
+                    numpy_helper.from_array(b, 'b'),
+                    numpy_helper.from_array(shape, 'shape')]
+    graph = helper.make_graph(nodes, 'graph', inputs, outputs,
+                              initializer=initializers)
+    return helper.make_model(graph), {'w': w, 'b': b, 'shape': shape}
+
+
+def test_save_model(tmpdir):
+    xmodel, values = _make_model()
+    filename = str(tmpdir.join('model.onnx'))
+    external_data.save_model(xmodel, filename, size_threshold=64)
+
+    locations = {}
+    for xtensor in xmodel.graph.initializer:
+        if xtensor.data_location != TensorProto.EXTERNAL:
+            continue
+        assert not xtensor.HasField('raw_data')
+        entries = {e.key: e.value for e in xtensor.external_data}
+        assert entries['location'] == 'model.onnx.data'
+        assert int(entries['offset']) % 64 == 0
+        locations[xtensor.name] = entries
+    # Only `w` and `b` are larger than the threshold.
+    assert sorted(locations) == ['b', 'w']
+    assert os.path.exists(filename + '.data')
+
+    loaded = onnx.load(filename)
+    for xtensor in loaded.graph.initializer:
+        np.testing.assert_array_equal(values[xtensor.name],
+                                      numpy_helper.to_array(xtensor))
+
+
+def test_save_model_without_large_tensors(tmpdir):
+    xmodel, _ = _make_model()
+    filename = str(tmpdir.join('model.onnx'))
+    external_data.save_model(xmodel, filename, size_threshold=1 << 20)
+    assert not os.path.exists(filename + '.data')
+    for xtensor in xmodel.graph.initializer:
+        assert xtensor.data_location != TensorProto.EXTERNAL
+
+
+def test_onnx_input_output_names(tmpdir):
+    xmodel, _ = _make_model()
+    filename = str(tmpdir.join('model.onnx'))
+    with open(filename, 'wb') as f:
+        f.write(xmodel.SerializeToString())
+    assert (['x'], ['y']) == run_onnx_util.onnx_input_output_names(filename)
+
+    external_data.save_model(xmodel, filename, size_threshold=64)
+    assert (['x'], ['y']) == run_onnx_util.onnx_input_output_names(filename)
@@ -0,0 +1,74 @@
+import os
+import sys
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(project_root, 'scripts'))
+
+import incremental_gen  # noqa
+
+
+def _make_tasks(tmpdir, fingerprint, names=('a', 'b', 'c')):
+    tasks = []
+    for name in names:
+        out_dir = str(tmpdir.join('out', name))
+
+        def generate(out_dir=out_dir):
+            os.makedirs(out_dir, exist_ok=True)
+            with open(os.path.join(out_dir, 'model.onnx'), 'a') as f:
+                f.write('x')
+
+        tasks.append(incremental_gen.Task(name, generate, fingerprint,
+                                          [out_dir]))
+    return tasks
+
+
+def _generation_count(tmpdir, name):
+    with open(str(tmpdir.join('out', name, 'model.onnx'))) as f:
+        return len(f.read())
+
+
+def test_fingerprint(tmpdir):
+    src = tmpdir.mkdir('src')
+    src.join('a.py').write('x = 1\n')
+    src.mkdir('sub').join('b.py').write('y = 2\n')
+    src.join('data.txt').write('ignored')
+    fp = incremental_gen.fingerprint([str(src)], ['v1'])
+    assert fp == incremental_gen.fingerprint([str(src)], ['v1'])
+    assert fp != incremental_gen.fingerprint([str(src)], ['v2'])
+
+    src.join('data.txt').write('still ignored')
+    assert fp == incremental_gen.fingerprint([str(src)], ['v1'])
+    src.join('sub', 'b.py').write('y = 3\n')
+    assert fp != incremental_gen.fingerprint([str(src)], ['v1'])
+
+
+def test_incremental(tmpdir):
+    stamp_dir = str(tmpdir.join('stamps'))
+    tasks = _make_tasks(tmpdir, 'fp1')
+    assert len(incremental_gen.run(tasks, stamp_dir, jobs=1)) == 3
+    assert incremental_gen.run(tasks, stamp_dir, jobs=1) == []
+    assert _generation_count(tmpdir, 'a') == 1
+
+    # A removed output is generated again.
+    tmpdir.join('out', 'b').remove()
+    stale = incremental_gen.run(tasks, stamp_dir, jobs=1)
+    assert [t.name for t in stale] == ['b']
+
+    tasks = _make_tasks(tmpdir, 'fp2')
+    assert len(incremental_gen.run(tasks, stamp_dir, jobs=1)) == 3
+    assert _generation_count(tmpdir, 'a') == 2
+
+
+def test_parallel(tmpdir):
+    stamp_dir = str(tmpdir.join('stamps'))
+    names = ['t%d' % i for i in range(8)]
+    # Closures are run by forked workers.
+    tasks = _make_tasks(tmpdir, 'fp', names)
+    assert len(incremental_gen.run(tasks, stamp_dir, jobs=4)) == 8
+    for name in names:
+        assert _generation_count(tmpdir, name) == 1
+        assert incremental_gen.is_fresh(
+            incremental_gen.Task(name, None, 'fp',
+                                 [str(tmpdir.join('out', name))]),
+            stamp_dir)
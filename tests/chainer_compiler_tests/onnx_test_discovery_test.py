@@ -0,0 +1,45 @@
+import os
+import sys
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(project_root, 'scripts'))
+
+import onnx_test_discovery  # noqa
+
+
+def _add_test(data_dir, name):
+    data_dir.join(name, 'model.onnx').write('', ensure=True)
+
+
+def test_find_tests(tmpdir, monkeypatch):
+    data_dir = tmpdir.mkdir('data')
+    _add_test(data_dir, 'node/test_add')
+    _add_test(data_dir, 'node/test_sub')
+    _add_test(data_dir, 'simple/test_relu')
+    data_dir.mkdir('node', 'test_no_model')
+    data_dir = str(data_dir)
+    cache_file = str(tmpdir.join('cache.json'))
+
+    cache = onnx_test_discovery.DiscoveryCache(cache_file)
+    expected = [os.path.join(data_dir, t) for t in
+                ['node/test_add', 'node/test_sub', 'simple/test_relu']]
+    assert cache.find_tests([data_dir, str(tmpdir.join('none'))]) == [
+        expected, []]
+    cache.save()
+
+    def scan(category_dir):
+        assert False, 'The cache should be used'
+
+    monkeypatch.setattr(onnx_test_discovery, '_scan_category', scan)
+    cache = onnx_test_discovery.DiscoveryCache(cache_file)
+    assert cache.find_tests([data_dir]) == [expected]
+    monkeypatch.undo()
+
+    # A new test updates the mtime of its category.
+    _add_test(tmpdir.join('data'), 'node/test_mul')
+    node_dir = os.path.join(data_dir, 'node')
+    st = os.stat(node_dir)
+    os.utime(node_dir, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert cache.find_tests([data_dir]) == [
+        sorted(expected + [os.path.join(data_dir, 'node/test_mul')])]
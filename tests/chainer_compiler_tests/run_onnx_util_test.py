@@ -0,0 +1,96 @@
+import os
+import sys
+
+import numpy as np
+from onnx import numpy_helper
+from onnx import TensorProto
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(project_root, 'utils'))
+
+import run_onnx_util  # noqa
+
+
+def _write_tensor(filename, value, name):
+    with open(filename, 'wb') as f:
+        f.write(numpy_helper.from_array(value, name).SerializeToString())
+
+
+def _make_test_dir(tmpdir, num_data_sets):
+    values = []
+    for i in range(num_data_sets):
+        data_dir = tmpdir.mkdir('test_data_set_%d' % i)
+        x = np.random.rand(3, 4).astype(np.float32)
+        n = np.array(i, dtype=np.int64)
+        y = np.random.rand(3, 4).astype(np.float64)
+        _write_tensor(str(data_dir.join('input_0.pb')), x, 'x')
+        _write_tensor(str(data_dir.join('input_1.pb')), n, '')
+        _write_tensor(str(data_dir.join('output_0.pb')), y, 'y')
+        values.append(([('x', x), ('n', n)], [('y', y)]))
+    return values
+
+
+def _assert_values_equal(expected, actual):
+    assert len(expected) == len(actual)
+    for (e_name, e_value), (a_name, a_value) in zip(expected, actual):
+        assert e_name == a_name
+        assert e_value.dtype == a_value.dtype
+        np.testing.assert_array_equal(e_value, a_value)
+
+
+def test_load_test_data(tmpdir):
+    expected = _make_test_dir(tmpdir, 1)[0]
+    inputs, outputs = run_onnx_util.load_test_data(
+        str(tmpdir.join('test_data_set_0')), ['x', 'n'], ['y'])
+    _assert_values_equal(expected[0], inputs)
+    _assert_values_equal(expected[1], outputs)
+
+    # Updates of memory-mapped values do not modify the files.
+    inputs[0][1][...] = 0
+    inputs, _ = run_onnx_util.load_test_data(
+        str(tmpdir.join('test_data_set_0')), ['x', 'n'], ['y'])
+    _assert_values_equal(expected[0], inputs)
+
+
+def test_test_data_sets(tmpdir):
+    expected = _make_test_dir(tmpdir, 12)
+    data_sets = run_onnx_util.test_data_sets(str(tmpdir), ['x', 'n'], ['y'])
+    for i, data_set in enumerate(data_sets):
+        assert data_set.data_dir.endswith('test_data_set_%d' % i)
+        _assert_values_equal(expected[i][0], data_set.inputs)
+        _assert_values_equal(expected[i][1], data_set.outputs)
+        data_set.release()
+    assert i == 11
+
+
+def _write_external_tensor(data_dir, basename, value, name, offset):
+    tensor = numpy_helper.from_array(value, name)
+    with open(str(data_dir.join(basename + '.data')), 'wb') as f:
+        f.write(b'\0' * offset)
+        f.write(tensor.raw_data)
+    tensor.ClearField('raw_data')
+    tensor.data_location = TensorProto.EXTERNAL
+    entries = [('location', basename + '.data')]
+    if offset:
+        entries += [('offset', offset), ('length', value.nbytes)]
+    for key, v in entries:
+        entry = tensor.external_data.add()
+        entry.key = key
+        entry.value = str(v)
+    with open(str(data_dir.join(basename + '.pb')), 'wb') as f:
+        f.write(tensor.SerializeToString())
+
+
+def test_external_data(tmpdir):
+    data_dir = tmpdir.mkdir('test_data_set_0')
+    x = np.random.rand(3, 4).astype(np.float32)
+    n = np.arange(5, dtype=np.int64)
+    y = np.random.rand(3, 4).astype(np.float64)
+    _write_external_tensor(data_dir, 'input_0', x, 'x', 64)
+    _write_external_tensor(data_dir, 'input_1', n, 'n', 0)
+    _write_tensor(str(data_dir.join('output_0.pb')), y, 'y')
+
+    data_set, = run_onnx_util.test_data_sets(str(tmpdir), ['x', 'n'], ['y'])
+    _assert_values_equal([('x', x), ('n', n)], data_set.inputs)
+    _assert_values_equal([('y', y)], data_set.outputs)
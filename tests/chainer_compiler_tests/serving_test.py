@@ -0,0 +1,106 @@
+import asyncio
+import concurrent.futures
+import os
+import sys
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import chainerx.testing
+import numpy as np
+import pytest
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+sys.path.append(os.path.join(project_root, 'build/chainer_compiler_cc'))
+
+import chainer_compiler  # noqa
+from chainer_compiler import serving  # noqa
+
+
+class MLP(chainer.Chain):
+
+    def __init__(self):
+        super(MLP, self).__init__()
+        with self.init_scope():
+            self.l1 = L.Linear(None, 10)
+            self.l2 = L.Linear(None, 4)
+
+    def forward(self, x):
+        return self.l2(F.relu(self.l1(x)))
+
+
+def _setup():
+    np.random.seed(42)
+    model = MLP()
+    x = np.random.rand(1, 5).astype(np.float32)
+    model(x)
+    return model, serving.PaddedModel(model, [x], batch_sizes=[1, 4, 8])
+
+
+def test_padded_model():
+    model, compiled = _setup()
+    for batch_size in [1, 3, 4, 7, 8]:
+        x = np.random.rand(batch_size, 5).astype(np.float32)
+        y, = compiled.run_arrays([x])
+        assert y.shape == (batch_size, 4)
+        chainerx.testing.assert_allclose(model(x).array, y, rtol=1e-5)
+
+    with pytest.raises(ValueError):
+        compiled.run_arrays([np.random.rand(9, 5).astype(np.float32)])
+    with pytest.raises(ValueError):
+        compiled.run_arrays([np.random.rand(2, 6).astype(np.float32)])
+
+
+def test_batched_server_one_batch():
+    model, compiled = _setup()
+    xs = [np.random.rand(n, 5).astype(np.float32) for n in [1, 2, 2, 1]]
+    # A long latency lets all requests join the first batch, which is
+    # dispatched when it gets full.
+    with serving.BatchedServer(compiled, max_batch_size=6,
+                               max_latency=10) as server:
+        futures = [server.submit(x) for x in xs]
+        ys = [f.result() for f in futures]
+    assert server.num_batches == 1
+    for x, y in zip(xs, ys):
+        chainerx.testing.assert_allclose(model(x).array, y, rtol=1e-5)
+
+
+def test_batched_server_too_large_request():
+    _, compiled = _setup()
+    with serving.BatchedServer(compiled, max_latency=0.05) as server:
+        future = server.submit(np.random.rand(9, 5).astype(np.float32))
+        with pytest.raises(ValueError):
+            future.result()
+        x = np.random.rand(2, 5).astype(np.float32)
+        assert server.infer(x).shape == (2, 4)
+
+
+def test_batched_server_threads():
+    model, compiled = _setup()
+    xs = [np.random.rand(i % 3 + 1, 5).astype(np.float32) for i in range(20)]
+    with serving.BatchedServer(compiled, max_latency=0.05) as server:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+            ys = list(pool.map(server.infer, xs))
+    assert server.num_requests == len(xs)
+    assert server.num_batches < len(xs)
+    for x, y in zip(xs, ys):
+        chainerx.testing.assert_allclose(model(x).array, y, rtol=1e-5)
+
+
+def test_batched_server_asyncio():
+    model, compiled = _setup()
+    xs = [np.random.rand(1, 5).astype(np.float32) for _ in range(10)]
+
+    async def run_all(server):
+        return await asyncio.gather(*[server.infer_async(x) for x in xs])
+
+    loop = asyncio.new_event_loop()
+    try:
+        with serving.BatchedServer(compiled, max_batch_size=4) as server:
+            ys = loop.run_until_complete(run_all(server))
+    finally:
+        loop.close()
+    for x, y in zip(xs, ys):
+        chainerx.testing.assert_allclose(model(x).array, y, rtol=1e-5)
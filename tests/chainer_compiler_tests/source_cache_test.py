@@ -0,0 +1,96 @@
+import importlib.util
+import os
+import sys
+
+import gast
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+from chainer_compiler import source_cache  # noqa
+from chainer_compiler.elichika.parser.utils import clip_head  # noqa
+
+
+_SOURCE = '''
+class A(object):
+    def forward(self, x):
+        return x + %d
+'''
+
+
+def _load_module(tmpdir, value):
+    filename = str(tmpdir.join('source_cache_test_model.py'))
+    with open(filename, 'w') as f:
+        f.write(_SOURCE % value)
+    spec = importlib.util.spec_from_file_location(
+        'source_cache_test_model', filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return filename, module
+
+
+def _constant(tree):
+    return tree.body[0].value.right.value
+
+
+def test_get_source(tmpdir):
+    _, module = _load_module(tmpdir, 1)
+    source, lineno = source_cache.get_source(module.A().forward)
+    assert source == '    def forward(self, x):\n        return x + 1\n'
+    assert lineno == 3
+
+
+def test_cached(tmpdir):
+    _, module = _load_module(tmpdir, 1)
+    tree = source_cache.get_function_ast(module.A.forward, clip_head)
+    assert isinstance(tree, gast.FunctionDef)
+    assert _constant(tree) == 1
+    # Bound methods share the entry of their functions.
+    assert source_cache.get_function_ast(module.A().forward,
+                                         clip_head) is tree
+    canonicalized = source_cache.get_function_ast(
+        module.A.forward, clip_head, canonicalize=True)
+    assert canonicalized is not tree
+
+
+def test_modified(tmpdir):
+    filename, module = _load_module(tmpdir, 1)
+    tree = source_cache.get_function_ast(module.A.forward, clip_head)
+    assert _constant(tree) == 1
+
+    with open(filename, 'w') as f:
+        f.write(_SOURCE % 2)
+    st = os.stat(filename)
+    os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    tree = source_cache.get_function_ast(module.A.forward, clip_head)
+    assert _constant(tree) == 2
+
+
+def test_pickle(tmpdir, monkeypatch):
+    monkeypatch.setattr(source_cache, '_cache_dir', str(tmpdir.join('ast')))
+    _, module = _load_module(tmpdir, 3)
+    tree = source_cache.get_function_ast(module.A.forward, clip_head)
+    assert len(os.listdir(str(tmpdir.join('ast')))) == 1
+
+    def parse(*args):
+        assert False, 'The pickled AST should be used'
+
+    source_cache.clear()
+    monkeypatch.setattr(source_cache, '_parse', parse)
+    loaded = source_cache.get_function_ast(module.A.forward, clip_head)
+    assert loaded is not tree
+    assert gast.dump(loaded) == gast.dump(tree)
+
+
+def test_max_entries(tmpdir, monkeypatch):
+    monkeypatch.setattr(source_cache, 'max_entries', 2)
+    source_cache.clear()
+    _, module = _load_module(tmpdir, 1)
+    funcs = [module.A.forward, _load_module, _constant]
+    trees = [source_cache.get_function_ast(f, clip_head) for f in funcs]
+    assert len(source_cache._sources) == 2
+    assert len(source_cache._asts) == 2
+    # The least recently used entry is evicted.
+    assert source_cache.get_function_ast(funcs[2], clip_head) is trees[2]
+    assert source_cache.get_function_ast(funcs[0], clip_head) is not trees[0]
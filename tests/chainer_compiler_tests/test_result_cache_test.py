@@ -0,0 +1,40 @@
+import os
+import sys
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(project_root, 'scripts'))
+
+from test_result_cache import TestResultCache  # noqa
+
+
+class _TestCase(object):
+    def __init__(self, run_onnx, test_dir):
+        self.name = 'test_add'
+        self.args = [run_onnx, '--test', test_dir]
+        self.test_dir = test_dir
+
+
+def _compute_key(tmpdir, test_case):
+    cache = TestResultCache(str(tmpdir.join('results.json')),
+                            str(tmpdir.join('build')))
+    return cache.compute_key(test_case)
+
+
+def test_compute_key(tmpdir):
+    build_dir = tmpdir.mkdir('build')
+    build_dir.join('tools', 'run_onnx').write('binary', ensure=True)
+    library = build_dir.join('runtime', 'libchainer_compiler_runtime.so')
+    library.write('library 1', ensure=True)
+    test_dir = tmpdir.mkdir('test_add')
+    test_dir.join('model.onnx').write('model')
+    test_case = _TestCase(str(build_dir.join('tools', 'run_onnx')),
+                          str(test_dir))
+
+    key = _compute_key(tmpdir, test_case)
+    assert key is not None
+    assert key == _compute_key(tmpdir, test_case)
+
+    # Rebuilding a linked library invalidates the results.
+    library.write('library 2')
+    assert key != _compute_key(tmpdir, test_case)
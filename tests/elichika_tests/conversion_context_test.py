@@ -0,0 +1,81 @@
+import concurrent.futures
+import unittest
+
+import numpy as np
+
+from chainer_compiler.elichika import chainer2onnx
+from chainer_compiler.elichika import onnx_converters
+from chainer_compiler.elichika.parser import context
+
+from testcases.elichika_tests.model.MLP import MLP
+from testcases.elichika_tests.model.MyLSTM import MyLSTM
+from testcases.elichika_tests.utils import sequence_utils
+
+
+def gen_MLP():
+    np.random.seed(314)
+    out_n = 4
+    batch_size = 10
+    model = MLP(8, out_n)
+    v = np.random.rand(batch_size, 3).astype(np.float32)
+    w = np.random.randint(out_n, size=batch_size)
+    # Initializes parameters of the links whose input sizes are unknown.
+    model(v, w)
+    return model, (v, w)
+
+
+def gen_MyLSTM():
+    np.random.seed(314)
+    batch_size = 3
+    sequence_length = 4
+    num_vocabs = 10
+    num_hidden = 5
+    model = MyLSTM(num_hidden, batch_size, sequence_length)
+    labels, lengths = sequence_utils.gen_random_sequence(
+        batch_size, sequence_length, num_vocabs)
+    xs = []
+    for l in lengths:
+        xs.append(np.random.rand(l, num_hidden).astype(dtype=np.float32))
+    h = np.zeros((batch_size, num_hidden), dtype=np.float32)
+    c = np.zeros((batch_size, num_hidden), dtype=np.float32)
+    mask = (np.expand_dims(np.arange(sequence_length), 0) <
+            np.expand_dims(lengths, 1)).astype(np.float32)
+    return model, [xs, h, c, mask]
+
+
+def convert(model_and_args):
+    model, args = model_and_args
+    onnx_model = chainer2onnx.compile_model(model, args)
+    return onnx_model.model.SerializeToString()
+
+
+class TestConversionContext(unittest.TestCase):
+    def test_concurrent_conversion(self):
+        gens = [gen_MLP, gen_MyLSTM] * 4
+        # Models and inputs are drawn from the global RNG, so they are
+        # built serially and only conversions run concurrently.
+        expected = [convert(gen()) for gen in gens]
+        models_and_args = [gen() for gen in gens]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+            actual = list(pool.map(convert, models_and_args))
+
+        for e, a in zip(expected, actual):
+            self.assertEqual(e, a)
+
+    def test_onnx_names_in_model_context(self):
+        model, args = gen_MLP()
+        onnx_model = chainer2onnx.compile_model(model, args)
+        graph = onnx_model.model.graph
+        input_names = [i.name for i in graph.input]
+
+        with context.conversion_context(onnx_model.context):
+            for value in onnx_model.inputs:
+                self.assertIn(onnx_converters.onnx_name(value), input_names)
+            self.assertEqual(
+                [onnx_converters.onnx_name(v) for v in onnx_model.outputs],
+                [o.name for o in graph.output])
+
+
+if __name__ == '__main__':
+    unittest.main()
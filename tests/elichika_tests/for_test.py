@@ -0,0 +1,40 @@
+import unittest
+
+import chainer
+import numpy as np
+
+from chainer_compiler.elichika import chainer2onnx
+
+
+class ForWithAliases(chainer.Chain):
+    def forward(self, xs, p):
+        q = p
+        h = xs[0]
+        for x in xs:
+            h = h + x * p + q
+        return h
+
+
+def loop_nodes(onnx_model):
+    return [n for n in onnx_model.model.graph.node if n.op_type == 'Loop']
+
+
+class TestFor(unittest.TestCase):
+    def test_read_only_aliases(self):
+        xs = np.random.rand(3, 4).astype(np.float32)
+        onnx_model = chainer2onnx.compile_model(
+            ForWithAliases(), [xs, np.float32(2)])
+        loop, = loop_nodes(onnx_model)
+        body = loop.attribute[0].g
+        # The counter, the condition, the sequence, `h`, `p` (which is
+        # also `q`) and `x`.
+        self.assertEqual(6, len(body.input))
+        self.assertEqual(len(set(i.name for i in body.input)),
+                         len(body.input))
+        self.assertEqual(len(body.input) - 1, len(body.output))
+        self.assertEqual(len(loop.input), len(body.input))
+        self.assertEqual(len(loop.output), len(body.output) - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+import chainer
+import numpy as np
+
+from chainer_compiler.elichika import chainer2onnx
+
+
+class ListCompWithCapture(chainer.Chain):
+    def forward(self, xs, p):
+        q = p * 2
+        return [x * p + q for x in xs]
+
+
+class ListCompOverRange(chainer.Chain):
+    def forward(self, xs, n):
+        return [xs[i][:i] for i in range(n)]
+
+
+def loop_nodes(onnx_model):
+    return [n for n in onnx_model.model.graph.node if n.op_type == 'Loop']
+
+
+class TestListComp(unittest.TestCase):
+    def test_captured_values(self):
+        xs = np.random.rand(3, 4).astype(np.float32)
+        onnx_model = chainer2onnx.compile_model(
+            ListCompWithCapture(), [xs, np.float32(2)])
+        loop, = loop_nodes(onnx_model)
+        body = loop.attribute[0].g
+        # The counter, the condition, the sequence, `p`, `q` and the list.
+        self.assertEqual(6, len(body.input))
+        self.assertEqual(len(body.input) - 1, len(body.output))
+        self.assertEqual(len(loop.input), len(body.input))
+
+    def test_range(self):
+        xs = np.random.rand(10, 20).astype(np.float32)
+        onnx_model = chainer2onnx.compile_model(
+            ListCompOverRange(), [xs, np.int64(5)])
+        self.assertEqual(1, len(loop_nodes(onnx_model)))
+
+
+if __name__ == '__main__':
+    unittest.main()
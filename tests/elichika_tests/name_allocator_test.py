@@ -0,0 +1,40 @@
+import unittest
+
+from chainer_compiler.elichika.parser.context import NameAllocator
+
+
+class TestNameAllocator(unittest.TestCase):
+    def test_allocate(self):
+        allocator = NameAllocator()
+        self.assertEqual('x', allocator.allocate('x'))
+        self.assertEqual('x_1', allocator.allocate('x'))
+        self.assertEqual('x_2', allocator.allocate('x'))
+        self.assertEqual('y', allocator.allocate('y'))
+        self.assertIn('x_1', allocator)
+        self.assertEqual(4, len(allocator))
+
+    def test_skip_used_suffixes(self):
+        allocator = NameAllocator()
+        allocator.reserve('x')
+        allocator.reserve('x_2')
+        self.assertEqual('x_1', allocator.allocate('x'))
+        self.assertEqual('x_3', allocator.allocate('x'))
+        # A base name which looks suffixed gets its own suffixes.
+        self.assertEqual('x_1_1', allocator.allocate('x_1'))
+
+    def test_first_name(self):
+        allocator = NameAllocator()
+        self.assertEqual('noname', allocator.allocate('', 'noname'))
+        self.assertEqual('_1', allocator.allocate('', 'noname'))
+
+    def test_clear(self):
+        allocator = NameAllocator()
+        allocator.allocate('x')
+        allocator.allocate('x')
+        allocator.clear()
+        self.assertEqual('x', allocator.allocate('x'))
+        self.assertEqual('x_1', allocator.allocate('x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import ast, gast
+import inspect
+import sys
+import unittest
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+
+from   chainer_compiler.elichika.parser.utils import clip_head
+from   chainer_compiler.elichika.testtools.type_inference_tools import reset_state
+from   chainer_compiler.elichika.typing.type_inference import InferenceEngine
+
+
+class Block(chainer.Chain):
+    def __init__(self, n):
+        super(Block, self).__init__()
+        with self.init_scope():
+            self.l = L.Linear(n, n)
+
+    def forward(self, x):
+        return F.relu(self.l(x))
+
+
+class Blocks(chainer.Chain):
+    def __init__(self):
+        super(Blocks, self).__init__()
+        with self.init_scope():
+            self.b1 = Block(4)
+            self.b2 = Block(4)
+            self.b3 = Block(4)
+            self.b4 = Block(3)
+
+    def forward(self, x, y):
+        h = self.b3(self.b2(self.b1(x)))
+        return self.b4(y), h
+
+
+class Recorder(chainer.Chain):
+    def __init__(self):
+        super(Recorder, self).__init__()
+        self.last = None
+
+    def forward(self, x):
+        self.last = x
+        return x
+
+
+class Recorders(chainer.Chain):
+    def __init__(self):
+        super(Recorders, self).__init__()
+        with self.init_scope():
+            self.r = Recorder()
+
+    def forward(self, x):
+        return self.r(x), self.r(x)
+
+
+def infer(model, args):
+    reset_state()
+    code = clip_head(inspect.getsource(model.forward))
+    tree = gast.ast_to_gast(ast.parse(code))
+    tc = InferenceEngine(module=sys.modules[model.forward.__module__])
+    tc.infer_function_value_args(tree.body[0], (model,) + args)
+    return tc
+
+
+def call_points(tc):
+    # Returns the inlined FunctionDef of each call point in the order of
+    # calls
+    return [n for ns in tc.subroutine_node.values() for n in ns]
+
+
+class TestFunctionSummary(unittest.TestCase):
+    def test_reuse(self):
+        model = Blocks()
+        x = np.random.rand(2, 4).astype(np.float32)
+        y = np.random.rand(2, 3).astype(np.float32)
+        tc = infer(model, (x, y))
+
+        # b2 and b3 share one summary
+        self.assertEqual(len(tc.function_summaries.summaries), 3)
+
+        func_nodes = call_points(tc)
+        self.assertEqual(len(func_nodes), 4)
+        self.assertEqual(len(set(func_nodes)), 4)
+        for n in func_nodes:
+            self.assertIn(n, tc.nodetype)
+            for m in gast.walk(n):
+                if isinstance(m, gast.Return):
+                    self.assertIn(m, tc.nodetype)
+
+        tys = [str(tc.nodetype[n]) for n in func_nodes]
+        self.assertEqual(tys[0], "class Block -> ndarray(float32, (2, 4)) -> Variable(float32, (2, 4))")
+        self.assertEqual(tys[1], "class Block -> Variable(float32, (2, 4)) -> Variable(float32, (2, 4))")
+        self.assertEqual(tys[2], tys[1])
+        self.assertEqual(tys[3], "class Block -> ndarray(float32, (2, 3)) -> Variable(float32, (2, 3))")
+
+
+    def test_same_result(self):
+        model = Blocks()
+        x = np.random.rand(2, 4).astype(np.float32)
+        y = np.random.rand(2, 3).astype(np.float32)
+        tc1 = infer(model, (x, y))
+
+        # Blocks with different parameters do not share summaries
+        model.b2.l = L.Linear(4, 4, nobias=True)
+        tc2 = infer(model, (x, y))
+        self.assertEqual(len(tc2.function_summaries.summaries), 4)
+
+        for n1, n2 in zip(call_points(tc1), call_points(tc2)):
+            self.assertEqual(str(tc1.nodetype[n1]), str(tc2.nodetype[n2]))
+
+
+    def test_update_attribute(self):
+        model = Recorders()
+        x = np.random.rand(2, 4).astype(np.float32)
+        tc = infer(model, (x,))
+
+        # Recorder.forward updates the type of an attribute of its argument
+        self.assertEqual(len(tc.function_summaries.summaries), 0)
+
+        func_nodes = call_points(tc)
+        self.assertEqual(len(func_nodes), 2)
+        for n in func_nodes:
+            self.assertEqual(str(tc.nodetype[n]), "class Recorder -> ndarray(float32, (2, 4)) -> ndarray(float32, (2, 4))")
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+from copy import deepcopy
+import unittest
+
+from chainer_compiler.elichika.typing.shape_elem import *
+
+
+class TestShapeElem(unittest.TestCase):
+    def test_str(self):
+        a = variable_ShapeElem(10, 'a')
+        b = variable_ShapeElem(10, 'b')
+        self.assertEqual(str(a), "10 (a)")
+        self.assertEqual(str(b // 2), "5 (b // 2)")
+        self.assertEqual(str(a + 3 - 1), "12 (a + 2)")
+        self.assertEqual(str((a + b) * 2), "40 ((a + b) * 2)")
+        self.assertEqual(str(a - (b - 1)), "1 (a - (b - 1))")
+        self.assertEqual(str(ShapeElem(3) + 4), "7")
+
+    def test_hash_consing(self):
+        a = variable_ShapeElem(10, 'a')
+        x = (a * 2 + 1) // 3
+        y = (variable_ShapeElem(10, 'a') * 2 + 1) // 3
+        self.assertIsNot(x, y)
+        self.assertIs(x.expr, y.expr)
+        self.assertIs(deepcopy(x).expr, x.expr)
+        self.assertIsNot(ShapeElem(1).expr, ShapeElem(1.0).expr)
+
+    def test_size(self):
+        a = variable_ShapeElem(10, 'a')
+        b = variable_ShapeElem(10, 'b')
+        self.assertEqual(size_of_ShapeElem(ShapeElem(3)), 0)
+        self.assertEqual(size_of_ShapeElem(a + b * 2), 2)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import unittest
+
+from chainer_compiler.elichika.typing.type_inference import TypeEnv, join_tyenv
+from chainer_compiler.elichika.typing.types import *
+
+
+class TestTypeEnv(unittest.TestCase):
+    def test_fork(self):
+        env = TypeEnv()
+        env['x'] = TyInt(1)
+        env['y'] = TyString()
+        env1 = env.fork()
+        env2 = env1.fork()
+        env['z'] = TyFloat()
+
+        self.assertEqual(env1.updated_keys(), set())
+        x = env2['x']
+        self.assertIsNot(x, env['x'])
+        self.assertEqual(x.value, 1)
+        self.assertNotIn('z', env1)
+        self.assertEqual(env2.updated_keys(), {'x'})
+        self.assertEqual(env.keys_updated_since_fork(), {'z'})
+
+        env2['w'] = TyNone()
+        self.assertNotIn('w', env1)
+        self.assertEqual(env2.keys(), {'x', 'y', 'w'})
+
+    def test_join(self):
+        env = TypeEnv()
+        env['x'] = TyInt(1)
+        env['y'] = TyInt(2)
+        env['z'] = TyInt(3)
+        env1 = env.fork()
+        env2 = env.fork()
+        env1['x'] = TyFloat()
+        env2['x'] = TyInt()
+        env2['w'] = TyString()
+        z = env['z']
+
+        join_tyenv(env, env1, env2)
+        self.assertEqual(str(env['x']), "float")
+        self.assertEqual(env['y'].value, 2)
+        self.assertIs(env['z'], z)
+        self.assertEqual(str(env['w']), "string")
+
+    def test_merge_frozen(self):
+        env = TypeEnv()
+        for i in range(TypeEnv.max_frozen * 2):
+            env['x'] = TyInt(i)
+            env.fork()
+        self.assertLessEqual(len(env.frozen), TypeEnv.max_frozen)
+        self.assertEqual(env['x'].value, TypeEnv.max_frozen * 2 - 1)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 #include <algorithm>
 #include <chrono>
+#include <cmath>
 #include <cstdlib>
 #include <fstream>
 #include <map>
@@ -7,6 +8,8 @@
 #include <set>
 #include <string>
 
+#include <sys/resource.h>
+
 #include <chainerx/array.h>
 #include <chainerx/backprop_mode.h>
 #include <chainerx/context.h>
@@ -14,9 +17,9 @@
 #include <chainerx/numeric.h>
 #include <chainerx/routines/creation.h>
 #include <chainerx/routines/manipulation.h>
+#include <nlohmann/json.hpp>
 
 #include <common/log.h>
-#include <common/protoutil.h>
 #include <common/strutil.h>
 #include <compiler/chxvm/emitter.h>
 #include <compiler/computation_order/core.h>
@@ -62,6 +65,71 @@ void GenerateFixedInput(const Model& model, const std::set<std::string>& initial
     }
 }
 
+double Percentile(const std::vector<double>& sorted, double q) {
+    const double pos = (sorted.size() - 1) * q / 100;
+    const size_t lo = static_cast<size_t>(std::floor(pos));
+    const size_t hi = std::min(lo + 1, sorted.size() - 1);
+    return sorted[lo] + (sorted[hi] - sorted[lo]) * (pos - lo);
+}
+
+// The peak resident set size of this process in bytes, or -1.
+int64_t GetPeakRSS() {
+    struct rusage usage;
+    if (getrusage(RUSAGE_SELF, &usage) != 0) {
+        return -1;
+    }
+#ifdef __APPLE__
+    return usage.ru_maxrss;
+#else
+    // ru_maxrss is in KiB on Linux.
+    return static_cast<int64_t>(usage.ru_maxrss) * 1024;
+#endif
+}
+
+// Statistics of elapsed times. Percentiles, min and max are of all
+// samples. Outliers outside Tukey's fences are only excluded from the
+// mean, the stdev, and the confidence interval of the median.
+// This must be consistent with `summarize` in utils/bench_util.py.
+nlohmann::json SummarizeElapsedTimes(const std::vector<double>& elapsed_times) {
+    CHECK(!elapsed_times.empty());
+    std::vector<double> sorted(elapsed_times);
+    std::sort(sorted.begin(), sorted.end());
+    std::vector<double> kept(sorted);
+    if (kept.size() >= 4) {
+        const double q1 = Percentile(sorted, 25);
+        const double q3 = Percentile(sorted, 75);
+        const double lo = q1 - 1.5 * (q3 - q1);
+        const double hi = q3 + 1.5 * (q3 - q1);
+        kept.erase(std::remove_if(kept.begin(), kept.end(), [lo, hi](double v) { return v < lo || hi < v; }), kept.end());
+    }
+
+    const size_t n = kept.size();
+    double mean = 0;
+    for (double v : kept) mean += v;
+    mean /= n;
+    double variance = 0;
+    for (double v : kept) variance += (v - mean) * (v - mean);
+    const double stdev = n > 1 ? std::sqrt(variance / (n - 1)) : 0;
+
+    // A distribution-free 95% confidence interval of the median.
+    const double z = 1.96;
+    const int64_t ci_lo = std::max<int64_t>(std::floor((n - z * std::sqrt(n)) / 2), 1);
+    const int64_t ci_hi = std::min<int64_t>(std::ceil(1 + (n + z * std::sqrt(n)) / 2), n);
+
+    nlohmann::json stats;
+    stats["num_samples"] = sorted.size();
+    stats["num_outliers"] = sorted.size() - n;
+    stats["mean"] = mean;
+    stats["stdev"] = stdev;
+    stats["min"] = sorted.front();
+    stats["max"] = sorted.back();
+    stats["p50"] = Percentile(sorted, 50);
+    stats["p90"] = Percentile(sorted, 90);
+    stats["p99"] = Percentile(sorted, 99);
+    stats["p50_ci95"] = {kept[ci_lo - 1], kept[ci_hi - 1]};
+    return stats;
+}
+
 chainerx::Array StageArray(chainerx::Array a) {
     // TODO(hamaji): Figure out a better way to identify host inputs.
     if (a.dtype() != chainerx::Dtype::kInt64) return a.ToDevice(chainerx::GetDefaultDevice());
@@ -253,6 +321,12 @@ public:
         return num_unknown_ops_ ? 0 : flops_;
     }
 
+    // Returns the peak memory usage observed after runs, or -1 if memory
+    // usage is not available.
+    int64_t peak_used_bytes() const {
+        return peak_used_bytes_;
+    }
+
     const std::vector<std::string>& ordered_output_names() const {
         return ordered_output_names_;
     }
@@ -262,9 +336,10 @@ private:
         return args_.exist("verbose") ? 2 : args_.exist("trace") ? 1 : 0;
     }
 
-    void MaybeShowGPUMemory() const {
+    void MaybeShowGPUMemory() {
         if (initial_used_bytes_ >= 0) {
             size_t used_bytes = GetUsedMemory() - initial_used_bytes_;
+            peak_used_bytes_ = std::max<int64_t>(peak_used_bytes_, used_bytes);
             size_t param_mbs = param_bytes_ / 1000 / 1000;
             size_t used_mbs = used_bytes / 1000 / 1000;
             LOG() << "GPU memory: param=" << param_mbs << "MB used=" << used_mbs << "MB" << std::endl;
@@ -277,6 +352,7 @@ private:
     InOuts params_;
     const int64_t initial_used_bytes_;
     int64_t param_bytes_;
+    int64_t peak_used_bytes_{-1};
 
     std::unique_ptr<ChxVM> chxvm_bp_;
     std::vector<std::string> backprop_ins_;
@@ -296,6 +372,7 @@ void RunMain(const std::vector<std::string>& argv) {
     args.add<std::string>("dump_outputs_dir", '\0', "Dump each output of ChxVM ops to this directory", false);
     args.add<std::string>("report_json", '\0', "Dump report in a JSON", false);
     args.add<int>("iterations", 'I', "The number of iteartions", false, 1);
+    args.add<int>("warmup", '\0', "The number of iterations excluded from timings when --iterations > 1", false, 1);
     args.add<double>("rtol", '\0', "rtol of AllClose", false, 1e-4);
     args.add<double>("atol", '\0', "atol of AllClose", false, 1e-6);
     args.add("equal_nan", '\0', "Treats NaN equal");
@@ -366,7 +443,7 @@ void RunMain(const std::vector<std::string>& argv) {
     RegisterCustomOnnxOperatorSetSchema();
     std::unique_ptr<Model> model;
     {
-        onnx::ModelProto xmodel(LoadLargeProto<onnx::ModelProto>(onnx_path));
+        onnx::ModelProto xmodel(LoadModelProto(onnx_path));
         model.reset(new Model(xmodel));
     }
 
@@ -410,13 +487,14 @@ void RunMain(const std::vector<std::string>& argv) {
         test_cases.swap(new_test_cases);
     }
 
+    std::chrono::system_clock::time_point compile_start = std::chrono::system_clock::now();
     ModelRunner model_runner(args, initial_used_bytes, std::move(model));
+    double compile_elapsed =
+            std::chrono::duration_cast<std::chrono::microseconds>(std::chrono::system_clock::now() - compile_start).count() * 0.001;
 
     if (args.exist("compile_only")) return;
 
     std::vector<double> elapsed_times;
-    double total_elapsed = 0;
-    double best_elapsed = 0;
     int test_cnt = 0;
     for (const std::unique_ptr<TestCase>& test_case : test_cases) {
         LOG() << "Running for " << test_case->name << std::endl;
@@ -465,36 +543,76 @@ void RunMain(const std::vector<std::string>& argv) {
         double elapsed = std::chrono::duration_cast<std::chrono::microseconds>(end - start).count() * 0.001;
         LOG() << "Elapsed: " << elapsed << " msec" << std::endl;
 
-        // The first iteration is for warm up.
-        if (test_case != test_cases.front()) total_elapsed += elapsed;
-        if (best_elapsed == 0 || best_elapsed > elapsed) best_elapsed = elapsed;
         elapsed_times.push_back(elapsed);
     }
     if (test_cnt) LOG() << GREEN << "OK!" << RESET << std::endl;
 
+    const double first_elapsed = elapsed_times.empty() ? 0 : elapsed_times.front();
     if (elapsed_times.size() > 1) {
-        elapsed_times.erase(elapsed_times.begin());
+        // Leading iterations are for warm up.
+        const int warmup = std::min<int>(std::max(args.get<int>("warmup"), 0), elapsed_times.size() - 1);
+        elapsed_times.erase(elapsed_times.begin(), elapsed_times.begin() + warmup);
     }
 
+    nlohmann::json stats;
     if (iterations > 1) {
-        // The first iteration is for warm up.
-        double average_elapsed = total_elapsed / (iterations - 1);
+        stats = SummarizeElapsedTimes(elapsed_times);
+        // The average excludes outliers while the best is of all iterations.
+        const double average_elapsed = stats["mean"];
+        const double best_elapsed = stats["min"];
+        const int num_outliers = stats["num_outliers"];
         if (int64_t flops = model_runner.flops()) {
             double average_gflops_sec = flops / average_elapsed / 1000 / 1000;
-            std::cerr << "Average elapsed: " << average_elapsed << " msec (" << average_gflops_sec << " GFLOPs/sec)" << std::endl;
+            std::cerr << "Average elapsed: " << average_elapsed << " msec (" << average_gflops_sec << " GFLOPs/sec, " << num_outliers
+                      << " outliers excluded)" << std::endl;
             double best_gflops_sec = flops / best_elapsed / 1000 / 1000;
             std::cerr << "Best elapsed: " << best_elapsed << " msec (" << best_gflops_sec << " GFLOPs/sec)" << std::endl;
         } else {
-            std::cerr << "Average elapsed: " << average_elapsed << " msec" << std::endl;
+            std::cerr << "Average elapsed: " << average_elapsed << " msec (" << num_outliers << " outliers excluded)" << std::endl;
             std::cerr << "Best elapsed: " << best_elapsed << " msec" << std::endl;
         }
+        std::cerr << "Percentiles: p50=" << stats["p50"] << " p90=" << stats["p90"] << " p99=" << stats["p99"]
+                  << " msec (p50 CI95=" << stats["p50_ci95"] << ")" << std::endl;
     }
 
     const std::string& report_json = args.get<std::string>("report_json");
     if (!report_json.empty()) {
+        nlohmann::json report;
+        report["elapsed_times"] = elapsed_times;
+        report["warmup"] = iterations > 1 ? iterations - static_cast<int>(elapsed_times.size()) : 0;
+        report["compile_time"] = compile_elapsed;
+        report["first_run_time"] = first_elapsed;
+        if (iterations > 1) {
+            // The median of iterations after the warm up.
+            std::vector<double> sorted(elapsed_times);
+            std::sort(sorted.begin(), sorted.end());
+            report["steady_time"] = sorted[sorted.size() / 2];
+            report["stats"] = stats;
+        } else {
+            report["steady_time"] = nullptr;
+            report["stats"] = nullptr;
+        }
+        const int64_t peak_rss = GetPeakRSS();
+        if (peak_rss >= 0) {
+            report["peak_rss"] = peak_rss;
+        } else {
+            report["peak_rss"] = nullptr;
+        }
+        int64_t peak_memory = g_meminfo_enabled && args.exist("trace") ? GetPeakMemory() : model_runner.peak_used_bytes();
+        if (peak_memory < 0) {
+            // The used memory is only known for CUDA. The peak RSS of
+            // this process is an upper bound of the memory of the model.
+            peak_memory = peak_rss;
+        }
+        if (peak_memory >= 0) {
+            report["peak_memory"] = peak_memory;
+        } else {
+            report["peak_memory"] = nullptr;
+        }
+        report["flops"] = model_runner.flops();
         std::ofstream ofs(report_json);
-        // TODO(hamaji): Output more information using nlohmann/json.
-        ofs << "{\"elapsed_times\": [ " << JoinString(MapToString(elapsed_times, [](double t) { return StrCat(t); })) << " ]}";
+        CHECK(ofs) << "Failed to open report JSON: " << report_json;
+        ofs << report.dump();
     }
 }
 
@@ -104,6 +104,7 @@ void ReadTestDir(
             // Ignore some files for test data like MobileNet v2
             if (HasPrefix(*SplitString(tensor_pb, "/").rbegin(), "._")) continue;
             onnx::TensorProto xtensor(LoadLargeProto<onnx::TensorProto>(tensor_pb));
+            ResolveExternalDataLocations(data_set_dir, &xtensor);
             chainerx::Array tensor(MakeArrayFromONNX(xtensor));
             all_tensors.emplace_back(Basename(tensor_pb), xtensor.name(), tensor);
         }
@@ -13,7 +13,6 @@
 #include <chainerx/routines/manipulation.h>
 
 #include <common/log.h>
-#include <common/protoutil.h>
 #include <common/strutil.h>
 #include <compiler/chxvm/emitter.h>
 #include <compiler/custom_onnx_ops.h>
@@ -97,7 +96,7 @@ void RunMain(const std::vector<std::string>& argv) {
 
     LOG() << "Constructing model..." << std::endl;
     RegisterCustomOnnxOperatorSetSchema();
-    onnx::ModelProto xmodel(LoadLargeProto<onnx::ModelProto>(args.rest()[0]));
+    onnx::ModelProto xmodel(LoadModelProto(args.rest()[0]));
     Model model(xmodel);
     const bool expects_onehot = ExpectsOnehot(model);
     CHECK_EQ(1, model.graph().output_values().size());
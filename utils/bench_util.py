@@ -0,0 +1,179 @@
+"""A harness to measure the steady-state latency of a function.
+
+`run_onnx_util.run_benchmark` of all backend runners uses this so their
+numbers are comparable with each other and with `run_onnx`. Statistics
+are computed in the same way as `SummarizeElapsedTimes` in
+tools/run_onnx.cc, and `elapsed_times`, `warmup`, `steady_time` and
+`stats` of reports mean the same as those of `run_onnx --report_json`.
+"""
+
+import json
+import math
+import os
+import resource
+import sys
+import time
+
+
+if hasattr(time, 'perf_counter_ns'):
+    _now_ns = time.perf_counter_ns
+else:
+    def _now_ns():
+        return int(time.perf_counter() * 1e9)
+
+
+def parse_cpus(spec):
+    """Parses a list of CPUs like "0,2-3" into [0, 2, 3]."""
+    cpus = []
+    for tok in spec.split(','):
+        if '-' in tok:
+            first, last = tok.split('-')
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(tok))
+    return cpus
+
+
+def pin_cpus(spec):
+    """Pins this process to CPUs specified like "0,2-3"."""
+    if not hasattr(os, 'sched_setaffinity'):
+        sys.stderr.write('CPU pinning is not supported on %s\n' %
+                         sys.platform)
+        return
+    os.sched_setaffinity(0, parse_cpus(spec))
+
+
+def percentile(sorted_values, q):
+    """Returns the `q`-th percentile with linear interpolation."""
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = int(math.floor(pos))
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (
+        pos - lo)
+
+
+def median_confidence_interval(sorted_values, z=1.96):
+    """Returns a distribution-free confidence interval of the median.
+
+    The bounds are order statistics around the median, which does not
+    assume latencies to be normally distributed.
+    """
+    n = len(sorted_values)
+    lo = int(math.floor((n - z * math.sqrt(n)) / 2))
+    hi = int(math.ceil(1 + (n + z * math.sqrt(n)) / 2))
+    lo = max(lo, 1)
+    hi = min(hi, n)
+    return sorted_values[lo - 1], sorted_values[hi - 1]
+
+
+def reject_outliers(values, k=1.5):
+    """Returns `values` within Tukey's fences and the number of others."""
+    if len(values) < 4:
+        return list(values), 0
+    sorted_values = sorted(values)
+    q1 = percentile(sorted_values, 25)
+    q3 = percentile(sorted_values, 75)
+    lo = q1 - k * (q3 - q1)
+    hi = q3 + k * (q3 - q1)
+    kept = [v for v in values if lo <= v <= hi]
+    return kept, len(values) - len(kept)
+
+
+def summarize(elapsed_times):
+    """Returns statistics of `elapsed_times`.
+
+    Percentiles, `min` and `max` are of all samples, so tail latencies
+    are kept. Outliers outside Tukey's fences are only excluded from
+    `mean`, `stdev` and the confidence interval of the median.
+    """
+    sorted_times = sorted(elapsed_times)
+    kept, num_outliers = reject_outliers(sorted_times)
+    n = len(kept)
+    mean = sum(kept) / n
+    if n > 1:
+        stdev = math.sqrt(sum((v - mean) ** 2 for v in kept) / (n - 1))
+    else:
+        stdev = 0.0
+    return {
+        'num_samples': len(sorted_times),
+        'num_outliers': num_outliers,
+        'mean': mean,
+        'stdev': stdev,
+        'min': sorted_times[0],
+        'max': sorted_times[-1],
+        'p50': percentile(sorted_times, 50),
+        'p90': percentile(sorted_times, 90),
+        'p99': percentile(sorted_times, 99),
+        'p50_ci95': list(median_confidence_interval(kept)),
+    }
+
+
+def _current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def _peak_rss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux.
+    if sys.platform == 'darwin':
+        return peak
+    return peak * 1024
+
+
+def measure(fn, iterations, warmup=0, sync=None):
+    """Runs `fn` `warmup` + `iterations` times and returns a report.
+
+    Only the last `iterations` runs are timed, in milliseconds. `sync`
+    is called in the timed region after each run, e.g. to wait for
+    kernels of a GPU. The resident memory is sampled between runs.
+    """
+    for _ in range(warmup):
+        fn()
+        if sync is not None:
+            sync()
+
+    elapsed_times = []
+    max_rss = _current_rss()
+    for _ in range(iterations):
+        start = _now_ns()
+        fn()
+        if sync is not None:
+            sync()
+        elapsed_times.append((_now_ns() - start) / 1e6)
+        rss = _current_rss()
+        if rss is not None and (max_rss is None or rss > max_rss):
+            max_rss = rss
+
+    report = {
+        'elapsed_times': elapsed_times,
+        'warmup': warmup,
+        'steady_time': None,
+        'stats': None,
+        'max_sampled_rss': max_rss,
+        'peak_rss': _peak_rss(),
+    }
+    if elapsed_times:
+        # The median as `steady_time` of run_onnx.
+        sorted_times = sorted(elapsed_times)
+        report['steady_time'] = sorted_times[len(sorted_times) // 2]
+        report['stats'] = summarize(elapsed_times)
+    return report
+
+
+def format_stats(stats):
+    return ('%.3f msec (p90=%.3f p99=%.3f mean=%.3f+-%.3f '
+            'CI95=[%.3f, %.3f] n=%d outliers=%d)' % (
+                stats['p50'], stats['p90'], stats['p99'],
+                stats['mean'], stats['stdev'],
+                stats['p50_ci95'][0], stats['p50_ci95'][1],
+                stats['num_samples'], stats['num_outliers']))
+
+
+def write_report(filename, report):
+    with open(filename, 'w') as f:
+        json.dump(report, f)
@@ -9,7 +9,7 @@ import onnx.numpy_helper
 import run_onnx_util
 
 
-def inference(args, model_xml, model_bin, inputs, outputs):
+def inference(args, model_xml, model_bin, data_sets):
     from openvino.inference_engine import IENetwork
     from openvino.inference_engine import IEPlugin
     plugin = IEPlugin(device=args.device, plugin_dirs=args.plugin_dir)
@@ -31,29 +31,39 @@ def inference(args, model_xml, model_bin, inputs, outputs):
                       '--cpu-extension command line argument')
             sys.exis(1)
 
-    assert len(net.inputs) == len(inputs)
-    ie_inputs = {}
-    for item in inputs:
-        assert item[0] in set(net.inputs.keys())
-        ie_inputs[item[0]] = item[1]
-
     log.info('Loading model to the plugin')
     exec_net = plugin.load(network=net)
 
-    res = exec_net.infer(inputs=ie_inputs)
-
-    assert len(res) == len(outputs)
-    for name, output in outputs:
-        assert name in res
-        actual_output = res[name]
-        np.testing.assert_allclose(output, actual_output, rtol=1e-3, atol=1e-4)
-        log.info('{}: OK'.format(name))
+    for data_set in data_sets:
+        inputs = data_set.inputs
+        outputs = data_set.outputs
+
+        assert len(net.inputs) == len(inputs)
+        ie_inputs = {}
+        for item in inputs:
+            assert item[0] in set(net.inputs.keys())
+            ie_inputs[item[0]] = item[1]
+
+        res = exec_net.infer(inputs=ie_inputs)
+
+        assert len(res) == len(outputs)
+        for name, output in outputs:
+            assert name in res
+            actual_output = res[name]
+            np.testing.assert_allclose(output, actual_output, rtol=1e-3, atol=1e-4)
+            log.info('{}: OK'.format(name))
+        data_set.release()
     log.info('ALL OK')
 
+    # The first data set is used for the benchmark.
+    ie_inputs = dict(data_sets[0].inputs)
+
     def compute():
         exec_net.infer(inputs=ie_inputs)
 
-    return run_onnx_util.run_benchmark(compute, args.iterations)
+    return run_onnx_util.run_benchmark(
+        compute, args.iterations, warmup=args.warmup,
+        report_json=args.report_json)
 
 
 def run(args):
@@ -63,9 +73,8 @@ def run(args):
     onnx_filename = run_onnx_util.onnx_model_file(test_dir, args.model_file)
     input_names, output_names = run_onnx_util.onnx_input_output_names(
         onnx_filename)
-    test_data_dir = os.path.join(test_dir, 'test_data_set_0')
-    inputs, outputs = run_onnx_util.load_test_data(
-        test_data_dir, input_names, output_names)
+    data_sets = list(run_onnx_util.test_data_sets(
+        test_dir, input_names, output_names))
 
     mo_output_dir = os.path.join('out', 'dldt_{}.{}'.format(
         test_dir_name, args.data_type.lower()))
@@ -90,7 +99,7 @@ def run(args):
             stream=sys.stdout)
 
     # compute inference engine
-    return inference(args, mo_model_xml, mo_model_bin, inputs, outputs)
+    return inference(args, mo_model_xml, mo_model_bin, data_sets)
 
 
 def get_args(args=None):
@@ -100,6 +109,7 @@ def get_args(args=None):
     parser.add_argument('--debug', '-g', action='store_true')
     parser.add_argument('--force_mo', action='store_true')
     parser.add_argument('--iterations', '-I', type=int, default=1)
+    run_onnx_util.add_benchmark_args(parser)
     # for inference-engine
     parser.add_argument(
         '--device', choices=['CPU', 'GPU', 'MYRIAD'], default='CPU')
@@ -145,6 +155,7 @@ def main():
 
     """
     args = get_args()
+    run_onnx_util.setup_benchmark(args)
     run(args)
 
 
@@ -1,6 +1,5 @@
 import argparse
 import logging
-import os
 import sys
 import time
 
@@ -16,28 +15,34 @@ def run(args):
     onnx_filename = run_onnx_util.onnx_model_file(args.test_dir, args.model_file)
     input_names, output_names = run_onnx_util.onnx_input_output_names(
         onnx_filename)
-    test_data_dir = os.path.join(args.test_dir, 'test_data_set_0')
-    inputs, outputs = run_onnx_util.load_test_data(
-        test_data_dir, input_names, output_names)
 
     sess = rt.InferenceSession(onnx_filename)
 
-    inputs = dict(inputs)
-    outputs = [v for n, v in outputs]
+    data_sets = list(run_onnx_util.test_data_sets(
+        args.test_dir, input_names, output_names))
+    for data_set in data_sets:
+        inputs = dict(data_set.inputs)
+        outputs = [v for n, v in data_set.outputs]
 
-    actual_outputs = sess.run(output_names, inputs)
+        actual_outputs = sess.run(output_names, inputs)
 
-    for i, (name, expected, actual) in enumerate(
-            zip(output_names, outputs, actual_outputs)):
-        np.testing.assert_allclose(expected, actual,
-                                   rtol=1e-3, atol=1e-4), name
-        print('%s: OK' % name)
+        for i, (name, expected, actual) in enumerate(
+                zip(output_names, outputs, actual_outputs)):
+            np.testing.assert_allclose(expected, actual,
+                                       rtol=1e-3, atol=1e-4), name
+            print('%s: OK' % name)
+        data_set.release()
     print('ALL OK')
 
+    # The first data set is used for the benchmark.
+    inputs = dict(data_sets[0].inputs)
+
     def compute():
         sess.run(output_names, inputs)
 
-    return run_onnx_util.run_benchmark(compute, args.iterations)
+    return run_onnx_util.run_benchmark(
+        compute, args.iterations, warmup=args.warmup,
+        report_json=args.report_json)
 
 
 def get_args(args=None):
@@ -46,12 +51,14 @@ def get_args(args=None):
     parser.add_argument('--backend', '-b', default='CPU')
     parser.add_argument('--debug', '-g', action='store_true')
     parser.add_argument('--iterations', '-I', type=int, default=1)
+    run_onnx_util.add_benchmark_args(parser)
     parser.add_argument('--model_file', default=None)
     return parser.parse_args(args=args)
 
 
 def main():
     args = get_args()
+    run_onnx_util.setup_benchmark(args)
 
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
@@ -1,6 +1,5 @@
 import argparse
 import logging
-import os
 import sys
 
 import chainer
@@ -30,9 +29,10 @@ def run(args):
     onnx_filename = run_onnx_util.onnx_model_file(args.test_dir, args.model_file)
     input_names, output_names = run_onnx_util.onnx_input_output_names(
         onnx_filename)
-    test_data_dir = os.path.join(args.test_dir, 'test_data_set_0')
-    inputs, outputs = run_onnx_util.load_test_data(
-        test_data_dir, input_names, output_names)
+    data_sets = list(run_onnx_util.test_data_sets(
+        args.test_dir, input_names, output_names))
+    inputs = data_sets[0].inputs
+    outputs = data_sets[0].outputs
 
     with open(onnx_filename, 'rb') as f:
         onnx_proto = f.read()
@@ -64,31 +64,41 @@ def run(args):
         i += len(inputs)
         assert output.shape[1:] == engine.get_binding_shape(i)
 
-    inputs = [v for n, v in inputs]
-    outputs = [v for n, v in outputs]
-    gpu_inputs = to_gpu(inputs)
+    gpu_inputs = to_gpu([v for n, v in inputs])
     gpu_outputs = []
-    for output in outputs:
+    for _, output in outputs:
         gpu_outputs.append(cupy.zeros_like(cupy.array(output)))
     bindings = [a.data.ptr for a in gpu_inputs]
     bindings += [a.data.ptr for a in gpu_outputs]
 
-    context.execute(args.batch_size, bindings)
+    for data_set in data_sets:
+        # Data sets share the bound buffers, which hold the inputs of the
+        # last one in the benchmark.
+        for gpu_input, (_, input) in zip(gpu_inputs, data_set.inputs):
+            gpu_input.set(input)
+        outputs = [v for n, v in data_set.outputs]
 
-    actual_outputs = to_cpu(gpu_outputs)
+        context.execute(args.batch_size, bindings)
+
+        actual_outputs = to_cpu(gpu_outputs)
 
-    for i, (name, expected, actual) in enumerate(
-            zip(output_names, outputs, actual_outputs)):
-        np.testing.assert_allclose(expected, actual,
-                                   rtol=args.rtol, atol=args.atol), name
-        print('%s: OK' % name)
+        for i, (name, expected, actual) in enumerate(
+                zip(output_names, outputs, actual_outputs)):
+            np.testing.assert_allclose(expected, actual,
+                                       rtol=args.rtol, atol=args.atol), name
+            print('%s: OK' % name)
+        data_set.release()
     print('ALL OK')
 
     def compute():
         context.execute(args.batch_size, bindings)
+
+    def sync():
         cupy.cuda.device.Device().synchronize()
 
-    return run_onnx_util.run_benchmark(compute, args.iterations)
+    return run_onnx_util.run_benchmark(
+        compute, args.iterations, warmup=args.warmup, sync=sync,
+        report_json=args.report_json)
 
 
 def get_args(args=None):
@@ -97,6 +107,7 @@ def get_args(args=None):
     parser.add_argument('--batch_size', type=int, default=1)
     parser.add_argument('--debug', '-g', action='store_true')
     parser.add_argument('--iterations', '-I', type=int, default=1)
+    run_onnx_util.add_benchmark_args(parser)
     parser.add_argument('--fp16_mode', action='store_true')
     parser.add_argument('--rtol', type=float, default=1e-3)
     parser.add_argument('--atol', type=float, default=1e-4)
@@ -106,6 +117,7 @@ def get_args(args=None):
 
 def main():
     args = get_args()
+    run_onnx_util.setup_benchmark(args)
 
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
@@ -1,6 +1,5 @@
 import argparse
 import logging
-import os
 import sys
 
 import numpy as np
@@ -16,41 +15,49 @@ def run(args):
     onnx_filename = run_onnx_util.onnx_model_file(args.test_dir, args.model_file)
     input_names, output_names = run_onnx_util.onnx_input_output_names(
         onnx_filename)
-    test_data_dir = os.path.join(args.test_dir, 'test_data_set_0')
-    inputs, outputs = run_onnx_util.load_test_data(
-        test_data_dir, input_names, output_names)
 
     model = onnx.load(onnx_filename)
     tf_model = onnx_tf.backend.prepare(model)
 
-    inputs = dict(inputs)
-    outputs = dict(outputs)
-    actual_outputs = tf_model.run(inputs)
+    data_sets = list(run_onnx_util.test_data_sets(
+        args.test_dir, input_names, output_names))
+    for data_set in data_sets:
+        inputs = dict(data_set.inputs)
+        outputs = dict(data_set.outputs)
+        actual_outputs = tf_model.run(inputs)
 
-    for name in output_names:
-        expected = outputs[name]
-        actual = actual_outputs[name]
-        np.testing.assert_allclose(expected, actual,
-                                   rtol=1e-3, atol=1e-4), name
-        print('%s: OK' % name)
+        for name in output_names:
+            expected = outputs[name]
+            actual = actual_outputs[name]
+            np.testing.assert_allclose(expected, actual,
+                                       rtol=1e-3, atol=1e-4), name
+            print('%s: OK' % name)
+        data_set.release()
     print('ALL OK')
 
+    # The first data set is used for the benchmark.
+    inputs = dict(data_sets[0].inputs)
+
     def compute():
         tf_model.run(inputs)
 
-    return run_onnx_util.run_benchmark(compute, args.iterations)
+    return run_onnx_util.run_benchmark(
+        compute, args.iterations, warmup=args.warmup,
+        report_json=args.report_json)
 
 
 def get_args(args=None):
     parser = argparse.ArgumentParser(description='Run ONNX by nGraph')
     parser.add_argument('test_dir')
     parser.add_argument('--iterations', '-I', type=int, default=1)
+    run_onnx_util.add_benchmark_args(parser)
     parser.add_argument('--model_file', default=None)
     return parser.parse_args(args=args)
 
 
 def main():
     args = get_args()
+    run_onnx_util.setup_benchmark(args)
     run(args)
 
 
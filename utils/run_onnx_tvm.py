@@ -110,11 +110,10 @@ def run(args):
     input_names, output_names = run_onnx_util.onnx_input_output_names(
         os.path.join(args.test_dir, args.model_file))
 
-    test_data_dir = os.path.join(args.test_dir, 'test_data_set_0')
-    inputs, outputs = run_onnx_util.load_test_data(
-        test_data_dir, input_names, output_names)
-
-    inputs = dict(inputs)
+    data_sets = list(run_onnx_util.test_data_sets(
+        args.test_dir, input_names, output_names))
+    # The graph is built for the shapes of the first data set.
+    inputs = dict(data_sets[0].inputs)
     graph_module = None
     if args.frontend == 'nnvm':
         graph_module = build_graph_nnvm(args, ctx, onnx_model, inputs, input_names)
@@ -123,21 +122,29 @@ def run(args):
     else:
         raise RuntimeError('Invalid frontend: {}'.format(args.frontend))
 
-    graph_module.run()
+    for data_set in data_sets:
+        # The inputs of the last data set stay set in the benchmark.
+        set_inputs(graph_module, ctx, dict(data_set.inputs), {})
+        graph_module.run()
 
-    for i, (name, expected) in enumerate(outputs):
-        tvm_output = tvm.nd.empty(expected.shape, expected.dtype, ctx=ctx)
-        actual = graph_module.get_output(i, tvm_output).asnumpy()
-        np.testing.assert_allclose(expected, actual,
-                                   rtol=1e-3, atol=1e-4), name
-        print('%s: OK' % name)
+        for i, (name, expected) in enumerate(data_set.outputs):
+            tvm_output = tvm.nd.empty(expected.shape, expected.dtype, ctx=ctx)
+            actual = graph_module.get_output(i, tvm_output).asnumpy()
+            np.testing.assert_allclose(expected, actual,
+                                       rtol=1e-3, atol=1e-4), name
+            print('%s: OK' % name)
+        data_set.release()
     print('ALL OK')
 
     def compute():
         graph_module.run()
+
+    def sync():
         cupy.cuda.device.Device().synchronize()
 
-    return run_onnx_util.run_benchmark(compute, args.iterations)
+    return run_onnx_util.run_benchmark(
+        compute, args.iterations, warmup=args.warmup, sync=sync,
+        report_json=args.report_json)
 
 
 def get_args(args=None):
@@ -148,6 +155,7 @@ def get_args(args=None):
     parser.add_argument('--target', type=str, default='cuda')
     parser.add_argument('--debug', '-g', action='store_true')
     parser.add_argument('--iterations', '-I', type=int, default=1)
+    run_onnx_util.add_benchmark_args(parser)
     parser.add_argument('--opt_level', '-O', type=int, default=3)
     parser.add_argument('--autotvm_log', type=str)
     parser.add_argument('--model_file', default=None)
@@ -156,6 +164,7 @@ def get_args(args=None):
 
 def main():
     args = get_args()
+    run_onnx_util.setup_benchmark(args)
 
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
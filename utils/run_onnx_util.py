@@ -1,56 +1,313 @@
 import glob
+import mmap
 import onnx
+import onnx.external_data_helper
 import os
-import time
 
+import numpy as np
 
-def run_benchmark(fn, iterations):
-    elapsed_times = []
-    if iterations > 1:
-        num_iterations = iterations - 1
-        for t in range(num_iterations):
-            start = time.time()
-            fn()
-            elapsed_times.append(time.time() - start)
-        print('Elapsed: %.3f msec' % (sum(elapsed_times) * 1000 / num_iterations))
-    return elapsed_times
+import bench_util
 
 
-def load_test_data(data_dir, input_names, output_names):
-    inout_values = []
-    for kind, names in [('input', input_names), ('output', output_names)]:
-        names = list(names)
-        values = []
-        for pb in sorted(glob.glob(os.path.join(data_dir, '%s_*.pb' % kind))):
-            with open(pb, 'rb') as f:
+def add_benchmark_args(parser):
+    """Adds options of the benchmark to `parser` of a backend runner."""
+    parser.add_argument('--warmup', type=int, default=0,
+                        help='The number of untimed runs after the first '
+                        'run checking outputs')
+    parser.add_argument('--cpus', default=None,
+                        help='Pin the process to CPUs such as "0,2-3"')
+    parser.add_argument('--report_json', default=None,
+                        help='Dump statistics of the benchmark in a JSON')
+
+
+def setup_benchmark(args):
+    """Applies options added by `add_benchmark_args`.
+
+    This should be called before backends start their threads, which
+    inherit the CPU affinity.
+    """
+    if args.cpus is not None:
+        bench_util.pin_cpus(args.cpus)
+
+
+def run_benchmark(fn, iterations, warmup=0, sync=None, report_json=None):
+    """Measures `fn` after the first run done by the caller.
+
+    As `--iterations` of run_onnx, `iterations` includes the first run,
+    so `fn` is timed `iterations - 1` times after `warmup` extra runs.
+    """
+    report = bench_util.measure(fn, max(iterations - 1, 0), warmup=warmup,
+                                sync=sync)
+    if report['stats'] is not None:
+        print('Elapsed: %s' % bench_util.format_stats(report['stats']))
+    if report_json is not None:
+        bench_util.write_report(report_json, report)
+    return report
+
+
+# Field numbers in onnx.proto which are decoded without parsing whole
+# messages.
+_MODEL_GRAPH = 7
+_GRAPH_INITIALIZER = 5
+_GRAPH_INPUT = 11
+_GRAPH_OUTPUT = 12
+_TENSOR_DIMS = 1
+_TENSOR_DATA_TYPE = 2
+_TENSOR_NAME = 8
+_TENSOR_RAW_DATA = 9
+_TENSOR_EXTERNAL_DATA = 13
+_TENSOR_DATA_LOCATION = 14
+_STRING_STRING_ENTRY_KEY = 1
+_STRING_STRING_ENTRY_VALUE = 2
+_VALUE_INFO_NAME = 1
+
+_WIRE_VARINT = 0
+_WIRE_LENGTH_DELIMITED = 2
+
+
+def _read_varint(buf, pos):
+    value = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        value |= (b & 0x7f) << shift
+        if not b & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _proto_fields(buf, pos, end):
+    """Yields (field number, wire type, value) of a serialized message.
+
+    The value is an integer for varints and a (start, end) range in `buf`
+    for length-delimited fields, which are skipped without being read.
+    """
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == _WIRE_VARINT:
+            value, pos = _read_varint(buf, pos)
+            yield field, wire_type, value
+        elif wire_type == 1:
+            pos += 8
+        elif wire_type == _WIRE_LENGTH_DELIMITED:
+            size, pos = _read_varint(buf, pos)
+            yield field, wire_type, (pos, pos + size)
+            pos += size
+        elif wire_type == 5:
+            pos += 4
+        else:
+            raise RuntimeError('Unsupported wire type: %d' % wire_type)
+
+
+def _proto_name(buf, start, end, name_field):
+    for field, _, value in _proto_fields(buf, start, end):
+        if field == name_field:
+            return buf[value[0]:value[1]].decode('utf-8')
+    return ''
+
+
+def _proto_string_map(buf, start, end):
+    key = ''
+    value = ''
+    for field, _, v in _proto_fields(buf, start, end):
+        if field == _STRING_STRING_ENTRY_KEY:
+            key = buf[v[0]:v[1]].decode('utf-8')
+        elif field == _STRING_STRING_ENTRY_VALUE:
+            value = buf[v[0]:v[1]].decode('utf-8')
+    return key, value
+
+
+def _map_file(filename, access=mmap.ACCESS_READ):
+    with open(filename, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=access)
+
+
+def onnx_input_output_names(onnx_filename):
+    """Returns names of non-initializer inputs and outputs of a model.
+
+    Only the fields of the graph which hold names are decoded from the
+    memory-mapped file, so nodes and tensor payloads are never parsed
+    nor read from the disk.
+    """
+    buf = _map_file(onnx_filename)
+    try:
+        initializer_names = set()
+        inputs = []
+        output_names = []
+        for field, _, value in _proto_fields(buf, 0, len(buf)):
+            if field != _MODEL_GRAPH:
+                continue
+            for field, _, value in _proto_fields(buf, *value):
+                if field not in (_GRAPH_INITIALIZER, _GRAPH_INPUT,
+                                 _GRAPH_OUTPUT):
+                    continue
+                s, e = value
+                if field == _GRAPH_INITIALIZER:
+                    initializer_names.add(
+                        _proto_name(buf, s, e, _TENSOR_NAME))
+                elif field == _GRAPH_INPUT:
+                    inputs.append(_proto_name(buf, s, e, _VALUE_INFO_NAME))
+                elif field == _GRAPH_OUTPUT:
+                    output_names.append(
+                        _proto_name(buf, s, e, _VALUE_INFO_NAME))
+    finally:
+        buf.close()
+
+    input_names = [name for name in inputs if name not in initializer_names]
+    return input_names, output_names
+
+
+class TensorFile(object):
+    """A serialized `TensorProto` which is parsed on the first access.
+
+    Only the header of the tensor is decoded on construction. A raw
+    payload of a numeric tensor becomes a NumPy array backed by a
+    copy-on-write mapping of the file, so its pages are read when they
+    are used and updates of the array never reach the file. Such arrays
+    are not necessarily aligned. A payload in an external data file is
+    mapped in the same way. Its location is relative to the directory of
+    the tensor file. Other tensors are parsed by `onnx` in `value`.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.name = ''
+        self._data_type = None
+        self._dims = []
+        self._raw_data = None
+        self._data_location = onnx.TensorProto.DEFAULT
+        self._external_data = {}
+        self._value = None
+
+        buf = _map_file(filename)
+        try:
+            for field, wire_type, value in _proto_fields(buf, 0, len(buf)):
+                if field == _TENSOR_NAME:
+                    self.name = buf[value[0]:value[1]].decode('utf-8')
+                elif field == _TENSOR_DATA_TYPE:
+                    self._data_type = value
+                elif field == _TENSOR_RAW_DATA:
+                    self._raw_data = value
+                elif field == _TENSOR_DATA_LOCATION:
+                    self._data_location = value
+                elif field == _TENSOR_EXTERNAL_DATA:
+                    key, v = _proto_string_map(buf, *value)
+                    self._external_data[key] = v
+                elif field == _TENSOR_DIMS:
+                    if wire_type == _WIRE_VARINT:
+                        self._dims.append(value)
+                    else:
+                        # Packed dims.
+                        pos, end = value
+                        while pos < end:
+                            dim, pos = _read_varint(buf, pos)
+                            self._dims.append(dim)
+        finally:
+            buf.close()
+
+    def value(self):
+        if self._value is None:
+            self._value = self._load()
+        return self._value
+
+    def release(self):
+        self._value = None
+
+    def _is_external(self):
+        return self._data_location == onnx.TensorProto.EXTERNAL
+
+    def _load(self):
+        dtype = onnx.mapping.TENSOR_TYPE_TO_NP_TYPE.get(self._data_type)
+        if dtype is None or dtype == np.object_ or (
+                self._raw_data is None and not self._is_external()):
+            with open(self.filename, 'rb') as f:
                 tensor = onnx.TensorProto()
                 tensor.ParseFromString(f.read())
+            if self._is_external():
+                onnx.external_data_helper.load_external_data_for_tensor(
+                    tensor, os.path.dirname(self.filename))
+            return onnx.numpy_helper.to_array(tensor)
+
+        # Raw data of ONNX are always little endian.
+        dtype = np.dtype(dtype).newbyteorder('<')
+        if self._is_external():
+            filename = os.path.join(os.path.dirname(self.filename),
+                                    self._external_data['location'])
+            start = int(self._external_data.get('offset', 0))
+            if 'length' in self._external_data:
+                end = start + int(self._external_data['length'])
+            else:
+                end = os.path.getsize(filename)
+        else:
+            filename = self.filename
+            start, end = self._raw_data
+        if start == end:
+            return np.empty(self._dims, dtype=dtype)
+        buf = _map_file(filename, access=mmap.ACCESS_COPY)
+        value = np.frombuffer(buf, dtype=dtype,
+                              count=(end - start) // dtype.itemsize,
+                              offset=start)
+        return value.reshape(self._dims)
+
+
+class TestDataSet(object):
+    """Inputs and outputs in a `test_data_set_N` directory.
+
+    Files are listed and named on construction but tensors are parsed
+    on their first access. `release` drops the parsed values.
+    """
+
+    def __init__(self, data_dir, input_names, output_names):
+        self.data_dir = data_dir
+        self._inputs = self._list_tensors('input', input_names)
+        self._outputs = self._list_tensors('output', output_names)
+
+    def _list_tensors(self, kind, names):
+        names = list(names)
+        tensors = []
+        pattern = os.path.join(self.data_dir, '%s_*.pb' % kind)
+        for pb in sorted(glob.glob(pattern)):
+            tensor = TensorFile(pb)
             if tensor.name in names:
                 name = tensor.name
                 names.remove(name)
             else:
                 name = names.pop(0)
-            values.append((name, onnx.numpy_helper.to_array(tensor)))
-        inout_values.append(values)
-    return tuple(inout_values)
+            tensors.append((name, tensor))
+        return tensors
 
+    @property
+    def inputs(self):
+        return [(name, tensor.value()) for name, tensor in self._inputs]
 
-def onnx_input_output_names(onnx_filename):
-    onnx_model = onnx.load(onnx_filename)
-    initializer_names = set()
-    for initializer in onnx_model.graph.initializer:
-        initializer_names.add(initializer.name)
+    @property
+    def outputs(self):
+        return [(name, tensor.value()) for name, tensor in self._outputs]
 
-    input_names = []
-    for input in onnx_model.graph.input:
-        if input.name not in initializer_names:
-            input_names.append(input.name)
+    def release(self):
+        for _, tensor in self._inputs + self._outputs:
+            tensor.release()
 
-    output_names = []
-    for output in onnx_model.graph.output:
-        output_names.append(output.name)
 
-    return input_names, output_names
+def test_data_sets(test_dir, input_names, output_names):
+    """Yields `TestDataSet` of each `test_data_set_N` in `test_dir`.
+
+    Data sets are created one by one, so the memory is bounded by the
+    data sets which the caller keeps.
+    """
+    data_dirs = glob.glob(os.path.join(test_dir, 'test_data_set_*'))
+    # Puts test_data_set_10 after test_data_set_9.
+    data_dirs.sort(key=lambda d: (len(d), d))
+    for data_dir in data_dirs:
+        if os.path.isdir(data_dir):
+            yield TestDataSet(data_dir, input_names, output_names)
+
+
+def load_test_data(data_dir, input_names, output_names):
+    data_set = TestDataSet(data_dir, input_names, output_names)
+    return data_set.inputs, data_set.outputs
 
 
 def onnx_model_file(test_dir, model_file):